@@ -0,0 +1,40 @@
+'''holds the process of a run at the start barrier of a synchronized start, then executes the command of the run
+
+this small gate is used by CommandPerfEstimator when synchronized_start is True: the processes of the first runs of all the workers are created first and wait at the barrier, so that their commands start at once when starbench releases it, instead of one after the other
+
+usage: python barrier.py <ready fd> <go fd> <release time file> <command> [<arg> ...]
+
+- ready fd: the write end of the pipe on which the gate tells that it's waiting at the barrier
+- go fd: the read end of the pipe that the gate waits on. The barrier is released when starbench closes the write end (all the gates then see the end of file at once)
+- release time file: where the gate writes the monotonic time (in nanoseconds) at which it has been released, which is the start time of the run
+
+this script is executed by its path, so it doesn't depend on starbench being importable in the environment of the runs
+'''
+from typing import List
+import os
+import sys
+import time
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 4 or not argv[0].isdigit() or not argv[1].isdigit():
+        print('usage: python barrier.py <ready fd> <go fd> <release time file> <command> [<arg> ...]', file=sys.stderr)
+        return 2
+    ready_fd, go_fd, release_time_file_path, command = int(argv[0]), int(argv[1]), argv[2], argv[3:]
+    os.write(ready_fd, b'.')
+    os.close(ready_fd)
+    while os.read(go_fd, 1) != b'':
+        pass
+    release_ns = time.monotonic_ns()
+    os.close(go_fd)
+    with open(release_time_file_path, 'w', encoding='utf8') as file:
+        file.write(f'{release_ns}\n')
+    try:
+        os.execvp(command[0], command)
+    except OSError as err:
+        print(f'failed to run {command}: {err}', file=sys.stderr)
+    return 127  # same convention as the shells
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,223 @@
+from typing import List, Optional, Dict, Any
+from pathlib import Path
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import time
+from .core import DurationInSeconds
+from .buildtree import copy_build_tree, get_tree_size, BuildTreeCloner
+
+BuildKey = str  # the hash that identifies a build in a BuildCache
+
+
+def hash_source_tree(src_dir: Path) -> str:
+    """returns a string that identifies the contents of the given source tree
+
+    if the source tree is a clean git working tree, its git tree id is used, otherwise the contents of its files are hashed
+    """
+    try:
+        status = subprocess.run(['git', 'status', '--porcelain', '--', '.'], cwd=src_dir, capture_output=True, text=True, check=True).stdout
+        if status == '':
+            tree_id = subprocess.run(['git', 'rev-parse', 'HEAD:./'], cwd=src_dir, capture_output=True, text=True, check=True).stdout.strip()
+            return f'git-tree:{tree_id}'
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    sha = hashlib.sha256()
+    for dir_path, dir_names, file_names in os.walk(src_dir):
+        dir_names[:] = sorted(dir_name for dir_name in dir_names if dir_name != '.git')
+        for file_name in sorted(file_names):
+            file_path = Path(dir_path) / file_name
+            sha.update(str(file_path.relative_to(src_dir)).encode('utf8') + b'\0')
+            if file_path.is_symlink():
+                sha.update(os.readlink(file_path).encode('utf8'))
+            else:
+                sha.update(f'{os.stat(file_path).st_mode:o}'.encode('utf8'))
+                sha.update(file_path.read_bytes())
+            sha.update(b'\0')
+    return f'contents:{sha.hexdigest()}'
+
+
+def get_program_identity(program: str) -> str:
+    """returns the first line of the version of the given program (eg 'GNU Fortran (Debian 12.2.0-14) 12.2.0'), or 'not found'
+    """
+    try:
+        output = subprocess.run([program, '--version'], capture_output=True, text=True, check=False).stdout
+        return output.split('\n')[0]
+    except OSError:
+        return 'not found'
+
+
+def get_compiler_identity(env_vars: Optional[Dict[str, str]] = None) -> str:
+    """returns a string that identifies the compilers that cmake would use by default
+
+    env_vars: environment variables that override the ones of this process (eg CC, CXX and FC to select a toolchain)
+    """
+    env = os.environ.copy()
+    if env_vars is not None:
+        env.update(env_vars)
+    compilers = []
+    for compiler_var, default_compiler in [('CC', 'cc'), ('CXX', 'c++'), ('FC', 'gfortran')]:
+        compiler = env.get(compiler_var, default_compiler)
+        compilers.append(f'{compiler_var}={compiler} ({get_program_identity(compiler)})')
+    return ', '.join(compilers)
+
+
+class BuildCache():
+    """a content addressed cache of cmake build trees, shared by successive starbench campaigns
+
+    a build is identified by a hash of the source tree and its location (which cmake stores in the build tree), the cmake options, the cmake program and the compilers. The least recently used builds are evicted when the cache exceeds its maximum size. The cache can be shared by several starbench processes.
+    """
+    cache_dir: Path  # the directory where the cached builds are stored
+    max_size: int  # the maximum size of the cache, in bytes
+    num_hits: int  # the number of lookups that found their build in the cache (in this process)
+    num_misses: int  # the number of lookups that didn't find their build in the cache (in this process)
+    time_saved: DurationInSeconds  # the build time that has been saved thanks to the cache (in this process)
+
+    def __init__(self, cache_dir: Path, max_size: int = 10 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.num_hits = 0
+        self.num_misses = 0
+        self.time_saved = 0.0
+        (self.cache_dir / 'entries').mkdir(exist_ok=True, parents=True)
+
+    @staticmethod
+    def compute_key(src_dir: Path, cmake_options: List[str], cmake_prog: str, env_vars: Optional[Dict[str, str]] = None) -> BuildKey:
+        """
+        env_vars: the environment variables the build is performed with, in addition to the ones of this process
+        """
+        sha = hashlib.sha256()
+        # the build tree refers to its source tree by its absolute path, and only the location of the build tree is updated on restore
+        for key_part in [hash_source_tree(src_dir), str(src_dir.resolve()), json.dumps(cmake_options), cmake_prog, get_program_identity(cmake_prog), get_compiler_identity(env_vars), json.dumps(env_vars, sort_keys=True)]:
+            sha.update(key_part.encode('utf8') + b'\0')
+        return sha.hexdigest()
+
+    @contextmanager
+    def _lock(self):
+        """prevents other starbench processes from modifying the cache
+        """
+        with open(self.cache_dir / 'lock', 'w', encoding='utf8') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _get_entry_dir(self, key: BuildKey) -> Path:
+        return self.cache_dir / 'entries' / key
+
+    @staticmethod
+    def _read_entry_info(entry_dir: Path) -> Dict[str, Any]:
+        with open(entry_dir / 'entry.json', 'rt', encoding='utf8') as file:
+            return json.load(file)
+
+    @staticmethod
+    def _write_entry_info(entry_dir: Path, entry_info: Dict[str, Any]):
+        tmp_file_path = entry_dir / 'entry.json.tmp'
+        with open(tmp_file_path, 'wt', encoding='utf8') as file:
+            json.dump(entry_info, file)
+        tmp_file_path.rename(entry_dir / 'entry.json')
+
+    def restore(self, key: BuildKey, build_dirs: List[Path]) -> bool:
+        """copies the cached build identified by key into each of the given build directories
+
+        returns False (cache miss) if the cache doesn't contain this build
+        """
+        with self._lock():
+            entry_dir = self._get_entry_dir(key)
+            is_hit = (entry_dir / 'entry.json').exists()
+            if is_hit:
+                entry_info = BuildCache._read_entry_info(entry_dir)
+                entry_info['last_used'] = time.time()
+                BuildCache._write_entry_info(entry_dir, entry_info)
+                for build_dir in build_dirs:
+                    # the cached tree must not share its files with the restored trees, as these might be modified (eg by an incremental build)
+                    copy_build_tree(entry_dir / 'build', build_dir, src_build_location=Path(entry_info['build_dir']), clone_method='reflink')
+        if not is_hit:
+            self.num_misses += 1
+            self._update_total_stats(num_misses=1)
+            return False
+        self.num_hits += 1
+        self.time_saved += entry_info['build_duration']
+        self._update_total_stats(num_hits=1, time_saved=entry_info['build_duration'])
+        return True
+
+    def store(self, key: BuildKey, build_dir: Path, build_duration: DurationInSeconds):
+        """stores the given build tree in the cache
+
+        build_duration: the time it took to configure and build this build tree, which is the time saved by each future hit
+        """
+        size = get_tree_size(build_dir)
+        if size > self.max_size:
+            print(f'the build {build_dir} ({size} bytes) is larger than the build cache ({self.max_size} bytes), so it is not cached')
+            return
+        with self._lock():
+            entry_dir = self._get_entry_dir(key)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir)
+            tmp_entry_dir = self.cache_dir / 'entries' / f'{key}.tmp'
+            if tmp_entry_dir.exists():
+                shutil.rmtree(tmp_entry_dir)
+            tmp_entry_dir.mkdir()
+            shutil.copytree(build_dir, tmp_entry_dir / 'build', symlinks=True, copy_function=BuildTreeCloner('reflink').copy_file)
+            BuildCache._write_entry_info(tmp_entry_dir, {'build_dir': str(build_dir), 'build_duration': build_duration, 'size': size, 'last_used': time.time()})
+            tmp_entry_dir.rename(entry_dir)
+            self._evict(keep=key)
+
+    def _evict(self, keep: BuildKey):
+        """removes the least recently used builds until the cache fits its maximum size
+
+        the cache is expected to be locked
+        """
+        entries = []
+        for entry_dir in (self.cache_dir / 'entries').iterdir():
+            if (entry_dir / 'entry.json').exists():
+                entries.append((BuildCache._read_entry_info(entry_dir), entry_dir))
+        cache_size = sum(entry_info['size'] for entry_info, _entry_dir in entries)
+        for entry_info, entry_dir in sorted(entries, key=lambda entry: entry[0]['last_used']):
+            if cache_size <= self.max_size:
+                break
+            if entry_dir.name == keep:
+                continue
+            print(f'evicting build {entry_dir.name} from the build cache')
+            shutil.rmtree(entry_dir)
+            cache_size -= entry_info['size']
+
+    def _update_total_stats(self, num_hits: int = 0, num_misses: int = 0, time_saved: DurationInSeconds = 0.0):
+        """updates the statistics of the cache, accumulated across all starbench processes
+        """
+        with self._lock():
+            stats = self.get_total_stats()
+            stats['num_hits'] += num_hits
+            stats['num_misses'] += num_misses
+            stats['time_saved'] += time_saved
+            with open(self.cache_dir / 'stats.json', 'wt', encoding='utf8') as file:
+                json.dump(stats, file)
+
+    def get_total_stats(self) -> Dict[str, Any]:
+        """returns the statistics of the cache (num_hits, num_misses, time_saved) accumulated across all starbench processes
+        """
+        stats_file_path = self.cache_dir / 'stats.json'
+        if not stats_file_path.exists():
+            return {'num_hits': 0, 'num_misses': 0, 'time_saved': 0.0}
+        with open(stats_file_path, 'rt', encoding='utf8') as file:
+            return json.load(file)
+
+    def get_report(self) -> str:
+        total_stats = self.get_total_stats()
+        return f'build cache {self.cache_dir}: {self.num_hits} hit(s), {self.num_misses} miss(es), {self.time_saved:.1f} s saved (since its creation: {total_stats["num_hits"]} hit(s), {total_stats["num_misses"]} miss(es), {total_stats["time_saved"]:.1f} s saved)'
+
+
+def parse_size(size: Optional[str]) -> Optional[int]:
+    """parses a size in bytes, with an optional unit suffix (eg '500M', '10G')
+    """
+    if size is None:
+        return None
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+    if size[-1].upper() in units:
+        return int(float(size[:-1]) * units[size[-1].upper()])
+    return int(size)
@@ -0,0 +1,141 @@
+from pathlib import Path
+import fcntl
+import os
+import shutil
+import stat
+from .core import StarBenchException
+
+FICLONE = 0x40049409  # the ioctl that creates a reflink (copy on write clone) of a file, from linux/fs.h
+
+CLONE_METHODS = ['copy', 'reflink', 'auto']
+
+# the suffixes of the build artifacts that are not expected to be modified once built
+READ_ONLY_ARTIFACT_SUFFIXES = ['.o', '.obj', '.a', '.so', '.dylib', '.mod', '.smod']
+
+
+def is_text_file(file_path: Path) -> bool:
+    """heuristically decides if the given file is a text file (ie it doesn't contain any null byte in its first block)
+    """
+    with open(file_path, 'rb') as file:
+        return b'\0' not in file.read(8192)
+
+
+def is_read_only_artifact(file_path: Path) -> bool:
+    """decides if the given file of a build tree is a build artifact that the tests are not expected to modify (executables, libraries, object files, fortran modules)
+    """
+    if os.stat(file_path).st_mode & stat.S_IXUSR:
+        return True
+    return any(file_path.name.endswith(suffix) or f'{suffix}.' in file_path.name for suffix in READ_ONLY_ARTIFACT_SUFFIXES)
+
+
+def reflink_file(src_file_path: Path, dst_file_path: Path) -> bool:
+    """creates dst_file_path as a copy on write clone of src_file_path
+
+    returns False if the filesystem doesn't support reflinks
+    """
+    try:
+        with open(src_file_path, 'rb') as src_file, open(dst_file_path, 'wb') as dst_file:
+            fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    except OSError:
+        if os.path.lexists(dst_file_path):
+            os.unlink(dst_file_path)
+        return False
+    shutil.copystat(src_file_path, dst_file_path)
+    return True
+
+
+class BuildTreeCloner():
+    """copies the files of a build tree using the cheapest method allowed by clone_method:
+
+    - 'copy': real copies
+    - 'reflink': copy on write clones when the filesystem supports them (eg btrfs, xfs), real copies otherwise
+    - 'auto': copy on write clones when the filesystem supports them, otherwise hard links for the read-only build artifacts (executables, libraries, etc.) and real copies for the other files (which the tests might write)
+    """
+    clone_method: str
+    num_copied_files: int
+    num_reflinked_files: int
+    num_hardlinked_files: int
+    _reflinks_are_supported: bool  # becomes False as soon as a reflink fails, to avoid trying for each file
+
+    def __init__(self, clone_method: str = 'copy'):
+        if clone_method not in CLONE_METHODS:
+            raise StarBenchException(f'unexpected clone method: {clone_method} (expected one of {CLONE_METHODS})')
+        self.clone_method = clone_method
+        self.num_copied_files = 0
+        self.num_reflinked_files = 0
+        self.num_hardlinked_files = 0
+        self._reflinks_are_supported = clone_method != 'copy'
+
+    def copy_file(self, src_file_path: str, dst_file_path: str):
+        """copy function compatible with shutil.copytree
+        """
+        if self._reflinks_are_supported:
+            if reflink_file(Path(src_file_path), Path(dst_file_path)):
+                self.num_reflinked_files += 1
+                return dst_file_path
+            self._reflinks_are_supported = False
+        if self.clone_method == 'auto' and is_read_only_artifact(Path(src_file_path)):
+            try:
+                os.link(src_file_path, dst_file_path)
+                self.num_hardlinked_files += 1
+                return dst_file_path
+            except OSError:
+                # eg src and dst are not on the same filesystem
+                pass
+        shutil.copy2(src_file_path, dst_file_path)
+        self.num_copied_files += 1
+        return dst_file_path
+
+    def get_report(self) -> str:
+        return f'{self.num_reflinked_files} file(s) reflinked, {self.num_hardlinked_files} file(s) hard linked, {self.num_copied_files} file(s) copied'
+
+
+def relocate_build_tree(build_dir: Path, old_build_dir: Path, new_build_dir: Path):
+    """replaces the references to old_build_dir by references to new_build_dir in the text files of the build tree build_dir
+
+    cmake build trees contain absolute paths to themselves (CMakeCache.txt, makefiles, ctest files, etc.), so a build tree that has been copied from old_build_dir into new_build_dir needs to be patched to be usable. Binary files (executables, libraries) are left untouched.
+    """
+    old_path = str(old_build_dir).encode('utf8')
+    new_path = str(new_build_dir).encode('utf8')
+    if old_path == new_path:
+        return
+    for dir_path, _dir_names, file_names in os.walk(build_dir):
+        for file_name in file_names:
+            file_path = Path(dir_path) / file_name
+            if file_path.is_symlink() or not is_text_file(file_path):
+                continue
+            contents = file_path.read_bytes()
+            if old_path in contents:
+                # write a new file instead of modifying the existing one, in case it's shared with another tree
+                file_stat = file_path.stat()
+                file_path.unlink()
+                file_path.write_bytes(contents.replace(old_path, new_path))
+                os.utime(file_path, ns=(file_stat.st_atime_ns, file_stat.st_mtime_ns))
+                os.chmod(file_path, file_stat.st_mode)
+
+
+def copy_build_tree(src_build_dir: Path, dst_build_dir: Path, src_build_location: Path = None, clone_method: str = 'copy') -> BuildTreeCloner:
+    """copies the build tree src_build_dir into dst_build_dir (replacing it if it already exists) and makes the copy usable at its new location
+
+    src_build_location: the location where the build tree src_build_dir has been built, if it differs from src_build_dir (eg a build tree stored in a cache)
+    clone_method: how the files are copied (see BuildTreeCloner)
+    """
+    if src_build_location is None:
+        src_build_location = src_build_dir
+    if dst_build_dir.exists():
+        shutil.rmtree(dst_build_dir)
+    dst_build_dir.parent.mkdir(exist_ok=True, parents=True)
+    cloner = BuildTreeCloner(clone_method)
+    shutil.copytree(src_build_dir, dst_build_dir, symlinks=True, copy_function=cloner.copy_file)
+    relocate_build_tree(dst_build_dir, src_build_location, dst_build_dir)
+    return cloner
+
+
+def get_tree_size(root_dir: Path) -> int:
+    """returns the size in bytes of the files in the given directory tree
+    """
+    size = 0
+    for dir_path, _dir_names, file_names in os.walk(root_dir):
+        for file_name in file_names:
+            size += os.lstat(Path(dir_path) / file_name).st_size
+    return size
@@ -0,0 +1,196 @@
+from typing import List, Tuple, Dict, Any, Optional
+import math
+import random
+import statistics
+from .core import StarbenchResults, MeasurementsTable, IOutlierFilter, METRIC_COLUMN_PREFIX
+
+
+def _rank(values: List[float]) -> Tuple[List[float], List[int]]:
+    """returns the ranks (starting at 1, tied values get the average of their ranks) of the given values, and the sizes of the groups of tied values
+    """
+    order = sorted(range(len(values)), key=lambda i: values[i])
+    ranks = [0.0] * len(values)
+    tie_sizes = []
+    i = 0
+    while i < len(order):
+        j = i
+        while j + 1 < len(order) and values[order[j + 1]] == values[order[i]]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[order[k]] = (i + j) / 2.0 + 1.0
+        tie_sizes.append(j - i + 1)
+        i = j + 1
+    return ranks, tie_sizes
+
+
+def _mann_whitney_u_exact_sf(u: float, n1: int, n2: int) -> float:
+    """returns P(U >= u) under the null hypothesis, for samples without ties
+
+    the distribution of U is computed by counting the arrangements of the 2 samples (dynamic programming), which is only practical for small samples
+    """
+    # counts[i][j][k]: number of arrangements of i values of sample 1 and j values of sample 2 with U = k
+    counts = [[None] * (n2 + 1) for _ in range(n1 + 1)]
+    for i in range(n1 + 1):
+        for j in range(n2 + 1):
+            if i == 0 or j == 0:
+                counts[i][j] = [1]
+                continue
+            # the largest value belongs either to sample 1 (it's larger than the j values of sample 2) or to sample 2
+            from_sample1 = [0] * j + counts[i - 1][j]
+            from_sample2 = counts[i][j - 1]
+            size = max(len(from_sample1), len(from_sample2))
+            counts[i][j] = [(from_sample1[k] if k < len(from_sample1) else 0) + (from_sample2[k] if k < len(from_sample2) else 0) for k in range(size)]
+    distribution = counts[n1][n2]
+    num_arrangements = sum(distribution)
+    return sum(distribution[k] for k in range(len(distribution)) if k >= u - 1e-9) / num_arrangements
+
+
+def mann_whitney_u_greater(sample1: List[float], sample2: List[float]) -> Tuple[float, float]:
+    """one-sided mann-whitney u test of the hypothesis that the values of sample1 tend to be greater than those of sample2
+
+    returns the statistic U of sample1 and the p-value. The p-value is exact for small samples without ties, and uses the normal approximation (with tie and continuity corrections) otherwise
+    """
+    n1 = len(sample1)
+    n2 = len(sample2)
+    assert n1 > 0 and n2 > 0
+    ranks, tie_sizes = _rank(list(sample1) + list(sample2))
+    u = sum(ranks[:n1]) - n1 * (n1 + 1) / 2.0
+    has_ties = any(tie_size > 1 for tie_size in tie_sizes)
+    if not has_ties and n1 * n2 <= 400:
+        return u, _mann_whitney_u_exact_sf(u, n1, n2)
+    n = n1 + n2
+    tie_correction = sum(t ** 3 - t for t in tie_sizes) / (n * (n - 1))
+    sigma = math.sqrt(n1 * n2 / 12.0 * ((n + 1) - tie_correction))
+    if sigma == 0.0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / sigma
+    return u, 1.0 - statistics.NormalDist().cdf(z)
+
+
+def get_relative_change(baseline_value: float, candidate_value: float) -> float:
+    if baseline_value == 0.0:
+        return 0.0 if candidate_value == 0.0 else math.copysign(math.inf, candidate_value)
+    return (candidate_value - baseline_value) / abs(baseline_value)
+
+
+def bootstrap_relative_change_interval(baseline: List[float], candidate: List[float], confidence: float = 0.95, num_resamples: int = 2000, seed: int = 0) -> Tuple[float, float]:
+    """returns the confidence interval of the relative change of the median from baseline to candidate, estimated with a percentile bootstrap
+
+    seed: the seed of the random resampling, so that a comparison always gives the same interval
+    """
+    rng = random.Random(seed)
+    relative_changes = []
+    for _ in range(num_resamples):
+        baseline_median = statistics.median(rng.choices(baseline, k=len(baseline)))
+        candidate_median = statistics.median(rng.choices(candidate, k=len(candidate)))
+        relative_changes.append(get_relative_change(baseline_median, candidate_median))
+    relative_changes.sort()
+    lower_index = int(math.floor((1.0 - confidence) / 2.0 * (num_resamples - 1)))
+    upper_index = int(math.ceil((1.0 + confidence) / 2.0 * (num_resamples - 1)))
+    return relative_changes[lower_index], relative_changes[upper_index]
+
+
+class SampleComparison():
+    """the comparison of the values of a metric measured on a candidate with the values measured on a baseline
+    """
+    baseline_median: float
+    candidate_median: float
+    relative_change: float  # the relative change of the median (eg 0.1 means that the candidate's median is 10 % larger)
+    relative_change_interval: Tuple[float, float]  # the bootstrap confidence interval of relative_change
+    p_value: float  # the p-value of the one-sided mann-whitney u test of the hypothesis that the candidate is worse
+    higher_is_better: bool  # False for metrics such as durations, True for metrics such as throughputs
+    slowdown_threshold: float  # the relative worsening above which a regression is considered relevant
+    alpha: float  # the significance level
+
+    def __init__(self, baseline: List[float], candidate: List[float], slowdown_threshold: float = 0.05, alpha: float = 0.05, higher_is_better: bool = False, confidence: float = 0.95):
+        self.baseline_median = statistics.median(baseline)
+        self.candidate_median = statistics.median(candidate)
+        self.relative_change = get_relative_change(self.baseline_median, self.candidate_median)
+        self.relative_change_interval = bootstrap_relative_change_interval(baseline, candidate, confidence)
+        if higher_is_better:
+            _u, self.p_value = mann_whitney_u_greater(baseline, candidate)
+        else:
+            _u, self.p_value = mann_whitney_u_greater(candidate, baseline)
+        self.higher_is_better = higher_is_better
+        self.slowdown_threshold = slowdown_threshold
+        self.alpha = alpha
+
+    def get_relative_worsening(self) -> float:
+        """returns the relative change of the median, counted positively when the candidate is worse
+        """
+        return -self.relative_change if self.higher_is_better else self.relative_change
+
+    def is_significant_slowdown(self) -> bool:
+        """indicates if the candidate is worse than the baseline by more than the threshold, in a statistically significant way
+        """
+        return self.get_relative_worsening() > self.slowdown_threshold and self.p_value < self.alpha
+
+    def __str__(self) -> str:
+        return f'median {self.baseline_median:.6g} -> {self.candidate_median:.6g} ({self.relative_change * 100.0:+.2f} %, confidence interval [{self.relative_change_interval[0] * 100.0:+.2f} %, {self.relative_change_interval[1] * 100.0:+.2f} %], p-value = {self.p_value:.4f})'
+
+
+class ResultsComparison(SampleComparison):
+    """the comparison of the durations of a candidate campaign with the durations of a baseline campaign
+
+    the warmup runs and the outliers (if the results have an outlier filter) are left out
+    """
+
+    def __init__(self, baseline: StarbenchResults, candidate: StarbenchResults, slowdown_threshold: float = 0.05, alpha: float = 0.05):
+        super().__init__(list(baseline.get_filtered_durations().values()), list(candidate.get_filtered_durations().values()), slowdown_threshold, alpha)
+
+
+# the columns that identify the distinct measurement sets of a measurements table (the variants of a matrix campaign, the tests of a test suite)
+GROUP_COLUMNS = ['cmake_options', 'toolchain', 'benchmark_command', 'variant', 'test']
+
+
+def get_compared_metrics(baseline: MeasurementsTable, candidate: MeasurementsTable) -> List[str]:
+    """returns the metrics that are compared by default: the duration and the metric columns present in both tables
+    """
+    return ['duration'] + [column for column in baseline.columns if column.startswith(METRIC_COLUMN_PREFIX) and column in candidate.columns]
+
+
+def compare_measurements(baseline: MeasurementsTable, candidate: MeasurementsTable, metrics: Optional[List[str]] = None, higher_is_better_metrics: Optional[List[str]] = None, slowdown_threshold: float = 0.05, alpha: float = 0.05, confidence: float = 0.95, phase: str = 'benchmark', outlier_filter: Optional[IOutlierFilter] = None, group_columns: Optional[List[str]] = None) -> List[Tuple[Dict[str, Any], str, SampleComparison]]:
+    """compares the metrics of the runs of 2 measurements tables, for each measurement set (see GROUP_COLUMNS) present in both tables
+
+    metrics: the columns to compare. None means the duration and the metric columns (see get_compared_metrics)
+    higher_is_better_metrics: the metrics for which a larger value is better (eg throughputs)
+    outlier_filter: if not None, the outliers of each metric are left out of the comparison
+    group_columns: the columns that identify the measurement sets. None means the columns of GROUP_COLUMNS that are present in both tables
+
+    returns the comparison of each (measurement set, metric), the measurement set being identified by the values of its group columns
+    """
+    if metrics is None:
+        metrics = get_compared_metrics(baseline, candidate)
+    if higher_is_better_metrics is None:
+        higher_is_better_metrics = []
+    if group_columns is None:
+        group_columns = GROUP_COLUMNS
+    group_columns = [column for column in group_columns if column in baseline.columns and column in candidate.columns]
+
+    def filter_outliers(values: List[float]) -> List[float]:
+        if outlier_filter is None:
+            return values
+        return [value for value, is_outlier in zip(values, outlier_filter.get_outlier_mask(values)) if not is_outlier]
+
+    def get_groups(table: MeasurementsTable) -> Dict[Tuple, List[Dict[str, Any]]]:
+        groups = {}
+        for row in table.rows:
+            if row.get('phase', phase) != phase:
+                continue
+            groups.setdefault(tuple(row.get(column) for column in group_columns), []).append(row)
+        return groups
+
+    baseline_groups = get_groups(baseline)
+    candidate_groups = get_groups(candidate)
+    comparisons = []
+    for group_key, baseline_rows in baseline_groups.items():
+        if group_key not in candidate_groups:
+            continue
+        for metric in metrics:
+            baseline_values = filter_outliers([row[metric] for row in baseline_rows if row.get(metric) is not None])
+            candidate_values = filter_outliers([row[metric] for row in candidate_groups[group_key] if row.get(metric) is not None])
+            if len(baseline_values) == 0 or len(candidate_values) == 0:
+                continue
+            comparison = SampleComparison(baseline_values, candidate_values, slowdown_threshold, alpha, metric in higher_is_better_metrics, confidence)
+            comparisons.append((dict(zip(group_columns, group_key)), metric, comparison))
+    return comparisons
@@ -5,12 +5,18 @@
 __version__ = '1.0.0'
 import threading
 import abc
+import array
 import subprocess
 import os
 import sys
+import time
+import selectors
 import statistics
-import pandas as pd
-from typing import List, Dict, Optional, Callable, Any, Tuple
+import math
+import csv
+import shutil
+import tempfile
+from typing import List, Dict, Optional, Callable, Any, Tuple, Set
 from datetime import datetime
 from pathlib import Path
 from abc import ABC, abstractmethod
@@ -46,41 +52,625 @@ ProcessId = int
 ReturnCode = int
 Url = str
 UserId = str  # user login, eg graffy
+CoreId = int  # identifier of a logical cpu, as used by sched_setaffinity
+CoreSet = List[CoreId]  # the logical cpus a process is allowed to run on
+TimeInNanoseconds = int  # a time given by a monotonic clock (time.monotonic_ns)
+
+
+class ResourceUsage():
+    """the resources used by the process of a run (and its waited-for descendants), as reported by the kernel when the process is reaped (see getrusage(2))
+    """
+    user_time: DurationInSeconds  # the time spent executing in user mode
+    system_time: DurationInSeconds  # the time spent executing in kernel mode
+    max_rss: int  # the maximum resident set size, in kibibytes (as this is a high-water mark, it can't be lower than the resident set size of the forked starbench process before it executes the command)
+    major_page_faults: int  # the page faults that required i/o
+    minor_page_faults: int  # the page faults serviced without any i/o
+    voluntary_context_switches: int  # the context switches caused by the process waiting for a resource (eg i/o)
+    involuntary_context_switches: int  # the context switches caused by the scheduler preempting the process (eg oversubscription)
+
+    FIELD_NAMES = ['user_time', 'system_time', 'max_rss', 'major_page_faults', 'minor_page_faults', 'voluntary_context_switches', 'involuntary_context_switches']
+
+    def __init__(self, user_time: DurationInSeconds, system_time: DurationInSeconds, max_rss: int, major_page_faults: int, minor_page_faults: int, voluntary_context_switches: int, involuntary_context_switches: int):
+        self.user_time = user_time
+        self.system_time = system_time
+        self.max_rss = max_rss
+        self.major_page_faults = major_page_faults
+        self.minor_page_faults = minor_page_faults
+        self.voluntary_context_switches = voluntary_context_switches
+        self.involuntary_context_switches = involuntary_context_switches
+
+    @staticmethod
+    def from_rusage(rusage) -> 'ResourceUsage':
+        """creates a ResourceUsage from the resource.struct_rusage returned by os.wait4
+        """
+        return ResourceUsage(rusage.ru_utime, rusage.ru_stime, rusage.ru_maxrss, rusage.ru_majflt, rusage.ru_minflt, rusage.ru_nvcsw, rusage.ru_nivcsw)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {field_name: getattr(self, field_name) for field_name in ResourceUsage.FIELD_NAMES}
+
+
+def student_t_quantile(p: float, num_degrees_of_freedom: int) -> float:
+    """returns the p-quantile of student's t distribution
+
+    the quantile is exact for 1 and 2 degrees of freedom, and computed with the cornish-fisher expansion of the normal quantile otherwise (abramowitz and stegun 26.7.5), which is accurate to about 1e-3 for 3 degrees of freedom and better above
+    """
+    assert 0.0 < p < 1.0
+    assert num_degrees_of_freedom >= 1
+    n = num_degrees_of_freedom
+    if n == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if n == 2:
+        return (2.0 * p - 1.0) / math.sqrt(2.0 * p * (1.0 - p))
+    x = statistics.NormalDist().inv_cdf(p)
+    g1 = (x ** 3 + x) / 4.0
+    g2 = (5.0 * x ** 5 + 16.0 * x ** 3 + 3.0 * x) / 96.0
+    g3 = (3.0 * x ** 7 + 19.0 * x ** 5 + 17.0 * x ** 3 - 15.0 * x) / 384.0
+    g4 = (79.0 * x ** 9 + 776.0 * x ** 7 + 1482.0 * x ** 5 - 1920.0 * x ** 3 - 945.0 * x) / 92160.0
+    return x + g1 / n + g2 / n ** 2 + g3 / n ** 3 + g4 / n ** 4
+
+
+class RunningStats():
+    """statistics of a series of values, updated in O(1) each time a value is added (welford's algorithm)
+    """
+    num_values: int
+    mean: float
+    min: float
+    max: float
+    _m2: float  # the sum of the squared differences to the mean
+
+    def __init__(self):
+        self.num_values = 0
+        self.mean = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self._m2 = 0.0
+
+    def add_value(self, value: float):
+        self.num_values += 1
+        delta = value - self.mean
+        self.mean += delta / self.num_values
+        self._m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def get_variance(self) -> float:
+        """returns the (unbiased) sample variance
+        """
+        assert self.num_values >= 2
+        return self._m2 / (self.num_values - 1)
+
+    def get_stddev(self) -> float:
+        return math.sqrt(self.get_variance())
+
+    def get_standard_error(self) -> float:
+        """returns the standard error of the mean
+        """
+        return self.get_stddev() / math.sqrt(self.num_values)
+
+    def get_confidence_interval_half_width(self, confidence: float = 0.95) -> float:
+        """returns the half width of the confidence interval of the mean (student's t interval)
+        """
+        return student_t_quantile(0.5 + confidence / 2.0, self.num_values - 1) * self.get_standard_error()
+
+
+class IOutlierFilter(ABC):
+    """abstract handler that decides which values of a series of measurements are outliers (eg a run slowed down by a noisy neighbour)
+    """
+    @abstractmethod
+    def get_outlier_mask(self, values: List[float]) -> List[bool]:
+        """returns for each of the given values whether it's an outlier
+        """
+
+
+class IMetricExtractor(ABC):
+    """abstract handler that extracts application metrics (eg a throughput printed by the benchmark) from the output of the runs
+    """
+    @abstractmethod
+    def extract(self, line: str) -> Dict[str, float]:
+        """returns the value of the metrics found in the given line of output (an empty dict if there's none)
+        """
+
+    def needs_output(self) -> bool:
+        """returns False if this extractor doesn't read the output of the runs (it only collects the files they leave, see collect)
+        """
+        return True
+
+    def collect(self, run_cwd: Path) -> Dict[str, float]:
+        """returns the metrics found in the files left by the run that just ended in the given directory (eg a test report). Called at the end of each run
+        """
+        return {}
+
+
+TelemetryEvent = Dict[str, Any]  # a json serializable event, with its type ('event'), its wall clock time ('time', in seconds since the epoch) and the current phase ('phase')
+
+
+class ITelemetrySink(ABC):
+    """abstract receiver of the events of the campaigns (phase changes, runs started and finished, running statistics, stop decisions), as they happen
+    """
+    @abstractmethod
+    def on_event(self, event: TelemetryEvent):
+        """called from the thread that produced the event (the sink has to be thread safe)
+        """
+
+
+class Telemetry(metaclass=Singleton):
+    """dispatches the events of all the campaigns of this process to the registered sinks
+
+    when no sink is registered, emitting an event costs a single test
+    """
+    sinks: List[ITelemetrySink]
+    phase: Optional[str]  # the current phase (eg 'configure', 'build', 'benchmark'), attached to each event
+
+    def __init__(self):
+        self.sinks = []
+        self.phase = None
+
+    def add_sink(self, sink: ITelemetrySink):
+        self.sinks = self.sinks + [sink]  # the list is replaced rather than modified, so that it can be iterated without lock
+
+    def remove_sink(self, sink: ITelemetrySink):
+        self.sinks = [s for s in self.sinks if s is not sink]
+
+    def is_enabled(self) -> bool:
+        return len(self.sinks) != 0
+
+    def emit(self, event_type: str, **fields):
+        sinks = self.sinks
+        if len(sinks) == 0:
+            return
+        event = {'event': event_type, 'time': time.time(), 'phase': self.phase}
+        event.update(fields)
+        for sink in sinks:
+            sink.on_event(event)
+
+    def set_phase(self, phase: str, **fields):
+        """tells that the campaigns now perform the given phase
+        """
+        self.phase = phase
+        self.emit('phase', **fields)
+
+
+class IRunLogSink(ABC):
+    """abstract destination of an output stream (standard output or standard error) of a run
+
+    unless the sink is direct (see is_direct), the output is read through a pipe and fed to the sink while the run is going
+    """
+    def is_direct(self) -> bool:
+        """returns True if the process can write its output directly to get_direct_path(), without any pipe (the sink is then never fed)
+        """
+        return False
+
+    def get_direct_path(self) -> Optional[Path]:
+        """returns the file the process writes to when the sink is direct (None means the output of starbench)
+        """
+        return None
+
+    @abstractmethod
+    def write(self, data: bytes):
+        """called with each chunk of output read from the pipe
+        """
+
+    @abstractmethod
+    def close(self, return_code: ReturnCode):
+        """called once the whole output of the run has been read
+        """
+
+
+class IRunLogPolicy(ABC):
+    """abstract handler that decides what is done with the standard output and error of the runs (see IRunLogSink)
+    """
+    def start(self, log_cores: Optional[CoreSet]):
+        """called at the start of the campaign
+
+        log_cores: the cores that no worker is bound to, on which the log handling threads should run (None if unknown)
+        """
+
+    @abstractmethod
+    def create_sink(self, run_id: RunId, filepath: Optional[Path]) -> IRunLogSink:
+        """creates the sink of an output stream of the given run
+
+        filepath: the output file of the stream (None if it has none)
+        """
+
+    def stop(self):
+        """called at the end of the campaign, once the output of all runs has been read
+        """
+
+    def get_report(self) -> Optional[str]:
+        """returns a summary of the log handling cost, if any
+        """
+        return None
+
+
+class FileLogSink(IRunLogSink):
+    """writes the output to a file, overwritten by each run of the same worker
+    """
+    filepath: Optional[Path]  # None means the output of starbench (or discarded when the output is read through a pipe)
+    _file: Optional[Any]
+
+    def __init__(self, filepath: Optional[Path]):
+        self.filepath = filepath
+        self._file = None
+
+    def is_direct(self) -> bool:
+        return True
+
+    def get_direct_path(self) -> Optional[Path]:
+        return self.filepath
+
+    def write(self, data: bytes):
+        if self.filepath is None:
+            return
+        if self._file is None:
+            self._file = open(self.filepath, 'wb')  # pylint: disable=consider-using-with
+        self._file.write(data)
+
+    def close(self, return_code: ReturnCode):
+        if self._file is not None:
+            self._file.close()
+
+
+class FileLogPolicy(IRunLogPolicy):
+    """the processes write their output directly to their output file (the default policy)
+    """
+    def create_sink(self, run_id: RunId, filepath: Optional[Path]) -> IRunLogSink:
+        return FileLogSink(filepath)
+
+
+class RunOutputReader():
+    """reads an output stream of the process of a run through a pipe while the run is going, feeds it to a log sink, and passes each line to the metric extractors (if any)
+
+    the reading thread runs on the given cores (if any), so that it doesn't compete with the processes of the runs. When a metric is found several times in the output of a run, the last value is kept
+    """
+    sink: IRunLogSink
+    metrics: Dict[str, float]  # the metrics found so far
+    num_bytes: int  # the number of bytes read so far
+    cpu_time: DurationInSeconds  # the cpu time used by the reading thread
+    _pipe: Any  # the read end of the pipe (binary file object)
+    _metric_extractors: List[IMetricExtractor]
+    _cores: Optional[CoreSet]
+    _thread: threading.Thread
+
+    def __init__(self, pipe, sink: IRunLogSink, metric_extractors: List[IMetricExtractor], cores: Optional[CoreSet] = None):
+        self.sink = sink
+        self.metrics = {}
+        self.num_bytes = 0
+        self.cpu_time = 0.0
+        self._pipe = pipe
+        self._metric_extractors = metric_extractors
+        self._cores = cores
+        self._thread = threading.Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        if self._cores is not None:
+            os.sched_setaffinity(0, self._cores)  # on linux, this only binds the calling thread
+        try:
+            if len(self._metric_extractors) != 0:
+                for line in self._pipe:
+                    self.num_bytes += len(line)
+                    self.sink.write(line)
+                    decoded_line = line.decode('utf8', errors='replace')
+                    for metric_extractor in self._metric_extractors:
+                        self.metrics.update(metric_extractor.extract(decoded_line))
+            else:
+                while True:
+                    data = self._pipe.read1(65536)
+                    if not data:
+                        break
+                    self.num_bytes += len(data)
+                    self.sink.write(data)
+        finally:
+            self._pipe.close()
+            self.cpu_time = time.thread_time()
+
+    def join(self) -> Dict[str, float]:
+        """waits until the whole output has been read (ie until all the processes that share the output have ended), and returns the metrics
+        """
+        self._thread.join()
+        return self.metrics
+
+
+MeasurementsRow = Dict[str, Any]  # the values of a row of a MeasurementsTable, indexed by column name
+
+METRIC_COLUMN_PREFIX = 'metric_'  # the prefix of the columns that contain the metrics extracted from the output of the runs (see IMetricExtractor)
+
+WARMUP_PHASE = 'warmup'  # the phase of the warmup runs of the benchmark phase in a MeasurementsTable
+
+
+def parse_measurement_value(value: str) -> Any:
+    """converts a value read from a measurements file to an int, a float, a bool, None (empty value) or a string
+    """
+    if value == '':
+        return None
+    if value in ['True', 'False']:
+        return value == 'True'
+    for value_type in [int, float]:
+        try:
+            return value_type(value)
+        except ValueError:
+            pass
+    return value
+
+
+class MeasurementsTable():
+    """a table of measurements, with one row per run
+
+    the rows are stored as a list of dictionaries, so that appending a row costs O(1)
+    """
+    columns: List[str]
+    rows: List[MeasurementsRow]
+
+    DEFAULT_COLUMNS = ['phase', 'run_id', 'worker_id', 'start_time', 'duration'] + ResourceUsage.FIELD_NAMES
+
+    def __init__(self, columns: Optional[List[str]] = None):
+        self.columns = list(columns) if columns is not None else list(MeasurementsTable.DEFAULT_COLUMNS)
+        self.rows = []
+
+    def add_row(self, row: MeasurementsRow):
+        for column in row.keys():
+            if column not in self.columns:
+                self.columns.append(column)
+        self.rows.append(row)
+
+    def add_results(self, phase: str, results: 'StarbenchResults', metadata: Optional[Dict[str, Any]] = None):
+        """appends the measurements of the given phase (eg 'build' or 'benchmark')
+
+        metadata: additional columns (eg {'commit': 'a3bed1c'}), with the same value for all the added rows. These columns are placed before the other columns
+        """
+        if metadata is None:
+            metadata = {}
+        self.columns = [column for column in metadata.keys() if column not in self.columns] + self.columns
+        outlier_run_ids = results.get_outlier_run_ids() if results.outlier_filter is not None else None
+        for is_warmup, durations in [(True, results.warmup_durations), (False, results.durations)]:
+            for run_id, duration in durations.items():
+                row = dict(metadata)
+                row.update({'phase': WARMUP_PHASE if is_warmup else phase, 'run_id': run_id, 'worker_id': results.worker_ids.get(run_id), 'duration': duration})
+                if run_id in results.start_times:
+                    row['start_time'] = results.start_times[run_id].isoformat()
+                if run_id in results.variants:
+                    row['variant'] = results.variants[run_id]
+                if outlier_run_ids is not None and not is_warmup:
+                    row['is_outlier'] = run_id in outlier_run_ids
+                if run_id in results.interferences:
+                    row['interferences'] = ','.join(results.interferences[run_id])
+                if run_id in results.start_skews:
+                    row['start_skew'] = results.start_skews[run_id]
+                if run_id in results.is_ramp:
+                    row['is_ramp'] = results.is_ramp[run_id]
+                if run_id in results.iteration_durations:
+                    row['iteration_durations'] = ','.join(f'{iteration_duration:.9f}' for iteration_duration in results.iteration_durations[run_id])
+                if run_id in results.resource_usages:
+                    row.update(results.resource_usages[run_id].as_dict())
+                for metric, value in results.metrics.get(run_id, {}).items():
+                    row[METRIC_COLUMN_PREFIX + metric] = value
+                self.add_row(row)
+
+    def extend(self, other: 'MeasurementsTable'):
+        """appends the rows of another table
+        """
+        self.columns += [column for column in other.columns if column not in self.columns]
+        self.rows += other.rows
+
+    def get_column(self, column: str) -> List[Any]:
+        return [row.get(column) for row in self.rows]
+
+    def filter(self, **column_values) -> 'MeasurementsTable':
+        """returns the rows whose columns have the given values (eg filter(phase='benchmark'))
+        """
+        table = MeasurementsTable(self.columns)
+        table.rows = [row for row in self.rows if all(row.get(column) == value for column, value in column_values.items())]
+        return table
+
+    def write_tsv(self, file_path: Path):
+        """writes this table in a tab separated values file, with the row index as first column
+        """
+        with open(file_path, 'wt', encoding='utf8', newline='') as file:
+            writer = csv.writer(file, delimiter='\t', lineterminator='\n')
+            writer.writerow([''] + self.columns)
+            for row_index, row in enumerate(self.rows):
+                writer.writerow([row_index] + ['' if row.get(column) is None else row[column] for column in self.columns])
+
+    @staticmethod
+    def read_tsv(file_path: Path) -> 'MeasurementsTable':
+        """reads a table written by write_tsv
+        """
+        with open(file_path, 'rt', encoding='utf8', newline='') as file:
+            reader = csv.reader(file, delimiter='\t')
+            header = next(reader)
+            has_index_column = header[0] == ''
+            columns = header[1:] if has_index_column else header
+            table = MeasurementsTable(columns)
+            for values in reader:
+                if has_index_column:
+                    values = values[1:]
+                table.rows.append({column: parse_measurement_value(value) for column, value in zip(columns, values)})
+        return table
+
+    def to_dataframe(self) -> 'pd.DataFrame':  # noqa: F821
+        """returns this table as a pandas DataFrame (pandas is only needed by this method)
+        """
+        import pandas as pd  # pylint: disable=import-outside-toplevel
+        return pd.DataFrame({column: self.get_column(column) for column in self.columns})
 
 
 class StarbenchResults():
     """measured durations on a starbench benchmark
     """
     durations: Dict[RunId, float]  # the benchmard duration for each worker id
-
-    def __init__(self, output_measurements_file_path: Optional[Path] = None):
+    resource_usages: Dict[RunId, ResourceUsage]  # the resources used by each run, when they are known
+    worker_ids: Dict[RunId, WorkerId]  # the worker used by each run, when it is known
+    start_times: Dict[RunId, datetime]  # the wall clock time at which each run has started, when it is known
+    warmup_durations: Dict[RunId, float]  # the duration of each warmup run. Warmup runs are recorded but left out of the statistics
+    variants: Dict[RunId, str]  # the variant executed by each run, in the interleaved mode (see RunVariant)
+    outlier_filter: Optional[IOutlierFilter]  # if not None, the runs that this filter considers as outliers are left out of the statistics
+    timelines: Dict[RunId, Any]  # the resources used by the process tree of each run over time, when a sampler was used (see IRunSampler)
+    interferences: Dict[RunId, List[str]]  # the interferences detected during each run, when a noise monitor was used (see ISystemNoiseMonitor)
+    exclude_contaminated_runs: bool  # if True, the runs during which an interference was detected are left out of the statistics
+    metrics: Dict[RunId, Dict[str, float]]  # the metrics extracted from the output of each run, when metric extractors were used (see IMetricExtractor)
+    iteration_durations: Dict[RunId, List[float]]  # the duration of each iteration of each run, when the runs repeat the command (see CommandPerfEstimator's num_iterations_per_run)
+    start_skews: Dict[RunId, float]  # for the first run of each worker, how late it started after the first runs of the other workers (or after the release of the start barrier, see CommandPerfEstimator's synchronized_start)
+    is_ramp: Dict[RunId, bool]  # whether each run only partly overlapped with the runs of the other workers (at the start or at the end of the campaign), when the runs have been checked
+    exclude_ramp_runs: bool  # if True, the ramp runs are left out of the statistics
+
+    def __init__(self, output_measurements_file_path: Optional[Path] = None, phase: str = 'benchmark', outlier_filter: Optional[IOutlierFilter] = None, exclude_contaminated_runs: bool = False, exclude_ramp_runs: bool = False):
+        """
+        phase: the phase whose measurements are read from output_measurements_file_path (eg 'configure', 'build' or 'benchmark'), in case the file contains the measurements of several phases
+        """
         self.durations = {}
+        self.resource_usages = {}
+        self.worker_ids = {}
+        self.start_times = {}
+        self.warmup_durations = {}
+        self.variants = {}
+        self.outlier_filter = outlier_filter
+        self.timelines = {}
+        self.interferences = {}
+        self.exclude_contaminated_runs = exclude_contaminated_runs
+        self.metrics = {}
+        self.iteration_durations = {}
+        self.start_skews = {}
+        self.is_ramp = {}
+        self.exclude_ramp_runs = exclude_ramp_runs
         if output_measurements_file_path:
             logging.debug('output_measurements_file_path = %s', output_measurements_file_path)
-            df = pd.read_csv(output_measurements_file_path, sep='\t')
-            for index, row in df.iterrows():
-                logging.debug('row = %s', row)
-                run_id = row['run_id']
-                if run_id != '<average>':
-                    self.durations[run_id] = row["duration"]
+            self.add_rows(MeasurementsTable.read_tsv(output_measurements_file_path).rows, phase)
+
+    def add_rows(self, rows: List[MeasurementsRow], phase: str = 'benchmark', run_id_column: str = 'run_id'):
+        """adds the measurements of the given rows of a MeasurementsTable (the rows of other phases are ignored)
+
+        run_id_column: the column that identifies the runs
+        """
+        for row in rows:
+            is_warmup = row.get('phase') == WARMUP_PHASE and phase == 'benchmark'
+            if row.get('phase', phase) != phase and not is_warmup:
+                continue
+            run_id = row[run_id_column]
+            if run_id == '<average>':
+                continue
+            resource_usage = None
+            if all(row.get(field_name) is not None for field_name in ResourceUsage.FIELD_NAMES):
+                resource_usage = ResourceUsage(**{field_name: row[field_name] for field_name in ResourceUsage.FIELD_NAMES})
+            worker_id = int(row['worker_id']) if row.get('worker_id') is not None else None
+            start_time = datetime.fromisoformat(row['start_time']) if row.get('start_time') is not None else None
+            interferences = None
+            if 'interferences' in row:
+                interferences = row['interferences'].split(',') if row['interferences'] else []
+            metrics = {column[len(METRIC_COLUMN_PREFIX):]: value for column, value in row.items() if column.startswith(METRIC_COLUMN_PREFIX) and value is not None}
+            iteration_durations = [float(iteration_duration) for iteration_duration in str(row['iteration_durations']).split(',')] if row.get('iteration_durations') is not None else None
+            self.add_measurement(run_id, row['duration'], resource_usage, worker_id, start_time, is_warmup, row.get('variant'), interferences, metrics, iteration_durations, row.get('start_skew'), row.get('is_ramp'))
+
+    @staticmethod
+    def from_history(history: 'ResultsHistory', phase: str = 'benchmark', **filters) -> 'StarbenchResults':  # noqa: F821
+        """loads the measurements of the runs stored in the given history that match the given filters (see ResultsHistory.query)
+
+        as the runs can belong to several campaigns, they are identified by '<campaign_id>.<run_id>'
+        """
+        table = history.query(phase=phase, **filters)
+        for row in table.rows:
+            row['history_run_id'] = f'{row["campaign_id"]}.{row["run_id"]}'
+        results = StarbenchResults()
+        results.add_rows(table.rows, phase, run_id_column='history_run_id')
+        return results
 
     def get_num_runs(self):
         return len(self.durations)
 
-    def add_measurement(self, run_id: RunId, duration: float):
-        self.durations[run_id] = duration
+    def add_measurement(self, run_id: RunId, duration: float, resource_usage: Optional[ResourceUsage] = None, worker_id: Optional[WorkerId] = None, start_time: Optional[datetime] = None, is_warmup: bool = False, variant: Optional[str] = None, interferences: Optional[List[str]] = None, metrics: Optional[Dict[str, float]] = None, iteration_durations: Optional[List[float]] = None, start_skew: Optional[float] = None, is_ramp: Optional[bool] = None):
+        if is_warmup:
+            self.warmup_durations[run_id] = duration
+        else:
+            self.durations[run_id] = duration
+        if variant is not None:
+            self.variants[run_id] = variant
+        if resource_usage is not None:
+            self.resource_usages[run_id] = resource_usage
+        if worker_id is not None:
+            self.worker_ids[run_id] = worker_id
+        if start_time is not None:
+            self.start_times[run_id] = start_time
+        if interferences is not None:
+            self.interferences[run_id] = interferences
+        if metrics:
+            self.metrics[run_id] = metrics
+        if iteration_durations is not None:
+            self.iteration_durations[run_id] = iteration_durations
+        if start_skew is not None:
+            self.start_skews[run_id] = start_skew
+        if is_ramp is not None:
+            self.is_ramp[run_id] = is_ramp
+
+    def get_contaminated_run_ids(self) -> List[RunId]:
+        """returns the runs during which an interference was detected
+        """
+        return [run_id for run_id, interferences in self.interferences.items() if len(interferences) != 0]
+
+    def get_ramp_run_ids(self) -> List[RunId]:
+        """returns the runs that only partly overlapped with the runs of the other workers
+        """
+        return [run_id for run_id, is_ramp in self.is_ramp.items() if is_ramp]
+
+    def get_excluded_run_ids(self) -> Set[RunId]:
+        """returns the runs that are left out of the statistics before the outlier filter (the contaminated runs and the ramp runs, if they're excluded)
+        """
+        excluded_run_ids = set(self.get_contaminated_run_ids()) if self.exclude_contaminated_runs else set()
+        if self.exclude_ramp_runs:
+            excluded_run_ids.update(self.get_ramp_run_ids())
+        return excluded_run_ids
+
+    def get_outlier_run_ids(self) -> List[RunId]:
+        """returns the runs that the outlier filter considers as outliers (the outliers are searched among the runs of the same variant)
+        """
+        if self.outlier_filter is None:
+            return []
+        excluded_run_ids = self.get_excluded_run_ids()
+        variant_run_ids = {}
+        for run_id in self.durations.keys():
+            if run_id in excluded_run_ids:
+                continue
+            variant_run_ids.setdefault(self.variants.get(run_id), []).append(run_id)
+        outlier_run_ids = []
+        for run_ids in variant_run_ids.values():
+            outlier_mask = self.outlier_filter.get_outlier_mask([self.durations[run_id] for run_id in run_ids])
+            outlier_run_ids += [run_id for run_id, is_outlier in zip(run_ids, outlier_mask) if is_outlier]
+        return outlier_run_ids
+
+    def get_filtered_durations(self) -> Dict[RunId, float]:
+        """returns the durations of the runs that are taken into account by the statistics (ie the runs that are neither warmup runs, nor excluded contaminated or ramp runs, nor outliers)
+        """
+        excluded_run_ids = self.get_excluded_run_ids()
+        outlier_run_ids = set(self.get_outlier_run_ids())
+        return {run_id: duration for run_id, duration in self.durations.items() if run_id not in outlier_run_ids and run_id not in excluded_run_ids}
+
+    def get_variant_results(self, variant: str) -> 'StarbenchResults':
+        """returns the measurements of the runs of the given variant (see RunVariant)
+        """
+        results = StarbenchResults(outlier_filter=self.outlier_filter, exclude_contaminated_runs=self.exclude_contaminated_runs, exclude_ramp_runs=self.exclude_ramp_runs)
+        for is_warmup, durations in [(True, self.warmup_durations), (False, self.durations)]:
+            for run_id, duration in durations.items():
+                if self.variants.get(run_id) == variant:
+                    results.add_measurement(run_id, duration, self.resource_usages.get(run_id), self.worker_ids.get(run_id), self.start_times.get(run_id), is_warmup, variant, self.interferences.get(run_id), self.metrics.get(run_id), self.iteration_durations.get(run_id), self.start_skews.get(run_id), self.is_ramp.get(run_id))
+                    if run_id in self.timelines:
+                        results.timelines[run_id] = self.timelines[run_id]
+        return results
+
+    def get_metric_values(self, metric: str) -> Dict[RunId, float]:
+        """returns the values of the given metric for the runs that are taken into account by the statistics (see get_filtered_durations) and that produced this metric
+        """
+        return {run_id: self.metrics[run_id][metric] for run_id in self.get_filtered_durations().keys() if metric in self.metrics.get(run_id, {})}
 
     def get_average_duration(self) -> float:
-        return statistics.mean(self.durations.values())
+        return statistics.mean(self.get_filtered_durations().values())
 
     def get_duration_stddev(self) -> float:
-        return statistics.stdev(self.durations.values())
+        return statistics.stdev(self.get_filtered_durations().values())
 
     def get_median_duration(self) -> float:
-        return statistics.median(self.durations.values())
+        return statistics.median(self.get_filtered_durations().values())
 
     def get_duration_range(self) -> Tuple[float, float]:
-        return min(self.durations.values()), max(self.durations.values())
+        durations = self.get_filtered_durations().values()
+        return min(durations), max(durations)
 
 
 class IPasswordProvider(abc.ABC):
@@ -177,27 +767,245 @@ class Run():
     id: RunId  # uniquely identifies a run within its CommandPerfEstimator instance
     worker_id: WorkerId  # the worker used for this run (number of workers = number of parallel runs)
     pid: Optional[ProcessId]  # the process identifier of the process used by the command
-    start_time: datetime  # the time at which the command process has started
+    start_time: float  # the (wall clock) time at which the command process has started, in seconds since the epoch (a number rather than a datetime, to keep the runs compact)
     return_code: ReturnCode  # the exit code of the command process
-    end_time: Optional[datetime]  # the time at which the command process has ended. None if the process is still running
-
-    def __init__(self, run_id: RunId, worker_id: WorkerId):
+    end_time: Optional[float]  # the (wall clock) time at which the command process has ended, in seconds since the epoch. None if the process is still running
+    start_ns: TimeInNanoseconds  # the monotonic time taken just before the command process is spawned
+    end_ns: Optional[TimeInNanoseconds]  # the monotonic time taken just after the command process has been reaped. None if the process is still running
+    resource_usage: Optional[ResourceUsage]  # the resources used by the command process. None if unknown
+    core_set: Optional[CoreSet]  # the logical cpus the command process has been bound to. None if the process is not bound
+    relaunch_latency: Optional[DurationInSeconds]  # the time between the end of the previous run on the same worker and the start of this run's process. None for the first run of a worker
+    worker_run_index: int  # the number of runs that the worker has started before this one
+    is_warmup: bool  # warmup runs are recorded but left out of the statistics
+    variant: Optional[str]  # the name of the variant executed by this run in the interleaved mode, None otherwise
+    env_vars: Dict[str, str]  # additional environment variables for this run (in addition to the ones of its CommandPerfEstimator)
+    timeline: Optional[Any]  # the samples of the resources used by the process tree of this run, if the CommandPerfEstimator has a sampler
+    interferences: Optional[List[str]]  # the interferences detected while this run was running, if the CommandPerfEstimator has a noise monitor
+    metrics: Dict[str, float]  # the metrics extracted from the output of this run, if the CommandPerfEstimator has metric extractors
+    iteration_durations: Optional[List[DurationInSeconds]]  # the duration of each iteration of the command, if the CommandPerfEstimator repeats the command within each run
+
+    __slots__ = ('id', 'worker_id', 'pid', 'start_time', 'return_code', 'end_time', 'start_ns', 'end_ns', 'resource_usage', 'core_set', 'relaunch_latency', 'worker_run_index', 'is_warmup', 'variant', 'env_vars', 'timeline', 'interferences', 'metrics', 'iteration_durations')
+
+    def __init__(self, run_id: RunId, worker_id: WorkerId, core_set: Optional[CoreSet] = None, worker_run_index: int = 0, is_warmup: bool = False, variant: Optional[str] = None, env_vars: Optional[Dict[str, str]] = None):
         self.id = run_id
         self.worker_id = worker_id
+        self.core_set = core_set
+        self.worker_run_index = worker_run_index
+        self.is_warmup = is_warmup
+        self.variant = variant
+        self.env_vars = env_vars if env_vars is not None else {}
+        self.relaunch_latency = None
         self.pid = None
         self.return_code = 0
-        self.start_time = datetime.now()
+        self.start_time = time.time()
         self.end_time = None
+        self.start_ns = time.monotonic_ns()
+        self.end_ns = None
+        self.resource_usage = None
+        self.timeline = None
+        self.interferences = None
+        self.metrics = {}
+        self.iteration_durations = None
 
     def has_finished(self) -> bool:
         """indicates if this run has finished"""
-        return self.end_time is not None
+        return self.end_ns is not None
 
     def get_duration(self) -> DurationInSeconds:
         """returns the duration of this run, provided it has finished
         """
         assert self.has_finished()
-        return (self.end_time - self.start_time).total_seconds()
+        return (self.end_ns - self.start_ns) * 1.0e-9
+
+
+class RunStore():
+    """the finished runs of a CommandPerfEstimator, stored as one typed array per field (struct of arrays) rather than one Run object per run
+
+    a run costs a few tens of bytes whatever the number of runs, and the aggregations sweep contiguous arrays. The fields that only some runs have are stored sparsely: the interferences of the contaminated runs, and the timelines and iteration durations when they are recorded
+    """
+    run_ids: array.array
+    worker_ids: array.array
+    start_ns: array.array  # the monotonic time taken just before the process of each run was spawned
+    end_ns: array.array  # the monotonic time taken just after the process of each run was reaped
+    start_times: array.array  # the wall clock time at which each run has started, in seconds since the epoch
+    return_codes: array.array
+    is_warmup: array.array
+    variant_indices: array.array  # the index of the variant of each run in variant_names, -1 if the run has no variant
+    relaunch_latencies: array.array  # nan for the first run of each worker
+    has_resource_usage: array.array
+    resource_usages: Dict[str, array.array]  # one array per field of ResourceUsage (0 when the resource usage of the run is unknown)
+    metrics: Dict[str, array.array]  # one array per metric, nan for the runs that didn't produce the metric
+    variant_names: List[str]
+    interferences: Dict[RunId, List[str]]  # the interferences of the contaminated runs
+    has_interferences: bool  # True if the runs have been checked for interferences (the runs missing from interferences are then clean)
+    timelines: Dict[RunId, Any]
+    iteration_durations: Dict[RunId, List[DurationInSeconds]]
+    start_skews: Dict[RunId, DurationInSeconds]  # the start skew of the first run of each worker, once computed (see set_start_skews)
+    ramp_run_ids: Optional[Set[RunId]]  # the runs that only partly overlapped with the runs of the other workers, None if the runs haven't been checked (see tag_ramp_runs)
+    num_failed_runs: int  # the number of runs that returned a non-zero code
+
+    def __init__(self):
+        self.run_ids = array.array('q')
+        self.worker_ids = array.array('l')
+        self.start_ns = array.array('q')
+        self.end_ns = array.array('q')
+        self.start_times = array.array('d')
+        self.return_codes = array.array('l')
+        self.is_warmup = array.array('b')
+        self.variant_indices = array.array('h')
+        self.relaunch_latencies = array.array('d')
+        self.has_resource_usage = array.array('b')
+        self.resource_usages = {field_name: array.array('d' if field_name in ['user_time', 'system_time'] else 'q') for field_name in ResourceUsage.FIELD_NAMES}
+        self.metrics = {}
+        self.variant_names = []
+        self.interferences = {}
+        self.has_interferences = False
+        self.timelines = {}
+        self.iteration_durations = {}
+        self.start_skews = {}
+        self.ramp_run_ids = None
+        self.num_failed_runs = 0
+
+    def __len__(self) -> int:
+        return len(self.run_ids)
+
+    def add_run(self, run: Run):
+        """appends the given finished run
+        """
+        assert run.has_finished()
+        num_runs = len(self.run_ids)
+        self.run_ids.append(run.id)
+        self.worker_ids.append(run.worker_id)
+        self.start_ns.append(run.start_ns)
+        self.end_ns.append(run.end_ns)
+        self.start_times.append(run.start_time)
+        self.return_codes.append(run.return_code)
+        self.is_warmup.append(run.is_warmup)
+        variant_index = -1
+        if run.variant is not None:
+            if run.variant not in self.variant_names:
+                self.variant_names.append(run.variant)
+            variant_index = self.variant_names.index(run.variant)
+        self.variant_indices.append(variant_index)
+        self.relaunch_latencies.append(run.relaunch_latency if run.relaunch_latency is not None else math.nan)
+        self.has_resource_usage.append(run.resource_usage is not None)
+        for field_name, values in self.resource_usages.items():
+            values.append(getattr(run.resource_usage, field_name) if run.resource_usage is not None else 0)
+        for metric in run.metrics.keys():
+            if metric not in self.metrics:
+                self.metrics[metric] = array.array('d', [math.nan]) * num_runs
+        for metric, values in self.metrics.items():
+            values.append(run.metrics.get(metric, math.nan))
+        if run.interferences is not None:
+            self.set_interferences(run.id, run.interferences)
+        if run.timeline is not None:
+            self.timelines[run.id] = run.timeline
+        if run.iteration_durations is not None:
+            self.iteration_durations[run.id] = run.iteration_durations
+        if run.return_code != 0:
+            self.num_failed_runs += 1
+
+    def set_interferences(self, run_id: RunId, interferences: List[str]):
+        self.has_interferences = True
+        if len(interferences) != 0:
+            self.interferences[run_id] = interferences
+        else:
+            self.interferences.pop(run_id, None)
+
+    def get_durations(self) -> array.array:
+        """returns the duration of each run (in seconds)
+        """
+        return array.array('d', [(end_ns - start_ns) * 1.0e-9 for start_ns, end_ns in zip(self.start_ns, self.end_ns)])
+
+    def get_relaunch_latencies(self) -> Dict[WorkerId, List[DurationInSeconds]]:
+        """returns for each worker the time it took to start a new run after the end of the previous one
+        """
+        relaunch_latencies = {}
+        for worker_id, relaunch_latency in zip(self.worker_ids, self.relaunch_latencies):
+            if not math.isnan(relaunch_latency):
+                relaunch_latencies.setdefault(worker_id, []).append(relaunch_latency)
+        return relaunch_latencies
+
+    def set_start_skews(self, reference_ns: Optional[TimeInNanoseconds] = None):
+        """computes the start skew of the first run of each worker: the time between reference_ns and its start (None means the start of the earliest first run)
+        """
+        first_runs = {}  # the index of the first run of each worker
+        for index, (run_id, worker_id) in enumerate(zip(self.run_ids, self.worker_ids)):
+            if worker_id not in first_runs or run_id < self.run_ids[first_runs[worker_id]]:
+                first_runs[worker_id] = index
+        if len(first_runs) == 0:
+            return
+        if reference_ns is None:
+            reference_ns = min(self.start_ns[index] for index in first_runs.values())
+        self.start_skews = {self.run_ids[index]: (self.start_ns[index] - reference_ns) * 1.0e-9 for index in first_runs.values()}
+
+    def tag_ramp_runs(self, max_outside_fraction: float = 0.01):
+        """finds the runs that only partly overlapped with the runs of the other workers: the steady state of the campaign goes from the start of the last worker to start to the end of the first worker to end, and a run is a ramp run if more than max_outside_fraction of its duration is outside of it
+        """
+        first_start_ns = {}
+        last_end_ns = {}
+        for worker_id, start_ns, end_ns in zip(self.worker_ids, self.start_ns, self.end_ns):
+            first_start_ns[worker_id] = min(first_start_ns.get(worker_id, start_ns), start_ns)
+            last_end_ns[worker_id] = max(last_end_ns.get(worker_id, end_ns), end_ns)
+        self.ramp_run_ids = set()
+        if len(first_start_ns) == 0:
+            return
+        steady_start_ns = max(first_start_ns.values())
+        steady_end_ns = min(last_end_ns.values())
+        for run_id, start_ns, end_ns in zip(self.run_ids, self.start_ns, self.end_ns):
+            outside_ns = max(0, steady_start_ns - start_ns) + max(0, end_ns - steady_end_ns)
+            if outside_ns > max_outside_fraction * (end_ns - start_ns):
+                self.ramp_run_ids.add(run_id)
+
+    def to_results(self, exclude_contaminated_runs: bool = False, exclude_ramp_runs: bool = False) -> 'StarbenchResults':
+        """returns the measurements of the stored runs, ordered by run id
+        """
+        results = StarbenchResults(exclude_contaminated_runs=exclude_contaminated_runs, exclude_ramp_runs=exclude_ramp_runs)
+        order = sorted(range(len(self.run_ids)), key=self.run_ids.__getitem__)
+
+        def gather(values: array.array) -> List[Any]:
+            return [values[index] for index in order]
+        run_ids = gather(self.run_ids)
+        durations = gather(self.get_durations())
+        is_warmup = gather(self.is_warmup)
+        results.durations = {run_id: duration for run_id, duration, warmup in zip(run_ids, durations, is_warmup) if not warmup}
+        results.warmup_durations = {run_id: duration for run_id, duration, warmup in zip(run_ids, durations, is_warmup) if warmup}
+        results.worker_ids = dict(zip(run_ids, gather(self.worker_ids)))
+        results.start_times = dict(zip(run_ids, map(datetime.fromtimestamp, gather(self.start_times))))
+        results.variants = {run_id: self.variant_names[variant_index] for run_id, variant_index in zip(run_ids, gather(self.variant_indices)) if variant_index >= 0}
+        resource_usage_fields = zip(*[gather(self.resource_usages[field_name]) for field_name in ResourceUsage.FIELD_NAMES])
+        results.resource_usages = {run_id: ResourceUsage(*fields) for run_id, fields, has_resource_usage in zip(run_ids, resource_usage_fields, gather(self.has_resource_usage)) if has_resource_usage}
+        for metric, values in self.metrics.items():
+            for run_id, value in zip(run_ids, gather(values)):
+                if not math.isnan(value):
+                    results.metrics.setdefault(run_id, {})[metric] = value
+        if self.has_interferences:
+            results.interferences = {run_id: self.interferences.get(run_id, []) for run_id in run_ids}
+        results.timelines = dict(self.timelines)
+        results.iteration_durations = dict(self.iteration_durations)
+        results.start_skews = dict(self.start_skews)
+        if self.ramp_run_ids is not None:
+            results.is_ramp = {run_id: run_id in self.ramp_run_ids for run_id in run_ids}
+        return results
+
+
+class RunVariant():
+    """one of the commands that the interleaved mode of a CommandPerfEstimator alternates run by run on the same workers (eg 2 build trees of an A/B comparison)
+    """
+    name: str
+    run_command: List[str]  # the command of this variant (supports the same tags as CommandPerfEstimator.run_command)
+    run_command_cwd: Path  # the current directory of the command (supports the same tags as CommandPerfEstimator.run_command)
+    stdout_filepath: Optional[Path]
+    stderr_filepath: Optional[Path]
+    env_vars: Dict[str, str]  # additional environment variables for this variant (eg to select the libraries of a toolchain)
+
+    def __init__(self, name: str, run_command: List[str], run_command_cwd: Path, stdout_filepath: Optional[Path] = None, stderr_filepath: Optional[Path] = None, env_vars: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.run_command = run_command
+        self.run_command_cwd = run_command_cwd
+        self.stdout_filepath = stdout_filepath
+        self.stderr_filepath = stderr_filepath
+        self.env_vars = env_vars if env_vars is not None else {}
 
 
 CommandPerfEstimator = ForwardRef('CommandPerfEstimator')
@@ -214,6 +1022,11 @@ class IStarBencherStopCondition(ABC):
         This method is called at the end of each run, to decide if another run should be triggered or not.
         """
 
+    def get_run_args(self, star_bencher: CommandPerfEstimator) -> List[str]:
+        """returns the arguments appended to the command of the next run of the given CommandPerfEstimator, eg to leave out the parts of the benchmark that are already measured precisely enough (none by default)
+        """
+        return []
+
 
 class StopAfterSingleRun(IStarBencherStopCondition):
     """a stop condition that causes the given CommandPerfEstimator to never start new runs
@@ -228,16 +1041,35 @@ class StopAfterSingleRun(IStarBencherStopCondition):
         return True
 
 
+class StopAfterFixedNumRuns(IStarBencherStopCondition):
+    """a stop condition that triggers once the given number of measured runs have finished (over all workers)
+
+    as the runs of the other workers go on until their end, the campaign can end up with a few more runs
+    """
+    num_runs: int
+
+    def __init__(self, num_runs: int):
+        assert num_runs >= 1
+        self.num_runs = num_runs
+
+    def should_stop(self, star_bencher: CommandPerfEstimator) -> bool:
+        return star_bencher.get_running_stats().num_values >= self.num_runs
+
+
 class StopWhenConverged(IStarBencherStopCondition):
-    """a stop condition that triggers when the just completed run doesn't have much effect on the average run's duration
+    """a stop condition that triggers when the just completed run doesn't have much effect on the average run's duration (or on the average of a metric)
     """
-    def __init__(self, max_error: float = 0.01):
+    def __init__(self, max_error: float = 0.01, metric: Optional[str] = None):
+        """
+        metric: the metric (extracted from the output of the runs) whose average is watched. None means the duration
+        """
         self.max_error = max_error
+        self.metric = metric
         self._last_mean_duration = None
 
     def should_stop(self, star_bencher: CommandPerfEstimator) -> bool:
         do_stop = False
-        mean_duration, _num_runs = star_bencher.get_runs_stats()
+        mean_duration = star_bencher.get_running_stats(self.metric).mean
         print(f'mean_duration = {mean_duration}')
         if self._last_mean_duration is not None:
             diff = abs(mean_duration - self._last_mean_duration)
@@ -248,6 +1080,311 @@ class StopWhenConverged(IStarBencherStopCondition):
         return do_stop
 
 
+class PrecisionStopCondition(IStarBencherStopCondition):
+    """abstract stop condition that triggers when the mean duration (or the mean of a metric) is known with enough precision, within limits on the number of runs and on the time spent
+
+    the decision only uses the running statistics of the CommandPerfEstimator, so its cost doesn't depend on the number of runs
+    """
+    min_num_runs: int  # the number of runs below which the precision is not evaluated
+    max_num_runs: Optional[int]  # the number of runs after which the campaign stops, whatever the precision. None means no limit
+    max_duration: Optional[DurationInSeconds]  # the (wall clock) time budget of the campaign, after which no new run is started. None means no limit
+    metric: Optional[str]  # the metric (extracted from the output of the runs, see IMetricExtractor) whose mean has to be precise. None means the duration
+
+    def __init__(self, min_num_runs: int = 5, max_num_runs: Optional[int] = None, max_duration: Optional[DurationInSeconds] = None, metric: Optional[str] = None):
+        assert min_num_runs >= 2, 'at least 2 runs are needed to estimate the precision'
+        self.min_num_runs = min_num_runs
+        self.max_num_runs = max_num_runs
+        self.max_duration = max_duration
+        self.metric = metric
+
+    @abstractmethod
+    def is_precise_enough(self, stats: RunningStats) -> bool:
+        """decides if the given statistics (with at least min_num_runs values) are precise enough
+        """
+
+    def should_stop(self, star_bencher: CommandPerfEstimator) -> bool:
+        # the limits apply to the number of runs, even if some of them didn't produce the metric
+        num_runs = star_bencher.get_running_stats().num_values
+        if self.max_num_runs is not None and num_runs >= self.max_num_runs:
+            print(f'stopping after {num_runs} runs: the maximum number of runs has been reached')
+            return True
+        if self.max_duration is not None and star_bencher.get_elapsed_time() >= self.max_duration:
+            print(f'stopping after {num_runs} runs: the time budget of {self.max_duration} s has been spent')
+            return True
+        stats = star_bencher.get_running_stats(self.metric)
+        if stats.num_values >= self.min_num_runs and self.is_precise_enough(stats):
+            print(f'stopping after {num_runs} runs: the requested precision has been reached (mean {self.metric if self.metric is not None else "duration"} = {stats.mean:.6f}, standard error = {stats.get_standard_error():.6f})')
+            return True
+        return False
+
+
+class StopOnRelativeConfidenceInterval(PrecisionStopCondition):
+    """a stop condition that triggers when the confidence interval of the mean duration is narrow enough, relative to the mean duration
+    """
+    max_relative_half_width: float  # eg 0.01 to stop when the mean duration is known within +/- 1 %
+    confidence: float  # the confidence level of the interval, eg 0.95
+
+    def __init__(self, max_relative_half_width: float = 0.01, confidence: float = 0.95, min_num_runs: int = 5, max_num_runs: Optional[int] = None, max_duration: Optional[DurationInSeconds] = None, metric: Optional[str] = None):
+        super().__init__(min_num_runs, max_num_runs, max_duration, metric)
+        self.max_relative_half_width = max_relative_half_width
+        self.confidence = confidence
+
+    def is_precise_enough(self, stats: RunningStats) -> bool:
+        return stats.get_confidence_interval_half_width(self.confidence) <= self.max_relative_half_width * abs(stats.mean)
+
+
+class StopOnRelativeStandardError(PrecisionStopCondition):
+    """a stop condition that triggers when the standard error of the mean duration is small enough, relative to the mean duration
+    """
+    max_relative_standard_error: float  # eg 0.01 to stop when the standard error is 1 % of the mean duration
+
+    def __init__(self, max_relative_standard_error: float = 0.01, min_num_runs: int = 5, max_num_runs: Optional[int] = None, max_duration: Optional[DurationInSeconds] = None, metric: Optional[str] = None):
+        super().__init__(min_num_runs, max_num_runs, max_duration, metric)
+        self.max_relative_standard_error = max_relative_standard_error
+
+    def is_precise_enough(self, stats: RunningStats) -> bool:
+        return stats.get_standard_error() <= self.max_relative_standard_error * abs(stats.mean)
+
+
+class ICorePlacer(ABC):
+    """abstract handler that decides on which logical cpus each worker of a CommandPerfEstimator runs
+    """
+    @abstractmethod
+    def get_worker_cores(self, num_cores_per_run: int, num_workers: int) -> Dict[WorkerId, CoreSet]:
+        """returns a disjoint set of num_cores_per_run logical cpus for each of the num_workers workers
+        """
+
+
+class IRunSampler(ABC):
+    """abstract handler that periodically samples the resources used by the processes of the active runs of a CommandPerfEstimator
+    """
+    @abstractmethod
+    def start(self):
+        """starts sampling (called at the start of the campaign)
+        """
+
+    @abstractmethod
+    def stop(self):
+        """stops sampling (called at the end of the campaign)
+        """
+
+    @abstractmethod
+    def watch_run(self, run_id: RunId, pid: ProcessId):
+        """starts sampling the process tree of the given run
+        """
+
+    @abstractmethod
+    def unwatch_run(self, run_id: RunId) -> Any:
+        """stops sampling the process tree of the given run, and returns its samples
+        """
+
+    @abstractmethod
+    def get_report(self) -> str:
+        """returns a description of the sampling, including its overhead
+        """
+
+
+class ISystemNoiseMonitor(ABC):
+    """abstract handler that watches the system-wide activity during the campaign of a CommandPerfEstimator, to detect what may disturb the runs (eg other processes, cpu throttling)
+    """
+    @abstractmethod
+    def start(self):
+        """starts monitoring (called at the start of the campaign)
+        """
+
+    @abstractmethod
+    def stop(self):
+        """stops monitoring (called at the end of the campaign)
+        """
+
+    @abstractmethod
+    def get_interferences(self, start_ns: TimeInNanoseconds, end_ns: TimeInNanoseconds) -> List[str]:
+        """returns the kinds of interference (eg 'foreign_load') detected so far in the given time window
+        """
+
+    @abstractmethod
+    def get_report(self) -> str:
+        """returns a summary of the interferences detected during the campaign
+        """
+
+
+# what CommandPerfEstimator does with the runs during which its ISystemNoiseMonitor detected an interference
+CONTAMINATED_RUN_POLICIES = [
+    'keep',  # the runs are flagged but taken into account by the statistics
+    'exclude',  # the runs are flagged and left out of the statistics
+    'requeue'  # the runs are flagged and left out of the statistics, and another run replaces each of them
+]
+
+
+class IRunSupervisor(ABC):
+    """abstract backend that launches the processes of the runs of a CommandPerfEstimator and watches their completion
+
+    a supervisor instance is dedicated to one CommandPerfEstimator
+    """
+    @abstractmethod
+    def start_process(self, star_bencher: CommandPerfEstimator, run: Run, popen_args: List[str], cwd: Path, stdout_filepath: Optional[Path], stderr_filepath: Optional[Path]):
+        """starts the process of the given run
+
+        the supervisor is expected to call star_bencher.on_run_spawned once the process is created, and star_bencher.on_exit once it has ended (or failed to start)
+        """
+
+    @abstractmethod
+    def wait_for_all_runs(self, star_bencher: CommandPerfEstimator):
+        """called by the main thread once the first run of each worker has been started. Returns when the supervisor has nothing left to watch
+        """
+
+
+def spawn_run_process(popen_args: List[str], cwd: Path, env: Dict[str, str], stdout_filepath: Optional[Path] = None, stderr_filepath: Optional[Path] = None, core_set: Optional[CoreSet] = None, capture_stdout: bool = False, capture_stderr: bool = False, pass_fds: Tuple[int, ...] = ()) -> Tuple[Optional[subprocess.Popen], TimeInNanoseconds]:
+    """creates the process of a run, with the given environment, bound to the given logical cpus (if any)
+
+    capture_stdout: if True, the standard output of the process is a pipe (proc.stdout) instead of stdout_filepath
+    capture_stderr: if True, the standard error of the process is a pipe (proc.stderr) instead of stderr_filepath
+    pass_fds: the file descriptors that the process inherits (besides its standard streams)
+
+    returns the process (None if it could not be started) and the monotonic time taken just before it was spawned
+    """
+    stdout = None
+    stderr = None
+    proc = None
+    start_ns = time.monotonic_ns()
+    try:
+        try:
+            # with open(stdout_filepath, 'w', encoding='utf8') as stdout, open(stderr_filepath, 'w', encoding='utf8') as stderr:
+            if capture_stdout:
+                stdout = subprocess.PIPE
+            elif stdout_filepath is not None:
+                stdout = open(stdout_filepath, 'w', encoding='utf8')
+            if capture_stderr:
+                stderr = subprocess.PIPE
+            elif stderr_filepath is not None:
+                stderr = open(stderr_filepath, 'w', encoding='utf8')
+        except:  # pylint: disable=bare-except  # noqa: E722
+            print(f'failed to open {stdout_filepath} or {stderr_filepath} in write mode')
+            return None, start_ns
+        try:
+            preexec_fn = None
+            if core_set is not None:
+                def preexec_fn():
+                    # bind the child process before it executes the command, so that all its threads inherit the affinity
+                    os.sched_setaffinity(0, core_set)
+            start_ns = time.monotonic_ns()
+            proc = subprocess.Popen(popen_args, cwd=cwd, stdout=stdout, stderr=stderr, env=env, preexec_fn=preexec_fn, pass_fds=pass_fds)  # pylint: disable=subprocess-popen-preexec-fn
+        except:  # pylint: disable=bare-except  # noqa: E722
+            print(f'command failed: {popen_args}')
+    finally:
+        # the child process has its own copy of the file descriptors
+        for stream in [stdout, stderr]:
+            if stream is not None and stream != subprocess.PIPE:
+                stream.close()
+    return proc, start_ns
+
+
+def fast_spawn_run_process(popen_args: List[str], cwd: Path, env: Dict[str, str], stdout: Any = None, stderr: Any = None, core_set: Optional[CoreSet] = None, pass_fds: Tuple[int, ...] = ()) -> Tuple[Optional[subprocess.Popen], TimeInNanoseconds]:
+    """creates the process of a run like spawn_run_process, but without a preexec_fn, which lets subprocess create it with vfork instead of fork (the cost of fork grows with the memory of the calling process)
+
+    stdout, stderr: the files the process writes to (kept open by the caller from one run to the next), subprocess.PIPE or None
+    core_set: as the process inherits the cpu affinity of the thread that creates it, the calling thread is bound to these cores while it spawns the process
+
+    returns the process (None if it could not be started) and the monotonic time taken just before it was spawned
+    """
+    thread_core_set = None
+    if core_set is not None:
+        thread_core_set = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, core_set)  # on linux, this only binds the calling thread
+    proc = None
+    start_ns = time.monotonic_ns()
+    try:
+        proc = subprocess.Popen(popen_args, cwd=cwd, stdout=stdout, stderr=stderr, env=env, pass_fds=pass_fds)
+    except:  # pylint: disable=bare-except  # noqa: E722
+        print(f'command failed: {popen_args}')
+    finally:
+        if thread_core_set is not None:
+            os.sched_setaffinity(0, thread_core_set)
+    return proc, start_ns
+
+
+class StartBarrier():
+    """holds the processes of the first runs of the workers until all of them have been created, then releases them at once (see barrier.py)
+
+    the gates of the processes wait for the end of file of a pipe whose write end only this object holds, so that closing it releases all of them with a single system call
+    """
+    num_runs: int  # the number of runs held at the barrier
+    release_ns: Optional[TimeInNanoseconds]  # the monotonic time at which the barrier has been released
+    _run_ids: Set[RunId]  # the runs held at the barrier
+    _num_spawned_runs: int  # the number of runs whose process creation has been attempted
+    _all_spawned_event: threading.Event
+    _lock: threading.Lock
+    _ready_read_fd: int  # the gates write a byte on this pipe when they wait at the barrier
+    _ready_write_fd: int
+    _go_read_fd: int  # the gates wait for the end of file of this pipe
+    _go_write_fd: int
+    _release_times_dir: Path  # where the gates write the time at which they have been released
+
+    def __init__(self, num_runs: int):
+        self.num_runs = num_runs
+        self.release_ns = None
+        self._run_ids = set()
+        self._num_spawned_runs = 0
+        self._all_spawned_event = threading.Event()
+        self._lock = threading.Lock()
+        self._ready_read_fd, self._ready_write_fd = os.pipe()
+        self._go_read_fd, self._go_write_fd = os.pipe()
+        self._release_times_dir = Path(tempfile.mkdtemp(prefix='starbench-barrier-'))
+
+    def _get_release_time_filepath(self, run_id: RunId) -> Path:
+        return self._release_times_dir / f'run{run_id}.txt'
+
+    def wrap_command(self, run_id: RunId, command: List[str]) -> List[str]:
+        """registers the given run at the barrier, and returns its command wrapped in the gate
+        """
+        with self._lock:
+            self._run_ids.add(run_id)
+        return [sys.executable, str(Path(__file__).with_name('barrier.py')), str(self._ready_write_fd), str(self._go_read_fd), str(self._get_release_time_filepath(run_id))] + command
+
+    def holds_run(self, run_id: RunId) -> bool:
+        with self._lock:
+            return run_id in self._run_ids
+
+    def get_pass_fds(self) -> Tuple[int, ...]:
+        """returns the file descriptors that the processes held at the barrier inherit
+        """
+        return (self._ready_write_fd, self._go_read_fd)
+
+    def on_spawn_attempted(self):
+        """tells that the creation of the process of one of the runs held at the barrier has been attempted (successfully or not)
+        """
+        with self._lock:
+            self._num_spawned_runs += 1
+            if self._num_spawned_runs == self.num_runs:
+                self._all_spawned_event.set()
+
+    def release(self):
+        """waits until the processes of all the runs wait at the barrier (or have died), then releases them
+        """
+        self._all_spawned_event.wait()
+        # the pipes are now only held by the gates, so the end of file of the ready pipe comes when all the gates are waiting (or have died)
+        os.close(self._ready_write_fd)
+        os.close(self._go_read_fd)
+        while os.read(self._ready_read_fd, 4096) != b'':
+            pass
+        self.release_ns = time.monotonic_ns()
+        os.close(self._go_write_fd)
+        os.close(self._ready_read_fd)
+
+    def pop_release_ns(self, run_id: RunId) -> Optional[TimeInNanoseconds]:
+        """returns the monotonic time at which the gate of the given run has been released, None if it has not reached the barrier
+        """
+        release_time_filepath = self._get_release_time_filepath(run_id)
+        if not release_time_filepath.exists():
+            return None
+        release_ns = int(release_time_filepath.read_text(encoding='utf8'))
+        release_time_filepath.unlink()
+        return release_ns
+
+    def close(self):
+        shutil.rmtree(self._release_times_dir, ignore_errors=True)
+
+
 class CommandPerfEstimator():  # (false positive) pylint: disable=function-redefined
     '''a command runner that runs a given command multiple times and measures the average execution duration
 
@@ -262,15 +1399,67 @@ class CommandPerfEstimator():  # (false positive) pylint: disable=function-redef
     max_num_cores: int  # the maximum allowed number of cores for this CommandPerfEstimator
     stop_condition: IStarBencherStopCondition  # the condition that is used so that this CommandPerfEstimator can decide to stop launching commands
     stop_on_error: bool
+    env_vars: Dict[str, str]  # additional environment variables for run_command
+    core_placer: Optional[ICorePlacer]  # decides on which cores each worker is bound. None if the processes are not bound (the scheduler then decides where they run)
+    _worker_cores: Dict[WorkerId, CoreSet]  # the cores each worker is bound to
+    supervisor: IRunSupervisor  # the backend that launches and watches the processes of the runs
+    _worker_last_end_ns: Dict[WorkerId, TimeInNanoseconds]  # for each worker, the time at which its last run ended
+    num_warmup_runs: int  # the number of warmup runs performed by each worker (for each variant) before the measured runs
+    variants: List[RunVariant]  # if not empty, the workers alternate these variants run by run instead of running run_command (interleaved mode)
+    sampler: Optional[IRunSampler]  # if not None, samples the resources used by the process tree of each run while it's running
+    noise_monitor: Optional[ISystemNoiseMonitor]  # if not None, detects the interferences that may disturb the runs
+    contaminated_run_policy: str  # what is done with the runs during which the noise monitor detected an interference (see CONTAMINATED_RUN_POLICIES)
+    max_requeued_runs: int  # the maximum number of contaminated runs that are replaced by another run with the 'requeue' policy
+    metric_extractors: List[IMetricExtractor]  # extract application metrics from the standard output of the runs, while they're running
+    log_policy: IRunLogPolicy  # decides what is done with the standard output and error of the runs
+    telemetry: Telemetry  # receives the events of the campaign (see ITelemetrySink)
+    _log_cores: Optional[CoreSet]  # the cores the threads that read the output of the runs are bound to (those that no worker uses), None if they're not bound
+    _log_num_bytes: int  # the number of bytes of output read through pipes so far
+    _log_cpu_time: DurationInSeconds  # the cpu time used so far by the threads that read the output of the runs
+    _output_readers: Dict[ProcessId, List[RunOutputReader]]  # the readers of the output streams of the running processes that don't write directly to a file
+    fast_launch: bool  # if True, the processes are spawned with vfork, and each output file is opened once for all the runs of its worker (see fast_spawn_run_process)
+    num_iterations_per_run: int  # the number of times the command is run back to back within each run (see repeat.py)
+    _worker_launches: Dict[Tuple[WorkerId, Optional[str]], Tuple[List[str], str, Optional[str], Optional[str]]]  # the command, current directory, stdout and stderr of each worker (and variant), with their tags interpreted
+    _run_envs: Dict[Tuple[Any, ...], Dict[str, str]]  # the environments already computed by get_run_env, for each core set and run environment variables
+    _log_files: Dict[str, Any]  # the output files opened once for all runs, in the fast launch mode
+    _iterations_dir: Optional[Path]  # the directory where the runs write the duration of their iterations, if num_iterations_per_run > 1
+    between_runs_command: Optional[List[str]]  # if not None, the command that each worker runs between two consecutive runs (eg to clean a build tree). It supports the same tags as run_command, and isn't part of the measured durations
+    synchronized_start: bool  # if True, the first runs of all the workers are held at a start barrier until all of them have been created, then released at once
+    exclude_ramp_runs: bool  # if True, the runs that only partly overlapped with the runs of the other workers (at the start and at the end of the campaign) are left out of the final statistics
+    _start_barrier: Optional[StartBarrier]  # the barrier of the first runs, while the campaign of a synchronized start is going
+    _metric_stats: Dict[str, RunningStats]  # the statistics of the values of each metric, on the same runs as _duration_stats
+    _num_requeued_runs: int
+    _worker_num_started_runs: Dict[WorkerId, int]
+    _duration_stats: RunningStats  # the statistics of the durations of the finished measured runs (of the first variant in the interleaved mode), kept up to date at the end of each run
+    _start_ns: Optional[TimeInNanoseconds]  # the time at which the campaign (the run method) started
     _next_run_id: int
-    _runs: Dict[int, Run]
+    _runs: Dict[int, Run]  # the runs that haven't finished yet
+    _run_store: RunStore  # the finished runs
+    _num_active_runs: int  # the number of runs started and not yet fully processed by on_exit
+    _worker_num_finished_runs: Dict[WorkerId, int]
     _last_mean_duration: Optional[DurationInSeconds]
     _num_runs: int
     _runs_lock: threading.Lock
     _finished_event: threading.Event
 
-    def __init__(self, run_command: List[str], num_cores_per_run: int, num_parallel_runs: int, max_num_cores: int, stop_condition: IStarBencherStopCondition, stop_on_error=True, run_command_cwd: Path = None, stdout_filepath: Path = None, stderr_filepath: Path = None):
+    def __init__(self, run_command: List[str], num_cores_per_run: int, num_parallel_runs: int, max_num_cores: int, stop_condition: IStarBencherStopCondition, stop_on_error=True, run_command_cwd: Path = None, stdout_filepath: Path = None, stderr_filepath: Path = None, core_placer: Optional[ICorePlacer] = None, supervisor: Optional[IRunSupervisor] = None, env_vars: Optional[Dict[str, str]] = None, num_warmup_runs: int = 0, variants: Optional[List[RunVariant]] = None, sampler: Optional[IRunSampler] = None, noise_monitor: Optional[ISystemNoiseMonitor] = None, contaminated_run_policy: str = 'keep', max_requeued_runs: int = 100, metric_extractors: Optional[List[IMetricExtractor]] = None, log_policy: Optional[IRunLogPolicy] = None, fast_launch: bool = False, num_iterations_per_run: int = 1, between_runs_command: Optional[List[str]] = None, synchronized_start: bool = False, exclude_ramp_runs: bool = False):
+        """
+        num_warmup_runs: the number of runs (of each variant) that each worker performs before the measured runs, to fill the caches (page cache, dynamic loader, etc.) and let the cpu frequency ramp up
+        variants: if not None, the workers alternate these variants run by run (A, B, A, B, ...), so that a slow drift of the machine state affects all variants equally. The stop condition is only evaluated once a worker has run each variant, and sees the statistics of the first variant
+        sampler: if not None, the resources used by the processes of each run are sampled while it's running, and stored in the timelines of the results
+        noise_monitor: if not None, each run is tagged with the interferences detected while it was running. As the monitor samples the system periodically, the decision taken at the end of a run may miss an interference at the very end of the run, which is caught by the final tagging at the end of the campaign
+        contaminated_run_policy: what is done with the contaminated runs (see CONTAMINATED_RUN_POLICIES). With 'requeue', the stop condition is not evaluated after a contaminated run (up to max_requeued_runs times), so that another run replaces it
+        metric_extractors: if not None, the standard output of each run is read through a pipe while the run is going (unless none of these extractors needs it), and the metrics found by these extractors (in the output, and in the files left by the run) are attached to the run (the output is still handled by the log policy)
+        log_policy: what is done with the standard output and error of the runs. None means FileLogPolicy (each worker overwrites stdout_filepath and stderr_filepath at each run)
+        fast_launch: if True, the processes are created with vfork (the cpu binding is inherited from the launching thread), and the output files that the processes write directly are opened once per worker, so they accumulate the output of all the runs of their worker
+        num_iterations_per_run: if greater than 1, each run executes the command this number of times back to back (stopping at the first failure). The duration of each iteration is attached to the run, along with the metrics iteration_duration (their mean) and launch_overhead (the duration of the run minus the durations of its iterations)
+        between_runs_command: if not None, each worker runs this command (in the current directory of its runs) before each of its runs but the first, to restore the state that the runs are expected to start from (eg cleaning the build tree before each build). Its duration is left out of the measurements
+        synchronized_start: if True, the processes of the first runs of all the workers are created first and held at a barrier (see barrier.py), then released at once, so that the campaign starts with all the workers busy. The duration of these runs starts at their release, and the runs are checked for a partial overlap with the other workers (see RunStore.tag_ramp_runs). Whatever this mode, the start skew of the first runs is measured when there are several workers (see StarbenchResults.start_skews)
+        exclude_ramp_runs: if True, the runs that only partly overlapped with the runs of the other workers are left out of the final statistics (the stop condition still sees them). They are tagged even if this is False when synchronized_start is True
+        """
+        assert contaminated_run_policy in CONTAMINATED_RUN_POLICIES
         assert num_cores_per_run * num_parallel_runs <= max_num_cores
+        assert num_iterations_per_run >= 1
         self.run_command = run_command
         self.run_command_cwd = run_command_cwd
         self.stdout_filepath = stdout_filepath
@@ -280,49 +1469,164 @@ class CommandPerfEstimator():  # (false positive) pylint: disable=function-redef
         self.max_num_cores = max_num_cores
         self.stop_condition = stop_condition
         self.stop_on_error = stop_on_error
+        self.env_vars = env_vars if env_vars is not None else {}
+        self.core_placer = core_placer
+        self._worker_cores = {}
+        if core_placer is not None:
+            self._worker_cores = core_placer.get_worker_cores(num_cores_per_run, num_parallel_runs)
+        if supervisor is None:
+            supervisor = ThreadedRunSupervisor()
+        self.supervisor = supervisor
+        self._worker_last_end_ns = {}
+        self.num_warmup_runs = num_warmup_runs
+        self.variants = variants if variants is not None else []
+        self.sampler = sampler
+        self.noise_monitor = noise_monitor
+        self.contaminated_run_policy = contaminated_run_policy
+        self.max_requeued_runs = max_requeued_runs
+        self._num_requeued_runs = 0
+        self.metric_extractors = metric_extractors if metric_extractors is not None else []
+        self.log_policy = log_policy if log_policy is not None else FileLogPolicy()
+        self.telemetry = Telemetry()
+        self._log_cores = None
+        self._log_num_bytes = 0
+        self._log_cpu_time = 0.0
+        self._output_readers = {}
+        self.fast_launch = fast_launch
+        self.num_iterations_per_run = num_iterations_per_run
+        self._worker_launches = {}
+        self._run_envs = {}
+        self._log_files = {}
+        self._iterations_dir = None
+        self.between_runs_command = between_runs_command
+        self.synchronized_start = synchronized_start
+        self.exclude_ramp_runs = exclude_ramp_runs
+        self._start_barrier = None
+        self._metric_stats = {}
+        self._worker_num_started_runs = {}
+        self._duration_stats = RunningStats()
+        self._start_ns = None
         self._next_run_id = 0
         self._runs = {}
+        self._run_store = RunStore()
+        self._num_active_runs = 0
+        self._worker_num_finished_runs = {}
         self._last_mean_duration = None
         self._num_runs = 0
         self._runs_lock = threading.Lock()
         self._finished_event = threading.Event()
 
-    def popen_and_call(self, popen_args: List[str], on_exit: Callable[[ProcessId, ReturnCode, RunId], None], run_id: RunId, cwd: Path, stdout_filepath: Path = None, stderr_filepath: Path = None):
+    def get_run_env_vars(self, core_set: Optional[CoreSet] = None, run_env_vars: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """returns the environment variables that starbench sets for the process of a run (in addition to the inherited environment)
+
+        core_set: the logical cpus the process is bound to, if any
+        run_env_vars: additional environment variables specific to the run, if any
+        """
+        env = dict(self.env_vars)
+        if run_env_vars is not None:
+            env.update(run_env_vars)
+        # restrict the number of threads used by openmp and by the common blas implementations (intel math kernel library, openblas, gotoblas, blis, accelerate)
+        for num_threads_var in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'GOTO_NUM_THREADS', 'BLIS_NUM_THREADS', 'VECLIB_MAXIMUM_THREADS']:
+            env[num_threads_var] = f'{self.num_cores_per_run}'
+        if core_set is not None:
+            # pin each openmp thread to one of the cores of the run
+            env['OMP_PLACES'] = ','.join([f'{{{core_id}}}' for core_id in core_set])
+            env['OMP_PROC_BIND'] = 'close'
+        return env
+
+    def get_run_env(self, core_set: Optional[CoreSet] = None, run_env_vars: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """returns the environment variables of the process of a run (see get_run_env_vars)
+
+        the environment is only computed once for each core set and run environment variables, and shared by the runs
+        """
+        key = (tuple(core_set) if core_set is not None else None, tuple(sorted(run_env_vars.items())) if run_env_vars else ())
+        env = self._run_envs.get(key)
+        if env is None:
+            env = os.environ.copy()
+            env.update(self.get_run_env_vars(core_set, run_env_vars))
+            self._run_envs[key] = env
+        return env
+
+    def _get_log_file(self, filepath: Optional[Path]) -> Any:
+        """returns the file opened for writing at the given path, opening it at the first call (fast launch mode)
+        """
+        if filepath is None:
+            return None
+        with self._runs_lock:
+            file = self._log_files.get(str(filepath))
+            if file is None:
+                file = open(filepath, 'wb')  # pylint: disable=consider-using-with
+                self._log_files[str(filepath)] = file
+        return file
+
+    def spawn_process(self, popen_args: List[str], cwd: Path, stdout_filepath: Path = None, stderr_filepath: Path = None, core_set: Optional[CoreSet] = None, run_env_vars: Optional[Dict[str, str]] = None, run_id: Optional[RunId] = None) -> Tuple[Optional[subprocess.Popen], TimeInNanoseconds]:
+        """creates the process of a run, with the environment and the cpu binding of the run
+
+        the output streams that the log policy doesn't let the process write directly (or that the metric extractors need to read) are read through pipes
+        returns the process (None if it could not be started) and the monotonic time taken just before it was spawned
+        """
+        stdout_sink = self.log_policy.create_sink(run_id, stdout_filepath)
+        stderr_sink = self.log_policy.create_sink(run_id, stderr_filepath)
+        output_metric_extractors = [metric_extractor for metric_extractor in self.metric_extractors if metric_extractor.needs_output()]
+        capture_stdout = not stdout_sink.is_direct() or len(output_metric_extractors) != 0
+        capture_stderr = not stderr_sink.is_direct()
+        start_barrier = self._start_barrier if self._start_barrier is not None and self._start_barrier.holds_run(run_id) else None
+        pass_fds = start_barrier.get_pass_fds() if start_barrier is not None else ()
+        if self.fast_launch:
+            stdout = subprocess.PIPE if capture_stdout else self._get_log_file(stdout_sink.get_direct_path())
+            stderr = subprocess.PIPE if capture_stderr else self._get_log_file(stderr_sink.get_direct_path())
+            proc, start_ns = fast_spawn_run_process(popen_args, cwd, self.get_run_env(core_set, run_env_vars), stdout, stderr, core_set, pass_fds)
+        else:
+            proc, start_ns = spawn_run_process(popen_args, cwd, self.get_run_env(core_set, run_env_vars), stdout_sink.get_direct_path(), stderr_sink.get_direct_path(), core_set, capture_stdout, capture_stderr, pass_fds)
+        if start_barrier is not None:
+            start_barrier.on_spawn_attempted()
+        if proc is not None and (capture_stdout or capture_stderr):
+            output_readers = []
+            if capture_stdout:
+                output_readers.append(RunOutputReader(proc.stdout, stdout_sink, output_metric_extractors, self._log_cores))
+            if capture_stderr:
+                output_readers.append(RunOutputReader(proc.stderr, stderr_sink, [], self._log_cores))
+            with self._runs_lock:
+                self._output_readers[proc.pid] = output_readers
+        return proc, start_ns
+
+    @staticmethod
+    def reap_process(proc: subprocess.Popen) -> Tuple[ReturnCode, TimeInNanoseconds, ResourceUsage]:
+        """waits for the end of the given process, and returns its return code, the monotonic time at which it has been reaped and the resources it used
+        """
+        _pid, status, rusage = os.wait4(proc.pid, 0)
+        end_ns = time.monotonic_ns()
+        if os.WIFSIGNALED(status):
+            return_code = -os.WTERMSIG(status)  # same convention as subprocess.Popen.returncode
+        else:
+            return_code = os.WEXITSTATUS(status)
+        # the process has been reaped behind the back of proc, so tell it
+        proc.returncode = return_code
+        return return_code, end_ns, ResourceUsage.from_rusage(rusage)
+
+    def popen_and_call(self, popen_args: List[str], on_exit: Callable[..., None], run_id: RunId, cwd: Path, stdout_filepath: Path = None, stderr_filepath: Path = None, core_set: Optional[CoreSet] = None, on_spawn: Optional[Callable[..., None]] = None, run_env_vars: Optional[Dict[str, str]] = None):
         """
         Runs the given args in a subprocess.Popen, and then calls the function
         on_exit when the subprocess completes.
         on_exit is a callable object, and popen_args is a list/tuple of args that
         would give to subprocess.Popen.
+        on_exit is called as on_exit(pid, return_code, run_id, end_ns=end_ns, resource_usage=resource_usage)
+        core_set: if not None, the subprocess is bound to these logical cpus
+        on_spawn: if not None, called as on_spawn(pid, run_id, start_ns=start_ns) as soon as the subprocess is created
+        run_env_vars: additional environment variables for the subprocess
         """
-        def run_in_thread(popen_args: List[str], on_exit: Callable[[ProcessId, ReturnCode, RunId], None]):
-            stdout = None
-            stderr = None
+        def run_in_thread(popen_args: List[str], on_exit: Callable[..., None]):
             returncode = -1
             pid = -1
-            streams_are_ok = True
-            try:
-                # with open(stdout_filepath, 'w', encoding='utf8') as stdout, open(stderr_filepath, 'w', encoding='utf8') as stderr:
-                if stdout_filepath is not None:
-                    stdout = open(stdout_filepath, 'w', encoding='utf8')
-                if stderr_filepath is not None:
-                    stderr = open(stderr_filepath, 'w', encoding='utf8')
-            except:  # pylint: disable=bare-except  # noqa: E722
-                print(f'failed to open {stdout_filepath} or {stderr_filepath} in write mode')
-                streams_are_ok = False
-            if streams_are_ok:
-                try:
-                    env = os.environ.copy()
-                    # restrict the number of threads used by openmp
-                    env['OMP_NUM_THREADS'] = f'{self.num_cores_per_run}'
-                    # restrict the nu,ber of threads used by intel math kernel library
-                    env['MKL_NUM_THREADS'] = f'{self.num_cores_per_run}'
-                    proc = subprocess.Popen(popen_args, cwd=cwd, stdout=stdout, stderr=stderr, env=env)
-                    pid = proc.pid
-                    proc.wait()
-                    returncode = proc.returncode
-                except:  # pylint: disable=bare-except  # noqa: E722
-                    print(f'command failed: {popen_args}')
-            on_exit(pid, returncode, run_id)
+            end_ns = None
+            resource_usage = None
+            proc, start_ns = self.spawn_process(popen_args, cwd, stdout_filepath, stderr_filepath, core_set, run_env_vars, run_id)
+            if proc is not None:
+                pid = proc.pid
+                if on_spawn is not None:
+                    on_spawn(pid, run_id, start_ns=start_ns)
+                returncode, end_ns, resource_usage = CommandPerfEstimator.reap_process(proc)
+            on_exit(pid, returncode, run_id, end_ns=end_ns, resource_usage=resource_usage)
             return
         thread = threading.Thread(target=run_in_thread, args=(popen_args, on_exit))
         thread.start()
@@ -332,49 +1636,182 @@ class CommandPerfEstimator():  # (false positive) pylint: disable=function-redef
     def get_runs_stats(self) -> StarbenchResults:
         """returns the average duration of all completed runs of this CommandPerfEstimator instance
         """
-        results = StarbenchResults()
-        num_finished_runs = 0  # in python3.6+, replace with num_finished_runs: int = 0
         with self._runs_lock:
-            for run in self._runs.values():
-                if run.has_finished():
-                    num_finished_runs += 1
-                    results.add_measurement(run.id, run.get_duration())
-        assert num_finished_runs > 0
-        return results
+            assert len(self._run_store) > 0
+            return self._run_store.to_results(exclude_contaminated_runs=self.contaminated_run_policy != 'keep', exclude_ramp_runs=self.exclude_ramp_runs)
 
-    def _all_runs_have_finished(self):
+    def get_running_stats(self, metric: Optional[str] = None) -> RunningStats:
+        """returns the statistics of the durations (or of the given metric) of the runs that have finished so far
+
+        unlike get_runs_stats, this costs O(1) whatever the number of runs
+        """
+        if metric is None:
+            return self._duration_stats
+        return self._metric_stats.get(metric, RunningStats())
+
+    def get_metric_names(self) -> List[str]:
+        """returns the metrics found so far in the measured runs
+        """
         with self._runs_lock:
-            for run in self._runs.values():
-                if not run.has_finished():
-                    return False
-        return True
+            return list(self._metric_stats.keys())
+
+    def get_elapsed_time(self) -> DurationInSeconds:
+        """returns the time spent since the start of the campaign
+        """
+        assert self._start_ns is not None
+        return (time.monotonic_ns() - self._start_ns) * 1.0e-9
 
-    def on_exit(self, pid: ProcessId, return_code: ReturnCode, run_id: RunId):
+    def get_relaunch_latencies(self) -> Dict[WorkerId, List[DurationInSeconds]]:
+        """returns for each worker the time it took to start a new run after the end of the previous one
+        """
+        with self._runs_lock:
+            return self._run_store.get_relaunch_latencies()
+
+    def get_worker_num_finished_runs(self) -> Dict[WorkerId, int]:
+        """returns the number of runs finished so far by each worker
+        """
+        with self._runs_lock:
+            return dict(self._worker_num_finished_runs)
+
+    def on_run_spawned(self, pid: ProcessId, run_id: RunId, start_ns: Optional[TimeInNanoseconds] = None):
+        """method called by the supervisor as soon as the process of a run has been created
+
+        pid: the process identifier of the process of the run that just started
+        run_id: the run that just started
+        start_ns: the monotonic time taken just before the process was spawned
+        """
+        run = self._runs[run_id]
+        run.pid = pid
+        run.start_time = time.time()
+        if start_ns is not None:
+            run.start_ns = start_ns
+        last_end_ns = self._worker_last_end_ns.get(run.worker_id)
+        if last_end_ns is not None:
+            run.relaunch_latency = (run.start_ns - last_end_ns) * 1.0e-9
+        if self.sampler is not None:
+            self.sampler.watch_run(run_id, pid)
+        self.telemetry.emit('run_started', run_id=run_id, worker_id=run.worker_id, pid=pid, is_warmup=run.is_warmup, variant=run.variant)
+
+    def on_exit(self, pid: ProcessId, return_code: ReturnCode, run_id: RunId, end_ns: Optional[TimeInNanoseconds] = None, resource_usage: Optional[ResourceUsage] = None):
         """method called when the command executed by a run ends. Unless the stop condition is met, a new run is started.
 
         pid: the process identifier of the process of the run that just finished
         return_code: the return code of the process of the run that just finished
         run_id: the run that just completed
+        end_ns: the monotonic time taken just after the process was reaped (None if the process could not be started)
+        resource_usage: the resources used by the process (None if the process could not be started)
         """
-        end_time = datetime.now()
+        if end_ns is None:
+            end_ns = time.monotonic_ns()
+        end_time = time.time()
         # print(self, pid, run_id)
         run = self._runs[run_id]
+        self._worker_last_end_ns[run.worker_id] = end_ns
+        if self._start_barrier is not None and pid > 0 and self._start_barrier.holds_run(run_id):
+            release_ns = self._start_barrier.pop_release_ns(run_id)
+            if release_ns is not None:
+                # the run starts when its gate is released, not when its process is created
+                run.start_time += (release_ns - run.start_ns) * 1.0e-9
+                run.start_ns = release_ns
+        if self.sampler is not None and pid > 0:
+            run.timeline = self.sampler.unwatch_run(run_id)
         run.pid = pid
         run.end_time = end_time
+        run.resource_usage = resource_usage
         run.return_code = return_code
+        run.end_ns = end_ns
+        is_end_of_cycle = len(self.variants) == 0 or (run.worker_run_index + 1) % len(self.variants) == 0
+        is_excluded = False
+        if self.noise_monitor is not None:
+            run.interferences = self.noise_monitor.get_interferences(run.start_ns, run.end_ns)
+            is_excluded = len(run.interferences) != 0 and self.contaminated_run_policy != 'keep'
+        if self._iterations_dir is not None and pid > 0:
+            self._read_iteration_durations(run)
+        with self._runs_lock:
+            output_readers = self._output_readers.pop(pid, [])
+        for output_reader in output_readers:
+            run.metrics.update(output_reader.join())
+            output_reader.sink.close(return_code)
+        if pid > 0:
+            run_cwd = Path(self._worker_launches[(run.worker_id, run.variant)][1])
+            for metric_extractor in self.metric_extractors:
+                run.metrics.update(metric_extractor.collect(run_cwd))
+        with self._runs_lock:
+            for output_reader in output_readers:
+                self._log_num_bytes += output_reader.num_bytes
+                self._log_cpu_time += output_reader.cpu_time
+        is_measured = not run.is_warmup and not is_excluded and (len(self.variants) == 0 or run.variant == self.variants[0].name)
+        with self._runs_lock:
+            if is_measured:
+                self._duration_stats.add_value(run.get_duration())
+                for metric, value in run.metrics.items():
+                    self._metric_stats.setdefault(metric, RunningStats()).add_value(value)
+            is_requeued = is_excluded and not run.is_warmup and self.contaminated_run_policy == 'requeue' and self._num_requeued_runs < self.max_requeued_runs
+            if is_requeued:
+                self._num_requeued_runs += 1
+            # the finished run leaves the active runs for the compact store
+            del self._runs[run_id]
+            self._run_store.add_run(run)
+            self._worker_num_finished_runs[run.worker_id] = self._worker_num_finished_runs.get(run.worker_id, 0) + 1
+        if self.telemetry.is_enabled():
+            self._emit_run_finished(run, is_measured)
 
         do_stop = False
         if self.stop_on_error and run.return_code != 0:
             do_stop = True
+            stop_reason = 'error'
+        elif run.is_warmup or not is_end_of_cycle:
+            # the stop condition only applies to measured runs, once each variant has been run
+            do_stop = False
+            stop_reason = 'warmup' if run.is_warmup else 'incomplete_cycle'
+        elif is_requeued:
+            print(f'run {run.id} is contaminated ({",".join(run.interferences)}), starting another run instead')
+            do_stop = False
+            stop_reason = 'requeued'
         else:
             do_stop = self.stop_condition.should_stop(self)
+            stop_reason = 'stop_condition'
+        self.telemetry.emit('stop_decision', run_id=run.id, worker_id=run.worker_id, stop=do_stop, reason=stop_reason)
         if not do_stop:
             # print('adding a run')
             self._start_run(run.worker_id)  # reuse the same worker as the run that has just finished
-        if self._all_runs_have_finished():
+        with self._runs_lock:
+            # the run is only counted as inactive once its successor (if any) is active, so that the count can't drop to 0 while a worker is still going
+            self._num_active_runs -= 1
+            all_runs_have_finished = self._num_active_runs == 0
+        if all_runs_have_finished:
             # tell the main thread that all the runs have finished
             self._finished_event.set()
 
+    def _get_iterations_filepath(self, run_id: RunId) -> Path:
+        assert self._iterations_dir is not None
+        return self._iterations_dir / f'run{run_id}.txt'
+
+    def _read_iteration_durations(self, run: Run):
+        """attaches the durations of the iterations of the given finished run to it, along with the metrics that summarize them
+        """
+        iterations_filepath = self._get_iterations_filepath(run.id)
+        if not iterations_filepath.exists():
+            return  # the loop could not start the command
+        run.iteration_durations = [float(line) for line in iterations_filepath.read_text(encoding='utf8').split()]
+        iterations_filepath.unlink()
+        if len(run.iteration_durations) != 0:
+            run.metrics['iteration_duration'] = statistics.mean(run.iteration_durations)
+            run.metrics['launch_overhead'] = run.get_duration() - sum(run.iteration_durations)
+
+    def _emit_run_finished(self, run: Run, is_measured: bool):
+        """emits the telemetry events of the end of the given run
+        """
+        self.telemetry.emit('run_finished', run_id=run.id, worker_id=run.worker_id, return_code=run.return_code, duration=run.get_duration(), is_warmup=run.is_warmup, variant=run.variant, interferences=run.interferences, metrics=run.metrics)
+        if is_measured:
+            with self._runs_lock:
+                stats = self._duration_stats
+                running_stats = {'num_runs': stats.num_values, 'mean_duration': stats.mean, 'min_duration': stats.min, 'max_duration': stats.max}
+                if stats.num_values >= 2:
+                    running_stats.update({'stddev': stats.get_stddev(), 'ci_half_width': stats.get_confidence_interval_half_width()})
+                running_stats['metrics'] = {metric: metric_stats.mean for metric, metric_stats in self._metric_stats.items()}
+            self.telemetry.emit('running_stats', elapsed_time=self.get_elapsed_time(), **running_stats)
+
     @staticmethod
     def _interpret_tags(tagged_string: str, tags_value: Dict[str, str]) -> str:
         untagged_string = tagged_string
@@ -383,39 +1820,242 @@ class CommandPerfEstimator():  # (false positive) pylint: disable=function-redef
             untagged_string = untagged_string.replace(tag_id, tag_value)
         return untagged_string
 
-    def _start_run(self, worker_id: WorkerId):
-        """starts a run using the given worker"""
-        tags_value = {
+    @staticmethod
+    def get_worker_tags_value(worker_id: WorkerId) -> Dict[str, str]:
+        """returns the value of each tag for the given worker
+        """
+        return {
             '<worker_id>': f'{worker_id:03d}'
         }
-        run_command = [CommandPerfEstimator._interpret_tags(s, tags_value) for s in self.run_command]
-        run_command_cwd = CommandPerfEstimator._interpret_tags(str(self.run_command_cwd), tags_value)
-        stdout_filepath = None
-        if self.stdout_filepath is not None:
-            stdout_filepath = CommandPerfEstimator._interpret_tags(str(self.stdout_filepath), tags_value)
+
+    def _get_worker_launch(self, worker_id: WorkerId, variant: Optional[RunVariant]) -> Tuple[List[str], str, Optional[str], Optional[str]]:
+        """returns the command, current directory, stdout and stderr of the runs of the given worker (and variant), with their tags interpreted
+
+        they are only computed (and the directories of the output files created) at the first run of the worker
+        """
+        key = (worker_id, variant.name if variant is not None else None)
+        worker_launch = self._worker_launches.get(key)
+        if worker_launch is not None:
+            return worker_launch
+        run_command, run_command_cwd, stdout_filepath, stderr_filepath = self.run_command, self.run_command_cwd, self.stdout_filepath, self.stderr_filepath
+        if variant is not None:
+            run_command, run_command_cwd = variant.run_command, variant.run_command_cwd
+            if variant.stdout_filepath is not None:
+                stdout_filepath = variant.stdout_filepath
+            if variant.stderr_filepath is not None:
+                stderr_filepath = variant.stderr_filepath
+
+        tags_value = CommandPerfEstimator.get_worker_tags_value(worker_id)
+        run_command = [CommandPerfEstimator._interpret_tags(s, tags_value) for s in run_command]
+        run_command_cwd = CommandPerfEstimator._interpret_tags(str(run_command_cwd), tags_value)
+        if stdout_filepath is not None:
+            stdout_filepath = CommandPerfEstimator._interpret_tags(str(stdout_filepath), tags_value)
             Path(stdout_filepath).parent.mkdir(exist_ok=True, parents=True)
-        stderr_filepath = None
-        if self.stderr_filepath is not None:
-            stderr_filepath = CommandPerfEstimator._interpret_tags(str(self.stderr_filepath), tags_value)
+        if stderr_filepath is not None:
+            stderr_filepath = CommandPerfEstimator._interpret_tags(str(stderr_filepath), tags_value)
             Path(stderr_filepath).parent.mkdir(exist_ok=True, parents=True)
+        worker_launch = (run_command, run_command_cwd, stdout_filepath, stderr_filepath)
+        self._worker_launches[key] = worker_launch
+        return worker_launch
+
+    def _run_between_runs_command(self, worker_id: WorkerId, cwd: str):
+        """runs between_runs_command for the given worker, and waits for its end
+        """
+        tags_value = CommandPerfEstimator.get_worker_tags_value(worker_id)
+        command = [CommandPerfEstimator._interpret_tags(s, tags_value) for s in self.between_runs_command]
+        core_set = self._worker_cores.get(worker_id)
+        completed_process = subprocess.run(command, cwd=cwd, env=self.get_run_env(core_set), stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+        if completed_process.returncode != 0:
+            print(f'warning: the command run between the runs of worker {worker_id} failed ({command} returned {completed_process.returncode}): {completed_process.stderr.decode("utf8", errors="replace").strip()}')
+        # the relaunch latency only covers the launch of the next run
+        self._worker_last_end_ns[worker_id] = time.monotonic_ns()
+
+    def _start_run(self, worker_id: WorkerId):
+        """starts a run using the given worker"""
+        worker_run_index = self._worker_num_started_runs.get(worker_id, 0)
+        self._worker_num_started_runs[worker_id] = worker_run_index + 1
+        variant = None
+        if len(self.variants) != 0:
+            variant = self.variants[worker_run_index % len(self.variants)]
+        is_warmup = worker_run_index < self.num_warmup_runs * max(len(self.variants), 1)
+        run_command, run_command_cwd, stdout_filepath, stderr_filepath = self._get_worker_launch(worker_id, variant)
+        if self.between_runs_command is not None and worker_run_index > 0:
+            self._run_between_runs_command(worker_id, run_command_cwd)
 
         with self._runs_lock:
-            run = Run(self._next_run_id, worker_id)
+            run = Run(self._next_run_id, worker_id, self._worker_cores.get(worker_id), worker_run_index, is_warmup, variant.name if variant is not None else None, variant.env_vars if variant is not None else None)
             self._next_run_id += 1
             self._runs[run.id] = run
-            _run_thread = self.popen_and_call(popen_args=run_command, on_exit=self.on_exit, run_id=run.id, cwd=run_command_cwd, stdout_filepath=stdout_filepath, stderr_filepath=stderr_filepath)  # noqa:F841
+            self._num_active_runs += 1
+        run_args = self.stop_condition.get_run_args(self)
+        if len(run_args) != 0:
+            run_command = run_command + run_args
+        if self._iterations_dir is not None:
+            run_command = [sys.executable, str(Path(__file__).with_name('repeat.py')), str(self.num_iterations_per_run), str(self._get_iterations_filepath(run.id))] + run_command
+        if self._start_barrier is not None and worker_run_index == 0:
+            run_command = self._start_barrier.wrap_command(run.id, run_command)
+        self.supervisor.start_process(self, run, popen_args=run_command, cwd=run_command_cwd, stdout_filepath=stdout_filepath, stderr_filepath=stderr_filepath)
 
     def run(self) -> StarbenchResults:
         '''performs the runs of the command and returns the runs' average duration'''
         print(f"executing the following command in parallel ({self.num_parallel_runs} parallel runs) : '{str(self.run_command)}'")
+        self._start_ns = time.monotonic_ns()
+        for worker_id, core_set in self._worker_cores.items():
+            print(f'worker {worker_id} is bound to cores {core_set}')
+        if len(self._worker_cores) != 0:
+            free_cores = set(os.sched_getaffinity(0)).difference(*self._worker_cores.values())
+            self._log_cores = sorted(free_cores) if len(free_cores) != 0 else None
+        self.log_policy.start(self._log_cores)
+        if self.num_iterations_per_run > 1:
+            self._iterations_dir = Path(tempfile.mkdtemp(prefix='starbench-iterations-'))
+        self.telemetry.emit('campaign_started', command=self.run_command, num_parallel_runs=self.num_parallel_runs, num_cores_per_run=self.num_cores_per_run)
+        if self.sampler is not None:
+            self.sampler.start()
+        if self.noise_monitor is not None:
+            self.noise_monitor.start()
+        if self.synchronized_start:
+            self._start_barrier = StartBarrier(self.num_parallel_runs)
         for worker_id in range(self.num_parallel_runs):
             self._start_run(worker_id)
+        if self._start_barrier is not None:
+            self._start_barrier.release()
+            self.telemetry.emit('start_barrier_released', num_runs=self._start_barrier.num_runs)
+        self.supervisor.wait_for_all_runs(self)
         # wait until all runs have finished
         self._finished_event.wait()
+        self.log_policy.stop()
+        for file in self._log_files.values():
+            file.close()
+        self._log_files = {}
+        if self._iterations_dir is not None:
+            shutil.rmtree(self._iterations_dir, ignore_errors=True)
+            self._iterations_dir = None
+        start_barrier_release_ns = None
+        if self._start_barrier is not None:
+            start_barrier_release_ns = self._start_barrier.release_ns
+            self._start_barrier.close()
+            self._start_barrier = None
+        with self._runs_lock:
+            if self.num_parallel_runs > 1 or self.synchronized_start:
+                self._run_store.set_start_skews(start_barrier_release_ns)
+            if self.synchronized_start or self.exclude_ramp_runs:
+                self._run_store.tag_ramp_runs()
+        if self._log_num_bytes != 0:
+            print(f'run logs : {self._log_num_bytes / 1024.0:.1f} KiB of output read through pipes, {self._log_cpu_time:.3f} s of cpu time in the reading threads{" (bound to cores " + str(self._log_cores) + ")" if self._log_cores is not None else ""}')
+        log_report = self.log_policy.get_report()
+        if log_report is not None:
+            print(log_report)
+        if self.sampler is not None:
+            self.sampler.stop()
+            print(self.sampler.get_report())
+        if self.noise_monitor is not None:
+            self.noise_monitor.stop()
+            # the monitor now covers the whole campaign, including the end of the last runs
+            with self._runs_lock:
+                run_store = self._run_store
+                for run_id, start_ns, end_ns in zip(run_store.run_ids, run_store.start_ns, run_store.end_ns):
+                    run_store.set_interferences(run_id, self.noise_monitor.get_interferences(start_ns, end_ns))
+            print(self.noise_monitor.get_report())
         with self._runs_lock:
-            workers_success = [run.return_code == 0 for run in self._runs.values()]
-            if not all(workers_success):
-                raise StarBenchException(f'at least one run failed (workers_success = {workers_success})')
+            num_runs, num_failed_runs = len(self._run_store), self._run_store.num_failed_runs
+            self.telemetry.emit('campaign_finished', num_runs=num_runs, num_failed_runs=num_failed_runs, elapsed_time=self.get_elapsed_time())
+            if num_failed_runs != 0:
+                failed_run_ids = [run_id for run_id, return_code in zip(self._run_store.run_ids, self._run_store.return_codes) if return_code != 0]
+                raise StarBenchException(f'{num_failed_runs} of {num_runs} runs failed (failed runs: {failed_run_ids[:10]}{"..." if num_failed_runs > 10 else ""})')
         starbench_results = self.get_runs_stats()
-        print(f'mean duration : {starbench_results.get_average_duration():.3f} s ({starbench_results.get_num_runs()} runs)')
+        contaminated_run_ids = starbench_results.get_contaminated_run_ids()
+        if len(contaminated_run_ids) != 0:
+            print(f'{len(contaminated_run_ids)} run(s) are contaminated by interferences ({"left out of the statistics" if starbench_results.exclude_contaminated_runs else "kept in the statistics"}, {self._num_requeued_runs} requeued)')
+        if len(starbench_results.start_skews) != 0:
+            start_skews = starbench_results.start_skews.values()
+            print(f'start skew : max {max(start_skews) * 1.0e6:.0f} us, mean {statistics.mean(start_skews) * 1.0e6:.0f} us over {len(start_skews)} workers ({"released at once from the start barrier" if self.synchronized_start else "started one after the other"})')
+        ramp_run_ids = starbench_results.get_ramp_run_ids()
+        if len(ramp_run_ids) != 0:
+            print(f'{len(ramp_run_ids)} run(s) only partly overlapped with the runs of the other workers ({"left out of the statistics" if starbench_results.exclude_ramp_runs else "kept in the statistics"})')
+        if len(self.variants) == 0:
+            print(f'mean duration : {starbench_results.get_average_duration():.3f} s ({starbench_results.get_num_runs()} runs)')
+        for variant in self.variants:
+            variant_results = starbench_results.get_variant_results(variant.name)
+            print(f'variant {variant.name} mean duration : {variant_results.get_average_duration():.3f} s ({variant_results.get_num_runs()} runs)')
+        if len(starbench_results.warmup_durations) != 0:
+            print(f'{len(starbench_results.warmup_durations)} warmup runs (mean duration : {statistics.mean(starbench_results.warmup_durations.values()):.3f} s) are left out of the statistics')
+        launch_overheads = [metrics['launch_overhead'] for metrics in starbench_results.metrics.values() if 'launch_overhead' in metrics]
+        if len(launch_overheads) != 0:
+            iteration_durations = [iteration_duration for run_iteration_durations in starbench_results.iteration_durations.values() for iteration_duration in run_iteration_durations]
+            print(f'iterations : {self.num_iterations_per_run} per run, mean iteration duration {statistics.mean(iteration_durations) * 1.0e6:.0f} us ({len(iteration_durations)} iterations), mean launch overhead {statistics.mean(launch_overheads) * 1.0e6:.0f} us per run ({statistics.mean(launch_overheads) / self.num_iterations_per_run * 1.0e6:.0f} us per iteration)')
+        for worker_id, relaunch_latencies in sorted(self.get_relaunch_latencies().items()):
+            print(f'worker {worker_id} relaunch latency : mean {statistics.mean(relaunch_latencies) * 1.0e6:.0f} us, max {max(relaunch_latencies) * 1.0e6:.0f} us ({len(relaunch_latencies)} relaunches)')
         return starbench_results
+
+
+def interpret_worker_tags(tagged_string: str, worker_id: WorkerId) -> str:
+    """replaces the tags supported by CommandPerfEstimator (eg '<worker_id>') in the given string with their value for the given worker
+    """
+    return CommandPerfEstimator._interpret_tags(tagged_string, CommandPerfEstimator.get_worker_tags_value(worker_id))  # pylint: disable=protected-access
+
+
+class ThreadedRunSupervisor(IRunSupervisor):
+    """a supervisor that uses one thread per run: the thread waits for the end of the run's process, then starts the next run of the same worker
+    """
+    def start_process(self, star_bencher: CommandPerfEstimator, run: Run, popen_args: List[str], cwd: Path, stdout_filepath: Optional[Path], stderr_filepath: Optional[Path]):
+        _run_thread = star_bencher.popen_and_call(popen_args=popen_args, on_exit=star_bencher.on_exit, run_id=run.id, cwd=cwd, stdout_filepath=stdout_filepath, stderr_filepath=stderr_filepath, core_set=run.core_set, on_spawn=star_bencher.on_run_spawned, run_env_vars=run.env_vars)  # noqa:F841
+
+    def wait_for_all_runs(self, star_bencher: CommandPerfEstimator):
+        # nothing to do: the runs are driven by their own threads
+        pass
+
+
+class EventLoopRunSupervisor(IRunSupervisor):
+    """a supervisor that watches the processes of all runs from a single thread (the one calling CommandPerfEstimator.run), using one pidfd per process
+
+    when a run ends, the next run of the same worker is started in the same iteration of the event loop, which minimizes the relaunch latency and avoids having one os thread per run
+    """
+    _selector: Optional[selectors.BaseSelector]  # watches the pidfd of each running process
+    _failed_runs: List[RunId]  # the runs whose process could not be started, and whose end still needs to be processed
+
+    def __init__(self):
+        if not hasattr(os, 'pidfd_open'):
+            raise StarBenchException('the event-loop process supervisor requires pidfd support (linux >= 5.3 and python >= 3.9)')
+        self._selector = None
+        self._failed_runs = []
+
+    def start_process(self, star_bencher: CommandPerfEstimator, run: Run, popen_args: List[str], cwd: Path, stdout_filepath: Optional[Path], stderr_filepath: Optional[Path]):
+        if self._selector is None:
+            self._selector = selectors.DefaultSelector()
+        proc, start_ns = star_bencher.spawn_process(popen_args, cwd, stdout_filepath, stderr_filepath, run.core_set, run.env_vars, run.id)
+        if proc is None:
+            # the end of this run is processed by the event loop, to avoid a recursion between on_exit and start_process
+            self._failed_runs.append(run.id)
+            return
+        star_bencher.on_run_spawned(proc.pid, run.id, start_ns=start_ns)
+        pidfd = os.pidfd_open(proc.pid)  # pylint: disable=no-member
+        self._selector.register(pidfd, selectors.EVENT_READ, (proc, run.id))
+
+    def wait_for_all_runs(self, star_bencher: CommandPerfEstimator):
+        while self._failed_runs or (self._selector is not None and len(self._selector.get_map()) > 0):
+            while self._failed_runs:
+                star_bencher.on_exit(-1, -1, self._failed_runs.pop(0))
+            if self._selector is None or len(self._selector.get_map()) == 0:
+                continue
+            for key, _events in self._selector.select():
+                # the pidfd becomes readable when its process has terminated
+                proc, run_id = key.data
+                self._selector.unregister(key.fd)
+                os.close(key.fd)
+                return_code, end_ns, resource_usage = CommandPerfEstimator.reap_process(proc)
+                star_bencher.on_exit(proc.pid, return_code, run_id, end_ns=end_ns, resource_usage=resource_usage)
+        if self._selector is not None:
+            self._selector.close()
+            self._selector = None
+
+
+def create_run_supervisor(supervisor_id: str) -> IRunSupervisor:
+    """creates a process supervisor from its identifier
+
+    supervisor_id: either 'threads' (one thread per run) or 'event-loop' (a single thread watching all processes)
+    """
+    if supervisor_id == 'threads':
+        return ThreadedRunSupervisor()
+    if supervisor_id == 'event-loop':
+        return EventLoopRunSupervisor()
+    raise StarBenchException(f'unexpected process supervisor: {supervisor_id} (expected threads or event-loop)')
@@ -0,0 +1,182 @@
+from typing import List, Dict, Optional
+from pathlib import Path
+import os
+import re
+from .core import ICorePlacer, CoreId, CoreSet, WorkerId, StarBenchException
+
+NumaNodeId = int
+PackageId = int
+
+
+class LogicalCpu():
+    """a logical cpu (hardware thread) as seen by the linux kernel
+    """
+    id: CoreId  # the logical cpu number, as used by sched_setaffinity
+    package_id: PackageId  # the physical package (socket) this logical cpu belongs to
+    core_id: int  # the physical core (within its package) this logical cpu belongs to
+    numa_node_id: NumaNodeId  # the numa node this logical cpu is attached to
+    smt_rank: int  # 0 for the first hardware thread of a physical core, 1 for its first sibling, etc.
+
+    def __init__(self, cpu_id: CoreId, package_id: PackageId, core_id: int, numa_node_id: NumaNodeId, smt_rank: int = 0):
+        self.id = cpu_id
+        self.package_id = package_id
+        self.core_id = core_id
+        self.numa_node_id = numa_node_id
+        self.smt_rank = smt_rank
+
+
+class CpuTopology():
+    """the logical cpus available to this process, along with their location on the machine
+    """
+    cpus: List[LogicalCpu]
+
+    def __init__(self, cpus: List[LogicalCpu]):
+        self.cpus = cpus
+
+    @staticmethod
+    def _read_int(file_path: Path, default: int) -> int:
+        try:
+            return int(file_path.read_text(encoding='utf8').strip())
+        except (OSError, ValueError):
+            return default
+
+    @staticmethod
+    def from_sysfs(sysfs_cpu_dir: Path = Path('/sys/devices/system/cpu')) -> 'CpuTopology':
+        """builds the topology of the logical cpus that this process is allowed to run on
+        """
+        cpus = []
+        first_thread_of_core = {}  # (package_id, core_id) -> number of logical cpus already seen on this core
+        for cpu_id in sorted(os.sched_getaffinity(0)):
+            cpu_dir = sysfs_cpu_dir / f'cpu{cpu_id}'
+            package_id = CpuTopology._read_int(cpu_dir / 'topology' / 'physical_package_id', 0)
+            core_id = CpuTopology._read_int(cpu_dir / 'topology' / 'core_id', cpu_id)
+            numa_node_id = package_id
+            if cpu_dir.is_dir():
+                for entry in cpu_dir.iterdir():
+                    match = re.match(r'^node(?P<node_id>[0-9]+)$', entry.name)
+                    if match:
+                        numa_node_id = int(match['node_id'])
+            smt_rank = first_thread_of_core.get((package_id, core_id), 0)
+            first_thread_of_core[(package_id, core_id)] = smt_rank + 1
+            cpus.append(LogicalCpu(cpu_id, package_id, core_id, numa_node_id, smt_rank))
+        return CpuTopology(cpus)
+
+    def get_numa_node_ids(self) -> List[NumaNodeId]:
+        return sorted({cpu.numa_node_id for cpu in self.cpus})
+
+    def get_sorted_cpus(self, numa_node_id: Optional[NumaNodeId] = None) -> List[LogicalCpu]:
+        """returns the logical cpus in the order they should be allocated: physical cores first, hyperthread siblings last
+        """
+        cpus = [cpu for cpu in self.cpus if numa_node_id is None or cpu.numa_node_id == numa_node_id]
+        return sorted(cpus, key=lambda cpu: (cpu.smt_rank, cpu.numa_node_id, cpu.package_id, cpu.core_id, cpu.id))
+
+
+class PackedCorePlacer(ICorePlacer):
+    """allocates consecutive physical cores to consecutive workers, filling a numa node before using the next one
+    """
+    topology: Optional[CpuTopology]  # None means that the topology is read from the running machine
+
+    def __init__(self, topology: Optional[CpuTopology] = None):
+        self.topology = topology
+
+    def get_worker_cores(self, num_cores_per_run: int, num_workers: int) -> Dict[WorkerId, CoreSet]:
+        topology = self.topology if self.topology is not None else CpuTopology.from_sysfs()
+        cpus = topology.get_sorted_cpus()
+        if num_cores_per_run * num_workers > len(cpus):
+            raise StarBenchException(f'unable to place {num_workers} workers of {num_cores_per_run} cores each on the {len(cpus)} available logical cpus')
+        worker_cores = {}
+        for worker_id in range(num_workers):
+            worker_cores[worker_id] = [cpu.id for cpu in cpus[worker_id * num_cores_per_run:(worker_id + 1) * num_cores_per_run]]
+        return worker_cores
+
+
+class SpreadCorePlacer(ICorePlacer):
+    """distributes workers across numa nodes (round robin), so that memory bandwidth is shared evenly between sockets
+
+    all the cores of a worker are taken from the same numa node, so that its threads don't access remote memory
+    """
+    topology: Optional[CpuTopology]  # None means that the topology is read from the running machine
+
+    def __init__(self, topology: Optional[CpuTopology] = None):
+        self.topology = topology
+
+    def get_worker_cores(self, num_cores_per_run: int, num_workers: int) -> Dict[WorkerId, CoreSet]:
+        topology = self.topology if self.topology is not None else CpuTopology.from_sysfs()
+        free_cpus = {node_id: topology.get_sorted_cpus(node_id) for node_id in topology.get_numa_node_ids()}
+        worker_cores = {}
+        node_ids = topology.get_numa_node_ids()
+        next_node_index = 0
+        for worker_id in range(num_workers):
+            # use the next numa node that still has enough free cpus for this worker
+            for _ in range(len(node_ids)):
+                node_id = node_ids[next_node_index]
+                next_node_index = (next_node_index + 1) % len(node_ids)
+                if len(free_cpus[node_id]) >= num_cores_per_run:
+                    worker_cores[worker_id] = [cpu.id for cpu in free_cpus[node_id][:num_cores_per_run]]
+                    free_cpus[node_id] = free_cpus[node_id][num_cores_per_run:]
+                    break
+            else:
+                raise StarBenchException(f'unable to place worker {worker_id} ({num_cores_per_run} cores) on a single numa node: not enough free cores left')
+        return worker_cores
+
+
+class ExplicitCorePlacer(ICorePlacer):
+    """uses a core set given by the user for each worker
+    """
+    worker_cores: Dict[WorkerId, CoreSet]
+
+    def __init__(self, worker_cores: Dict[WorkerId, CoreSet]):
+        self.worker_cores = worker_cores
+
+    def get_worker_cores(self, num_cores_per_run: int, num_workers: int) -> Dict[WorkerId, CoreSet]:
+        available_cores = os.sched_getaffinity(0)
+        used_cores = set()
+        for worker_id in range(num_workers):
+            if worker_id not in self.worker_cores:
+                raise StarBenchException(f'no core set has been given for worker {worker_id}')
+            core_set = self.worker_cores[worker_id]
+            if len(set(core_set)) != len(core_set):
+                raise StarBenchException(f'the core set of worker {worker_id} ({core_set}) contains the same core more than once')
+            unavailable_cores = sorted(set(core_set).difference(available_cores))
+            if len(unavailable_cores) != 0:
+                raise StarBenchException(f'the core set of worker {worker_id} ({core_set}) uses cores that are not available to this process: {unavailable_cores} (available cores: {sorted(available_cores)})')
+            if len(core_set) != num_cores_per_run:
+                raise StarBenchException(f'worker {worker_id} is expected to use {num_cores_per_run} cores, but its core set is {core_set}')
+            if used_cores.intersection(core_set):
+                raise StarBenchException(f'the core set of worker {worker_id} ({core_set}) overlaps the core set of another worker')
+            used_cores.update(core_set)
+        return {worker_id: self.worker_cores[worker_id] for worker_id in range(num_workers)}
+
+
+def parse_core_list(core_list: str) -> CoreSet:
+    """parses a core list in the linux cpulist format (eg '0-3,8,10-11')
+    """
+    cores = []
+    for item in core_list.split(','):
+        match = re.match(r'^(?P<first>[0-9]+)(-(?P<last>[0-9]+))?$', item)
+        if match is None:
+            raise StarBenchException(f'invalid core list: {core_list} (unexpected item \'{item}\', expected eg 0-3,8,10-11)')
+        first = int(match['first'])
+        last = int(match['last']) if match['last'] is not None else first
+        if last < first:
+            raise StarBenchException(f'invalid core list: {core_list} (the range \'{item}\' is empty)')
+        for core in range(first, last + 1):
+            if core in cores:
+                raise StarBenchException(f'invalid core list: {core_list} (core {core} of \'{item}\' is already in the list)')
+            cores.append(core)
+    return cores
+
+
+def create_core_placer(placement: str) -> ICorePlacer:
+    """creates a core placer from its textual description
+
+    placement: either 'packed', 'spread' or an explicit map of the form 'map:<worker0 cpulist>/<worker1 cpulist>/...' (eg 'map:0-3/8-11')
+    """
+    if placement == 'packed':
+        return PackedCorePlacer()
+    if placement == 'spread':
+        return SpreadCorePlacer()
+    if placement.startswith('map:'):
+        worker_cores = {worker_id: parse_core_list(core_list) for worker_id, core_list in enumerate(placement[len('map:'):].split('/'))}
+        return ExplicitCorePlacer(worker_cores)
+    raise StarBenchException(f'unexpected cpu placement: {placement} (expected packed, spread or map:<cpulist>/<cpulist>/...)')
@@ -0,0 +1,226 @@
+from typing import Dict, List, Optional, Set, Any
+from pathlib import Path
+import re
+import xml.etree.ElementTree as ET
+from .core import IMetricExtractor, IStarBencherStopCondition, CommandPerfEstimator, RunningStats, StarbenchResults, MeasurementsTable, DurationInSeconds, StarBenchException
+
+CTEST_TEST_TIME_METRIC = 'ctest_test_time'  # the prefix of the per-test metrics (ctest_test_time.<test name>), the same as the ctest-test-times named pattern
+CTEST_LOG_FILE_PATH = Path('Testing/Temporary/LastTest.log')  # the log that ctest writes in the build tree at each invocation
+
+TEST_STATS_COLUMNS = ['test', 'num_runs', 'mean_duration', 'stddev', 'min_duration', 'max_duration', 'ci_half_width', 'relative_ci_half_width']
+
+
+def parse_ctest_junit_report(report_path: Path) -> Dict[str, DurationInSeconds]:
+    """returns the duration of each passed test of the given junit report (written by ctest --output-junit, ctest >= 3.21)
+    """
+    try:
+        root = ET.parse(report_path).getroot()
+    except ET.ParseError as err:
+        raise StarBenchException(f'failed to parse the ctest junit report {report_path}: {err}') from err
+    test_durations = {}
+    for test_case in root.iter('testcase'):
+        if any(child.tag in ['failure', 'error', 'skipped'] for child in test_case):
+            continue
+        test_durations[test_case.get('name')] = float(test_case.get('time', 'nan'))
+    return test_durations
+
+
+def parse_ctest_log(log_path: Path) -> Dict[str, DurationInSeconds]:
+    """returns the duration of each passed test of the given ctest log (Testing/Temporary/LastTest.log in the build tree)
+
+    the log gives the durations with a resolution of 10 ms, use a junit report for short tests
+    """
+    test_durations = {}
+    test_name = None
+    test_duration = None
+    with open(log_path, 'rt', encoding='utf8', errors='replace') as log_file:
+        for line in log_file:
+            match = re.match(r'^[0-9]+/[0-9]+ Test: (.*)$', line)
+            if match is not None:
+                test_name, test_duration = match.group(1), None
+                continue
+            match = re.match(r'^Test time =\s*([0-9.]+) sec', line)
+            if match is not None:
+                test_duration = float(match.group(1))
+                continue
+            if line.startswith('Test Passed.') and test_name is not None and test_duration is not None:
+                test_durations[test_name] = test_duration
+    return test_durations
+
+
+def get_ctest_junit_report_path(benchmark_command: List[str]) -> Optional[Path]:
+    """returns the junit report written by the given ctest command (its --output-junit argument), None if it doesn't write one
+    """
+    for arg_index, arg in enumerate(benchmark_command):
+        if arg == '--output-junit' and arg_index + 1 < len(benchmark_command):
+            return Path(benchmark_command[arg_index + 1])
+        if arg.startswith('--output-junit='):
+            return Path(arg.partition('=')[2])
+    return None
+
+
+class CtestTestTimesCollector(IMetricExtractor):
+    """collects the duration of each test of a ctest run from the files that ctest leaves in the build tree, as the metrics ctest_test_time.<test name>
+
+    the junit report is used if the benchmark command writes one, as it's more precise than the log. The files are removed once read, so that a run that fails to write them doesn't inherit the tests of the previous run
+    """
+    junit_report_path: Optional[Path]  # the junit report written by the benchmark command, relative to the build directory. None means the ctest log is used
+
+    def __init__(self, junit_report_path: Optional[Path] = None):
+        self.junit_report_path = junit_report_path
+
+    def needs_output(self) -> bool:
+        return False
+
+    def extract(self, line: str) -> Dict[str, float]:
+        return {}
+
+    def collect(self, run_cwd: Path) -> Dict[str, float]:
+        report_path = run_cwd / (self.junit_report_path if self.junit_report_path is not None else CTEST_LOG_FILE_PATH)
+        if not report_path.exists():
+            return {}
+        test_durations = parse_ctest_junit_report(report_path) if self.junit_report_path is not None else parse_ctest_log(report_path)
+        report_path.unlink()
+        return {f'{CTEST_TEST_TIME_METRIC}.{test_name}': duration for test_name, duration in test_durations.items()}
+
+
+def get_test_metrics(metrics: List[str]) -> Dict[str, str]:
+    """returns the test name of each per-test metric among the given metrics
+    """
+    prefix = f'{CTEST_TEST_TIME_METRIC}.'
+    return {metric: metric[len(prefix):] for metric in metrics if metric.startswith(prefix)}
+
+
+def get_ctest_exclude_regex(benchmark_command: List[str]) -> Optional[str]:
+    """returns the regular expression of the tests excluded by the given ctest command (its -E or --exclude-regex argument), None if it has none
+    """
+    for arg_index, arg in enumerate(benchmark_command):
+        if arg in ['-E', '--exclude-regex'] and arg_index + 1 < len(benchmark_command):
+            return benchmark_command[arg_index + 1]
+        if arg.startswith('--exclude-regex='):
+            return arg.partition('=')[2]
+    return None
+
+
+def escape_cmake_regex(text: str) -> str:
+    """returns a regular expression (in the syntax of cmake, used by ctest's -R and -E) that matches the given text literally
+    """
+    return re.sub(r'([\^$.\[\]()*+?|\\])', r'\\\1', text)
+
+
+class StopWhenTestsConverged(IStarBencherStopCondition):
+    """a stop condition that triggers when the mean duration of each test of a ctest suite is known with enough precision (see CtestTestTimesCollector)
+
+    with skip_converged_tests, the tests whose mean duration is precise enough are left out of the next runs (with ctest's -E option, combined with the one of the benchmark command if any), so that the noisy tests get more runs than the stable ones. The duration of the runs then only covers the tests that are still measured
+    """
+    max_relative_half_width: float  # eg 0.02 to stop when the mean duration of each test is known within +/- 2 %
+    confidence: float  # the confidence level of the intervals, eg 0.95
+    min_num_runs: int  # the number of values of a test below which its precision is not evaluated
+    max_num_runs: Optional[int]  # the number of runs after which the campaign stops, whatever the precision. None means no limit
+    max_duration: Optional[DurationInSeconds]  # the (wall clock) time budget of the campaign, after which no new run is started. None means no limit
+    skip_converged_tests: bool
+    converged_tests: Set[str]  # the tests whose mean duration is precise enough in the current campaign
+    _star_bencher: Optional[CommandPerfEstimator]  # the campaign that converged_tests belong to
+
+    def __init__(self, max_relative_half_width: float = 0.02, confidence: float = 0.95, min_num_runs: int = 5, max_num_runs: Optional[int] = None, max_duration: Optional[DurationInSeconds] = None, skip_converged_tests: bool = True):
+        assert min_num_runs >= 2, 'at least 2 runs are needed to estimate the precision'
+        self.max_relative_half_width = max_relative_half_width
+        self.confidence = confidence
+        self.min_num_runs = min_num_runs
+        self.max_num_runs = max_num_runs
+        self.max_duration = max_duration
+        self.skip_converged_tests = skip_converged_tests
+        self.converged_tests = set()
+        self._star_bencher = None
+
+    def _watch(self, star_bencher: CommandPerfEstimator):
+        # the same stop condition can be used by successive campaigns (eg the variants of a matrix)
+        if star_bencher is not self._star_bencher:
+            self._star_bencher = star_bencher
+            self.converged_tests = set()
+
+    def is_precise_enough(self, stats: RunningStats) -> bool:
+        return stats.num_values >= self.min_num_runs and stats.get_confidence_interval_half_width(self.confidence) <= self.max_relative_half_width * abs(stats.mean)
+
+    def should_stop(self, star_bencher: CommandPerfEstimator) -> bool:
+        self._watch(star_bencher)
+        num_runs = star_bencher.get_running_stats().num_values
+        if self.max_num_runs is not None and num_runs >= self.max_num_runs:
+            print(f'stopping after {num_runs} runs: the maximum number of runs has been reached ({len(self.converged_tests)} tests converged)')
+            return True
+        if self.max_duration is not None and star_bencher.get_elapsed_time() >= self.max_duration:
+            print(f'stopping after {num_runs} runs: the time budget of {self.max_duration} s has been spent ({len(self.converged_tests)} tests converged)')
+            return True
+        test_metrics = get_test_metrics(star_bencher.get_metric_names())
+        # the set is replaced rather than modified, as the other workers may be reading it (see get_run_args)
+        converged_tests = set(self.converged_tests)
+        for metric, test_name in test_metrics.items():
+            if test_name not in converged_tests and self.is_precise_enough(star_bencher.get_running_stats(metric)):
+                print(f'test {test_name} has converged after {star_bencher.get_running_stats(metric).num_values} runs')
+                converged_tests.add(test_name)
+        self.converged_tests = converged_tests
+        if len(test_metrics) != 0 and len(self.converged_tests) >= len(test_metrics):
+            print(f'stopping after {num_runs} runs: the mean duration of each of the {len(test_metrics)} tests is precise enough')
+            return True
+        return False
+
+    def get_run_args(self, star_bencher: CommandPerfEstimator) -> List[str]:
+        self._watch(star_bencher)
+        converged_tests = self.converged_tests
+        if not self.skip_converged_tests or len(converged_tests) == 0:
+            return []
+        exclude_regex = f'^({"|".join(escape_cmake_regex(test_name) for test_name in sorted(converged_tests))})$'
+        # ctest only keeps the last -E option
+        command_exclude_regex = get_ctest_exclude_regex(star_bencher.run_command)
+        if command_exclude_regex is not None:
+            exclude_regex = f'{command_exclude_regex}|{exclude_regex}'
+        return ['-E', exclude_regex]
+
+
+def compute_test_stats_table(results: StarbenchResults) -> MeasurementsTable:
+    """summarizes the per-test durations collected by CtestTestTimesCollector over all the measured runs (of all workers), one row per test (see TEST_STATS_COLUMNS)
+
+    in the interleaved mode, the tests of each variant are summarized separately (variant column)
+    """
+    if len(results.variants) == 0:
+        variants_results = {None: results}
+        table = MeasurementsTable(list(TEST_STATS_COLUMNS))
+    else:
+        variants_results = {variant: results.get_variant_results(variant) for variant in sorted(set(results.variants.values()))}
+        table = MeasurementsTable(['variant'] + TEST_STATS_COLUMNS)
+    for variant, variant_results in variants_results.items():
+        metrics = set()
+        for run_metrics in variant_results.metrics.values():
+            metrics.update(run_metrics.keys())
+        for metric, test_name in sorted(get_test_metrics(list(metrics)).items(), key=lambda item: item[1]):
+            stats = RunningStats()
+            for duration in variant_results.get_metric_values(metric).values():
+                stats.add_value(duration)
+            if stats.num_values == 0:
+                continue
+            row = {'test': test_name, 'num_runs': stats.num_values, 'mean_duration': stats.mean, 'stddev': None, 'min_duration': stats.min, 'max_duration': stats.max, 'ci_half_width': None, 'relative_ci_half_width': None}
+            if variant is not None:
+                row['variant'] = variant
+            if stats.num_values >= 2:
+                row['stddev'] = stats.get_stddev()
+                row['ci_half_width'] = stats.get_confidence_interval_half_width()
+                row['relative_ci_half_width'] = row['ci_half_width'] / stats.mean if stats.mean != 0.0 else None
+            table.add_row(row)
+    return table
+
+
+def format_test_stats_table(table: MeasurementsTable) -> str:
+    """returns the given per-test statistics table (see compute_test_stats_table) as human readable text
+    """
+    def format_value(value: Optional[float], format_spec: str) -> str:
+        return format(value, format_spec) if value is not None else '-'
+
+    def get_test_desc(row: Dict[str, Any]) -> str:
+        return f'{row["variant"]}/{row["test"]}' if 'variant' in row else row['test']
+
+    test_column_width = max([len('test')] + [len(get_test_desc(row)) for row in table.rows])
+    lines = [f'{"test":{test_column_width}s}  runs  mean duration     stddev  ci half width']
+    for row in table.rows:
+        relative_ci_half_width = f' ({row["relative_ci_half_width"] * 100.0:.1f} %)' if row['relative_ci_half_width'] is not None else ''
+        lines.append(f'{get_test_desc(row):{test_column_width}s}  {row["num_runs"]:4d}  {row["mean_duration"]:11.4f} s  {format_value(row["stddev"], "9.4f")}  {format_value(row["ci_half_width"], "13.4f")}{relative_ci_half_width}')
+    return '\n'.join(lines)
@@ -6,8 +6,11 @@
     password_group.add_argument('--git-pass-file', help='the path to a file containing the password (or personal access token)')
     password_group.add_argument('--git-pass', type=str, help='the password (or personal access token) to use (not recommended for security reasons)')
 """
-from typing import Optional
+from typing import Optional, List, Tuple, Dict
+from contextlib import contextmanager
 from .core import IFileTreeProvider, IFileTreeProviderCreator, IPasswordProvider, Url, UserId, FileTreeProviderParams, PasswordProviderFactory
+import fcntl
+import os
 import subprocess
 from pathlib import Path
 
@@ -20,30 +23,143 @@ class GitCloner(IFileTreeProvider):
     git_user: Optional[UserId]
     password_provider: Optional[IPasswordProvider]
     src_dir: Path  # the temporary directory used to populate the source code
+    mirror_dir: Optional[Path]  # if not None, a persistent bare mirror of the repository, updated incrementally and shared by successive campaigns. src_dir is then a worktree of this mirror
+    clone_depth: Optional[int]  # if not None, the history is truncated to this number of commits (shallow clone)
+    partial_clone_filter: Optional[str]  # if not None, the filter used for a partial clone (eg 'blob:none' for a blobless clone)
 
-    def __init__(self, repos_url: Url, src_dir: Path, code_version: GitCommitId, git_user: UserId = None, password_provider: IPasswordProvider = None):
+    def __init__(self, repos_url: Url, src_dir: Path, code_version: GitCommitId, git_user: UserId = None, password_provider: IPasswordProvider = None, mirror_dir: Optional[Path] = None, clone_depth: Optional[int] = None, partial_clone_filter: Optional[str] = None):
         self.repos_url = repos_url
         self.code_version = code_version
         self.git_user = git_user
         self.password_provider = password_provider
         self.src_dir = src_dir
+        self.mirror_dir = mirror_dir
+        self.clone_depth = clone_depth
+        self.partial_clone_filter = partial_clone_filter
 
-    def get_source_tree_path(self) -> Path:
-        self.src_dir.mkdir(exist_ok=True, parents=True)
-        git_credentials = []
+    def _get_credentials_config(self) -> Tuple[List[str], Dict[str, str]]:
+        """returns the git options and the environment variables that give the credentials (if any) to git
+
+        the credentials are given to git by a credential helper that reads them from the environment of the git process, so that they are neither stored in the git config (remote.origin.url) nor visible on the command line (ps)
+        """
+        if not self.git_user and not self.password_provider:
+            return [], {}
+        env_vars = {}
+        credentials = []
         if self.git_user:
-            git_credentials.append(self.git_user)
+            env_vars['STARBENCH_GIT_USER'] = self.git_user
+            credentials.append('echo "username=$STARBENCH_GIT_USER"')
         if self.password_provider:
-            git_credentials.append(self.password_provider.get_password())
-        git_repos_url = self.repos_url
-        if len(git_credentials) != 0:
-            git_repos_url = git_repos_url.replace('https://', f"https://{':'.join(git_credentials)}@")
+            env_vars['STARBENCH_GIT_PASSWORD'] = self.password_provider.get_password()
+            credentials.append('echo "password=$STARBENCH_GIT_PASSWORD"')
+        # the empty helper discards the helpers of the user's config, so that the credentials are not stored by them
+        git_options = ['-c', 'credential.helper=', '-c', f'credential.helper=!f() {{ test "$1" = get && {{ {"; ".join(credentials)}; }}; }}; f']
+        return git_options, env_vars
+
+    def _run_remote_git(self, git_args: List[str], cwd: Optional[Path] = None):
+        """runs a git command that accesses the remote repository, with the credentials if any
+        """
+        git_options, env_vars = self._get_credentials_config()
+        env = None
+        if len(env_vars) != 0:
+            env = os.environ.copy()
+            env.update(env_vars)
+        subprocess.run(['git'] + git_options + git_args, cwd=str(cwd) if cwd is not None else None, env=env, check=True)
+
+    def _forget_stored_credentials(self, git_dir: Path):
+        """makes sure that the url of the remote repository doesn't contain credentials (as stored by the previous versions of starbench)
+        """
+        subprocess.run(['git', 'remote', 'set-url', 'origin', self.repos_url], cwd=str(git_dir), check=True)
+
+    def _get_clone_options(self) -> List[str]:
+        clone_options = []
+        if self.clone_depth is not None:
+            clone_options.append(f'--depth={self.clone_depth}')
+        if self.partial_clone_filter is not None:
+            clone_options.append(f'--filter={self.partial_clone_filter}')
+        return clone_options
+
+    def _get_fetch_options(self) -> List[str]:
+        fetch_options = []
+        if self.clone_depth is not None:
+            fetch_options.append(f'--depth={self.clone_depth}')
+        return fetch_options
+
+    def _get_fetch_refspecs(self) -> List[str]:
+        """returns what needs to be fetched to update the repository
+
+        a shallow repository only fetches the requested version, as fetching all refs with a limited depth wouldn't necessarily bring it
+        """
+        if self.clone_depth is not None and self.code_version:
+            return [self.code_version]
+        return []
+
+    @contextmanager
+    def _lock_mirror(self):
+        """prevents other starbench processes from modifying the mirror at the same time
+        """
+        self.mirror_dir.parent.mkdir(exist_ok=True, parents=True)
+        with open(self.mirror_dir.parent / f'{self.mirror_dir.name}.lock', 'w', encoding='utf8') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _update_mirror(self):
+        """creates the mirror of the repository, or fetches the new objects if it already exists
+
+        the mirror is expected to be locked
+        """
+        if (self.mirror_dir / 'HEAD').exists():
+            self._forget_stored_credentials(self.mirror_dir)
+            self._run_remote_git(['fetch', '--prune'] + self._get_fetch_options() + ['origin'] + self._get_fetch_refspecs(), cwd=self.mirror_dir)
+        else:
+            self._run_remote_git(['clone', '--mirror'] + self._get_clone_options() + [self.repos_url, str(self.mirror_dir)])
+            if self._get_fetch_refspecs():
+                self._run_remote_git(['fetch'] + self._get_fetch_options() + ['origin'] + self._get_fetch_refspecs(), cwd=self.mirror_dir)
+
+    def _get_worktree_from_mirror(self) -> Path:
+        with self._lock_mirror():
+            self._update_mirror()
+            code_version = self.code_version if self.code_version else 'HEAD'
+            if (self.src_dir / '.git').exists():
+                # src_dir is already a worktree of the mirror: just switch it to the requested version
+                subprocess.run(['git', 'checkout', '--detach', f'{code_version}'], cwd=str(self.src_dir), check=True)
+            else:
+                # forget the worktrees whose directory has been removed since they were created
+                subprocess.run(['git', 'worktree', 'prune'], cwd=str(self.mirror_dir), check=True)
+                subprocess.run(['git', 'worktree', 'add', '--detach', str(self.src_dir), f'{code_version}'], cwd=str(self.mirror_dir), check=True)
+        return self.src_dir
+
+    def get_source_tree_path(self) -> Path:
+        if self.mirror_dir is not None:
+            return self._get_worktree_from_mirror()
+        self.src_dir.mkdir(exist_ok=True, parents=True)
         # src_dir.mkdir(exist_ok=True)
-        subprocess.run(['git', 'clone', f'{str(self.repos_url)}', str(self.src_dir)], cwd=str(self.src_dir), check=True)
+        if (self.src_dir / '.git').exists():
+            # reuse the existing clone
+            self._forget_stored_credentials(self.src_dir)
+            self._run_remote_git(['fetch'] + self._get_fetch_options() + ['origin'] + self._get_fetch_refspecs(), cwd=self.src_dir)
+        else:
+            self._run_remote_git(['clone'] + self._get_clone_options() + [self.repos_url, str(self.src_dir)], cwd=self.src_dir)
+            if self._get_fetch_refspecs():
+                self._run_remote_git(['fetch'] + self._get_fetch_options() + ['origin'] + self._get_fetch_refspecs(), cwd=self.src_dir)
         if self.code_version:
             subprocess.run(['git', 'checkout', f'{self.code_version}'], cwd=str(self.src_dir), check=True)
         return self.src_dir
 
+    def list_commits(self, first_commit: GitCommitId, last_commit: GitCommitId) -> List[GitCommitId]:
+        """returns the commits from first_commit to last_commit (both included, oldest first), following the first parent of merge commits
+        """
+        if self.code_version is None:
+            self.code_version = last_commit
+        self.get_source_tree_path()
+        git_dir = self.mirror_dir if self.mirror_dir is not None else self.src_dir
+        completed_process = subprocess.run(['git', 'rev-list', '--first-parent', '--reverse', f'{first_commit}..{last_commit}'], cwd=str(git_dir), capture_output=True, text=True, check=True)
+        first_commit_id = subprocess.run(['git', 'rev-parse', f'{first_commit}^{{commit}}'], cwd=str(git_dir), capture_output=True, text=True, check=True).stdout.strip()
+        return [first_commit_id] + completed_process.stdout.split()
+
 
 class GitClonerCreator(IFileTreeProviderCreator):
 
@@ -59,4 +175,7 @@ class GitClonerCreator(IFileTreeProviderCreator):
         if password_provider_params is not None:
             password_provider = PasswordProviderFactory().create_password_provider(password_provider_params['type'], password_provider_params)
         src_dir = Path(params['src-dir'])
-        return GitCloner(repos_url, src_dir, code_version, git_user, password_provider)
+        mirror_dir = params.get('mirror-dir')
+        if mirror_dir is not None:
+            mirror_dir = Path(mirror_dir)
+        return GitCloner(repos_url, src_dir, code_version, git_user, password_provider, mirror_dir=mirror_dir, clone_depth=params.get('clone-depth'), partial_clone_filter=params.get('partial-clone-filter'))
@@ -0,0 +1,158 @@
+from typing import List, Dict, Optional, Any
+from pathlib import Path
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import socket
+import sqlite3
+import subprocess
+from .core import MeasurementsTable, ResourceUsage
+
+CampaignId = int  # identifies a campaign in a ResultsHistory
+
+
+def get_source_tree_commit(src_dir: Path) -> Optional[str]:
+    """returns the commit id of the given source tree, or None if it's not a git working tree
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=src_dir, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class CampaignInfo():
+    """the description of a benchmark campaign, stored along with its measurements in a ResultsHistory
+    """
+    commit: Optional[str]  # the commit id of the benchmarked source tree, if known
+    cmake_options: List[str]
+    benchmark_command: Optional[List[str]]  # None for a campaign that only contains build measurements
+    host: str  # the name of the machine the campaign ran on
+    num_cores: int  # the number of cores used by the campaign
+    num_cores_per_run: int
+    start_time: datetime
+    end_time: datetime
+    metadata: Dict[str, Any]  # additional information on the campaign (eg the variant of a matrix campaign)
+
+    def __init__(self, commit: Optional[str], cmake_options: List[str], benchmark_command: Optional[List[str]], num_cores: int, num_cores_per_run: int, start_time: datetime, end_time: datetime, host: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
+        self.commit = commit
+        self.cmake_options = cmake_options
+        self.benchmark_command = benchmark_command
+        self.host = host if host is not None else socket.gethostname()
+        self.num_cores = num_cores
+        self.num_cores_per_run = num_cores_per_run
+        self.start_time = start_time
+        self.end_time = end_time
+        self.metadata = metadata if metadata is not None else {}
+
+
+class ResultsHistory():
+    """an append-only store of the measurements of all the campaigns, in a sqlite database
+
+    each campaign is stored with its description (commit, cmake options, host, etc.) and the measurements of all its runs. The database can be shared by several starbench processes.
+
+    the columns of the runs that are not in RUN_COLUMNS (metrics, variant, outlier and contamination flags, etc.) are stored as a json object in the extra column of the runs table
+    """
+    db_path: Path
+
+    RUN_COLUMNS = ['phase', 'run_id', 'worker_id', 'start_time', 'duration'] + ResourceUsage.FIELD_NAMES
+    CAMPAIGN_COLUMNS = ['campaign_id', 'commit', 'cmake_options', 'benchmark_command', 'host', 'num_cores', 'num_cores_per_run', 'campaign_start_time', 'campaign_end_time', 'metadata']  # the columns of the campaign, returned with each run by query
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self.db_path.parent.mkdir(exist_ok=True, parents=True)
+        with self._connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')  # readers don't block the writer
+            connection.execute('''CREATE TABLE IF NOT EXISTS campaigns (
+                campaign_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                commit_id TEXT,
+                cmake_options TEXT,
+                benchmark_command TEXT,
+                host TEXT,
+                num_cores INTEGER,
+                num_cores_per_run INTEGER,
+                start_time TEXT,
+                end_time TEXT,
+                metadata TEXT)''')
+            run_columns = ', '.join(f'{column} {column_type}' for column, column_type in ResultsHistory._get_run_column_types().items())
+            connection.execute(f'CREATE TABLE IF NOT EXISTS runs (campaign_id INTEGER REFERENCES campaigns(campaign_id), {run_columns}, extra TEXT)')
+            # the databases created before the extra column was introduced
+            if 'extra' not in [column_info[1] for column_info in connection.execute('PRAGMA table_info(runs)')]:
+                connection.execute('ALTER TABLE runs ADD COLUMN extra TEXT')
+            connection.execute('CREATE INDEX IF NOT EXISTS runs_campaign_id ON runs (campaign_id)')
+
+    @staticmethod
+    def _get_run_column_types() -> Dict[str, str]:
+        column_types = {'phase': 'TEXT', 'run_id': 'INTEGER', 'worker_id': 'INTEGER', 'start_time': 'TEXT', 'duration': 'REAL'}
+        column_types.update({field_name: 'REAL' for field_name in ResourceUsage.FIELD_NAMES})
+        return column_types
+
+    @contextmanager
+    def _connect(self):
+        """opens a connection, commits the transaction on success and closes the connection
+        """
+        connection = sqlite3.connect(str(self.db_path), timeout=60.0)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _get_extra_columns(row: Dict[str, Any]) -> Optional[str]:
+        """returns the columns of the given row that don't have their own column in the runs table, as a json object (None if there are none)
+
+        the columns that have the name of a campaign column (eg the cmake_options of a matrix campaign) are left out, as they're already described by the campaign
+        """
+        extra_columns = {column: value for column, value in row.items() if column not in ResultsHistory.RUN_COLUMNS and column not in ResultsHistory.CAMPAIGN_COLUMNS}
+        return json.dumps(extra_columns) if len(extra_columns) != 0 else None
+
+    def add_campaign(self, measurements: MeasurementsTable, campaign_info: CampaignInfo) -> CampaignId:
+        """stores the given measurements (all their rows in a single transaction) along with the description of their campaign
+        """
+        with self._connect() as connection:
+            cursor = connection.execute(
+                'INSERT INTO campaigns (commit_id, cmake_options, benchmark_command, host, num_cores, num_cores_per_run, start_time, end_time, metadata) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (campaign_info.commit, json.dumps(campaign_info.cmake_options), json.dumps(campaign_info.benchmark_command) if campaign_info.benchmark_command is not None else None, campaign_info.host, campaign_info.num_cores, campaign_info.num_cores_per_run, campaign_info.start_time.isoformat(), campaign_info.end_time.isoformat(), json.dumps(campaign_info.metadata, sort_keys=True)))
+            campaign_id = cursor.lastrowid
+            connection.executemany(
+                f'INSERT INTO runs (campaign_id, {", ".join(ResultsHistory.RUN_COLUMNS)}, extra) VALUES (?, {", ".join(["?"] * len(ResultsHistory.RUN_COLUMNS))}, ?)',
+                [[campaign_id] + [row.get(column) for column in ResultsHistory.RUN_COLUMNS] + [ResultsHistory._get_extra_columns(row)] for row in measurements.rows])
+        return campaign_id
+
+    def query(self, phase: Optional[str] = None, campaign_id: Optional[CampaignId] = None, commit: Optional[str] = None, host: Optional[str] = None, since: Optional[datetime] = None, until: Optional[datetime] = None, metadata: Optional[Dict[str, Any]] = None) -> MeasurementsTable:
+        """returns the measurements of the runs that match all the given criteria (None means any value), with the description of their campaign (CAMPAIGN_COLUMNS)
+
+        since, until: only the campaigns that started in this time interval are selected
+        metadata: only the campaigns that have these metadata values are selected
+        """
+        conditions = []
+        parameters = []
+        for column, value in [('runs.phase', phase), ('campaigns.campaign_id', campaign_id), ('campaigns.commit_id', commit), ('campaigns.host', host)]:
+            if value is not None:
+                conditions.append(f'{column} = ?')
+                parameters.append(value)
+        if since is not None:
+            conditions.append('campaigns.start_time >= ?')
+            parameters.append(since.isoformat())
+        if until is not None:
+            conditions.append('campaigns.start_time < ?')
+            parameters.append(until.isoformat())
+        if metadata is not None:
+            for key, value in metadata.items():
+                conditions.append('json_extract(campaigns.metadata, ?) = ?')
+                parameters += [f'$.{key}', value]
+        sql = ('SELECT campaigns.campaign_id, campaigns.commit_id, campaigns.cmake_options, campaigns.benchmark_command, campaigns.host, campaigns.num_cores, campaigns.num_cores_per_run, campaigns.start_time, campaigns.end_time, campaigns.metadata, '
+               + ', '.join(f'runs.{column}' for column in ResultsHistory.RUN_COLUMNS)
+               + ', runs.extra FROM runs JOIN campaigns ON runs.campaign_id = campaigns.campaign_id')
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        sql += ' ORDER BY campaigns.campaign_id, runs.rowid'
+        with self._connect() as connection:
+            records = connection.execute(sql, parameters).fetchall()
+        table = MeasurementsTable(ResultsHistory.CAMPAIGN_COLUMNS + ResultsHistory.RUN_COLUMNS)
+        for record in records:
+            row = dict(zip(table.columns, record[:-1]))
+            if record[-1] is not None:
+                row.update(json.loads(record[-1]))
+            table.add_row(row)
+        return table
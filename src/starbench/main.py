@@ -6,27 +6,157 @@ __version__ = '1.0.4'
 import argparse
 import json
 import os
-import pandas as pd
-from typing import List, Optional
+import sys
+from typing import List, Optional, Tuple, Dict, Any
 from pathlib import Path
-from .core import CommandPerfEstimator, StopAfterSingleRun, FileTreeProviderCreatorRegistry, IFileTreeProvider, PasswordProviderFactory
+from datetime import datetime
+from .core import CommandPerfEstimator, StopAfterSingleRun, FileTreeProviderCreatorRegistry, IFileTreeProvider, PasswordProviderFactory, StarbenchResults, StarBenchException, ICorePlacer, create_run_supervisor, MeasurementsTable, parse_measurement_value, IStarBencherStopCondition, StopOnRelativeConfidenceInterval, interpret_worker_tags, IOutlierFilter, RunVariant, ISystemNoiseMonitor, CONTAMINATED_RUN_POLICIES, IMetricExtractor, Telemetry, StopAfterFixedNumRuns
 from .passwordfile import LocalFilePPCreator
 from .existingdir import ExistingDirCreator
-from .gitcloner import GitClonerCreator
+from .gitcloner import GitClonerCreator, GitCloner
+from .coreplacement import create_core_placer
+from .buildcache import BuildCache, parse_size
+from .buildtree import copy_build_tree, CLONE_METHODS
+from .perfbisect import CommitBenchmarker, sweep_commits, bisect_slowdown
+from .matrix import CampaignMatrix
+from .comparison import compare_measurements, GROUP_COLUMNS
+from .outliers import create_outlier_filter
+from .history import ResultsHistory, CampaignInfo, get_source_tree_commit
+from .procsampler import ProcSampler, get_timelines_file_path, write_timelines
+from .noisemonitor import SystemNoiseMonitor
+from .remote import AgentAddress, AgentToken, RemoteRunSupervisor, RunAgent, parse_agent_address, read_agent_token
+from .metrics import create_metric_extractor, NAMED_PATTERNS
+from .runlogs import create_log_policy
+from .telemetry import JsonLinesTelemetrySink, PrometheusTelemetrySink
+from .ctest import CtestTestTimesCollector, StopWhenTestsConverged, get_ctest_junit_report_path, compute_test_stats_table, format_test_stats_table
+from .scaling import get_scaling_points, compute_scaling_table, format_scaling_table, parse_int_list
 
 
-def starbench_cmake_app(source_code_provider: IFileTreeProvider, output_measurements_file_path: Path, tmp_dir: Path, num_cores: int, benchmark_command: List[str], cmake_options: Optional[List[str]] = None, cmake_exe_location: Path = None):
+def get_configure_options(cmake_options: List[str], cmake_generator: Optional[str] = None, use_ccache: bool = False) -> List[str]:
+    """returns the options passed to cmake in the configure step
+
+    cmake_generator: the cmake generator to use (eg 'Ninja'). None means the default generator (usually 'Unix Makefiles')
+    use_ccache: if True, the compilers are launched through ccache
     """
-    tests_to_run : regular expression as understood by ctest's -L option. eg '^arch4_quick$'
+    configure_options = []
+    if cmake_generator is not None:
+        configure_options += ['-G', cmake_generator]
+    if use_ccache:
+        configure_options += [f'-DCMAKE_{lang}_COMPILER_LAUNCHER=ccache' for lang in ['C', 'CXX', 'Fortran']]
+    return configure_options + cmake_options
+
+
+REBUILD_MODES = ['clean', 'incremental', 'noop']  # what is done between two runs of a repeated build phase (see get_between_builds_command)
+BUILD_PHASES = ['configure', 'build']  # the build phases that can be repeated
+
+
+def get_between_builds_command(phase: str, rebuild_mode: str, cmake_prog: str, src_dir: Path, touched_files: Optional[List[Path]] = None) -> Optional[List[str]]:
+    """returns the command that each worker runs between two runs of the given build phase (None if there's nothing to do)
+
+    rebuild_mode: one of REBUILD_MODES:
+    - 'clean': each run starts from scratch (the cmake cache is removed before each configure, the build tree is cleaned before each build)
+    - 'incremental': the touched_files are touched before each build, which measures the rebuild after an edit (the configure runs reuse the cmake cache)
+    - 'noop': nothing is done, which measures the time the build system takes to find out that everything is up to date
+    touched_files: the files of the source tree (relative to src_dir) that are touched in the 'incremental' mode
+    """
+    assert phase in BUILD_PHASES
+    if rebuild_mode not in REBUILD_MODES:
+        raise StarBenchException(f'unexpected rebuild mode: {rebuild_mode} (expected one of {", ".join(REBUILD_MODES)})')
+    if rebuild_mode == 'clean':
+        if phase == 'configure':
+            return [cmake_prog, '-E', 'rm', '-rf', 'CMakeCache.txt', 'CMakeFiles']
+        return [cmake_prog, '--build', '.', '--target', 'clean']
+    if rebuild_mode == 'incremental' and phase == 'build':
+        if not touched_files:
+            raise StarBenchException('the incremental rebuild mode requires the source files to touch between the builds')
+        return [cmake_prog, '-E', 'touch'] + [str(src_dir / touched_file) for touched_file in touched_files]
+    return None
+
+
+def build_cmake_app(src_dir: Path, worker_dir: Path, build_dir: Path, num_parallel_builds: int, cmake_prog: str, configure_options: List[str], process_supervisor: str, num_jobs_per_build: int = 1, ccache_dir: Optional[Path] = None, env_vars: Optional[Dict[str, str]] = None, phase_stop_conditions: Optional[Dict[str, IStarBencherStopCondition]] = None, rebuild_mode: str = 'clean', touched_files: Optional[List[Path]] = None) -> Tuple[StarbenchResults, StarbenchResults]:
+    """configures and builds the source tree src_dir in the build directory of each worker
+
+    num_parallel_builds: the number of workers, each one performing its own build
+    configure_options: the options passed to cmake in the configure step (see get_configure_options)
+    num_jobs_per_build: the number of parallel jobs used by each build
+    ccache_dir: the cache directory shared by the ccache instances, if ccache is used. None means the default ccache directory
+    env_vars: additional environment variables for the configure and build commands
+    phase_stop_conditions: the stop condition of each build phase ('configure', 'build') that is repeated. The other phases are run once by each worker
+    rebuild_mode: what is done between two runs of a repeated phase (see get_between_builds_command)
+    touched_files: the source files touched between two builds in the 'incremental' rebuild mode
+
+    returns the durations of the configure and build steps
+    """
+    if phase_stop_conditions is None:
+        phase_stop_conditions = {}
+    unexpected_phases = set(phase_stop_conditions.keys()).difference(BUILD_PHASES)
+    if len(unexpected_phases) != 0:
+        raise StarBenchException(f'unexpected build phases: {", ".join(sorted(unexpected_phases))} (expected {", ".join(BUILD_PHASES)})')
+    between_builds_commands = {phase: get_between_builds_command(phase, rebuild_mode, cmake_prog, src_dir, touched_files) for phase in phase_stop_conditions.keys()}
+    env_vars = dict(env_vars) if env_vars is not None else {}
+    if ccache_dir is not None:
+        env_vars['CCACHE_DIR'] = str(ccache_dir)
+    print(f'configuring {src_dir} into {build_dir} ...')
+    Telemetry().set_phase('configure', src_dir=str(src_dir), build_dir=str(build_dir))
+    configure = CommandPerfEstimator(
+        run_command=[cmake_prog] + configure_options + [str(src_dir)],
+        num_cores_per_run=1,
+        num_parallel_runs=num_parallel_builds,
+        max_num_cores=num_parallel_builds,
+        stop_condition=phase_stop_conditions.get('configure', StopAfterSingleRun()),
+        run_command_cwd=build_dir,
+        stdout_filepath=worker_dir / 'configure_stdout.txt',
+        stderr_filepath=worker_dir / 'configure_stderr.txt',
+        supervisor=create_run_supervisor(process_supervisor),
+        env_vars=env_vars,
+        between_runs_command=between_builds_commands.get('configure'))
+    configure_results = configure.run()
+
+    print(f'building {build_dir} ...')
+    Telemetry().set_phase('build', build_dir=str(build_dir))
+    build = CommandPerfEstimator(
+        run_command=[cmake_prog, '--build', '.', '--parallel', f'{num_jobs_per_build}'],
+        num_cores_per_run=num_jobs_per_build,
+        num_parallel_runs=num_parallel_builds,
+        max_num_cores=num_parallel_builds * num_jobs_per_build,
+        stop_condition=phase_stop_conditions.get('build', StopAfterSingleRun()),
+        run_command_cwd=build_dir,
+        stdout_filepath=worker_dir / 'build_stdout.txt',
+        stderr_filepath=worker_dir / 'build_stderr.txt',
+        supervisor=create_run_supervisor(process_supervisor),
+        env_vars=env_vars,
+        between_runs_command=between_builds_commands.get('build'))
+    build_results = build.run()
+    for run_id, duration in build_results.durations.items():
+        print(f'worker {build_results.worker_ids[run_id]:03d} build duration : {duration:.3f} s')
+    for phase, results in [('configure', configure_results), ('build', build_results)]:
+        if phase in phase_stop_conditions:
+            print(f'{phase} ({rebuild_mode} mode) : mean duration {results.get_average_duration():.3f} s over {results.get_num_runs()} runs')
+    return configure_results, build_results
+
+
+def get_worker_dir(tmp_dir: Path) -> Path:
+    """returns the directory of each worker (with a <worker_id> tag)
+    """
+    return tmp_dir / 'worker<worker_id>'
+
+
+def build_cmake_app_workers(src_dir: Path, tmp_dir: Path, num_cores: int, cmake_options: Optional[List[str]] = None, cmake_exe_location: Path = None, process_supervisor: str = 'threads', build_cache: Optional[BuildCache] = None, build_once: bool = False, clone_method: str = 'auto', num_build_jobs: Optional[int] = None, cmake_generator: Optional[str] = None, use_ccache: bool = False, ccache_dir: Optional[Path] = None, env_vars: Optional[Dict[str, str]] = None, phase_stop_conditions: Optional[Dict[str, IStarBencherStopCondition]] = None, rebuild_mode: str = 'clean', touched_files: Optional[List[Path]] = None) -> Dict[str, StarbenchResults]:
+    """populates the build directory of each of the num_cores workers with a build of src_dir
+
+    see starbench_cmake_app for the meaning of the arguments
+
+    returns the measurements of each build phase ('create_build_dir', 'configure', 'build'). The configure and build phases are missing if the build has been restored from the build cache
     """
-    measurements = pd.DataFrame({'run_id': pd.Series(dtype='int'), 'duration': pd.Series(dtype='float')})
-    src_dir = source_code_provider.get_source_tree_path()
     # we need one build for each parallel run, otherwise running ctest on parallel would overwrite the same file, which causes the test to randomly fail depnding on race conditions
-    worker_dir = tmp_dir / 'worker<worker_id>'
+    worker_dir = get_worker_dir(tmp_dir)
     build_dir = worker_dir / 'build'
     if cmake_options is None:
         cmake_options = []
+    if env_vars is None:
+        env_vars = {}
     print(f'creating build directory {worker_dir}')
+    Telemetry().set_phase('create_build_dir', build_dir=str(build_dir))
     create_build_dir = CommandPerfEstimator(
         run_command=['mkdir', '-p', str(build_dir)],
         num_cores_per_run=1,
@@ -35,68 +165,381 @@ def starbench_cmake_app(source_code_provider: IFileTreeProvider, output_measurem
         stop_condition=StopAfterSingleRun(),
         run_command_cwd=Path('/tmp'),
         stdout_filepath=worker_dir / 'createdir_stdout.txt',
-        stderr_filepath=worker_dir / 'createdir_stderr.txt')
-    _create_build_dir_duration = create_build_dir.run()  # noqa: F841
-    # build_dir.mkdir(exist_ok=True)
+        stderr_filepath=worker_dir / 'createdir_stderr.txt',
+        supervisor=create_run_supervisor(process_supervisor))
+    build_results = {'create_build_dir': create_build_dir.run()}
 
-    print(f'configuring {src_dir} into {build_dir} ...')
     cmake_prog = 'cmake'
     if cmake_exe_location:
         cmake_prog = str(cmake_exe_location)
-    configure = CommandPerfEstimator(
-        run_command=[cmake_prog] + cmake_options + [str(src_dir)],
-        num_cores_per_run=1,
-        num_parallel_runs=num_cores,
-        max_num_cores=num_cores,
-        stop_condition=StopAfterSingleRun(),
-        run_command_cwd=build_dir,
-        stdout_filepath=worker_dir / 'configure_stdout.txt',
-        stderr_filepath=worker_dir / 'configure_stderr.txt')
-    _configure_duration = configure.run()  # noqa: F841
+    worker_build_dirs = [Path(interpret_worker_tags(str(build_dir), worker_id)) for worker_id in range(num_cores)]
+    configure_options = get_configure_options(cmake_options, cmake_generator, use_ccache)
+    if num_build_jobs is None:
+        num_build_jobs = num_cores if build_once else 1
+    is_cached_build = False
+    if build_cache is not None:
+        build_key = BuildCache.compute_key(src_dir, configure_options, cmake_prog, env_vars)
+        is_cached_build = build_cache.restore(build_key, worker_build_dirs)
+    if is_cached_build:
+        print(f'restored the build of {src_dir} into {build_dir} from the build cache')
+    else:
+        if build_once:
+            reference_build_dir = tmp_dir / 'reference' / 'build'
+            reference_build_dir.mkdir(exist_ok=True, parents=True)
+            configure_results, make_results = build_cmake_app(src_dir, reference_build_dir.parent, reference_build_dir, 1, cmake_prog, configure_options, process_supervisor, num_jobs_per_build=num_build_jobs, ccache_dir=ccache_dir, env_vars=env_vars, phase_stop_conditions=phase_stop_conditions, rebuild_mode=rebuild_mode, touched_files=touched_files)
+            print(f'cloning {reference_build_dir} into {build_dir} ...')
+            for worker_build_dir in worker_build_dirs:
+                cloner = copy_build_tree(reference_build_dir, worker_build_dir, clone_method=clone_method)
+                print(f'{worker_build_dir}: {cloner.get_report()}')
+        else:
+            configure_results, make_results = build_cmake_app(src_dir, worker_dir, build_dir, num_cores, cmake_prog, configure_options, process_supervisor, num_jobs_per_build=num_build_jobs, ccache_dir=ccache_dir, env_vars=env_vars, phase_stop_conditions=phase_stop_conditions, rebuild_mode=rebuild_mode, touched_files=touched_files)
+            reference_build_dir = worker_build_dirs[0]
+        if build_cache is not None:
+            build_cache.store(build_key, reference_build_dir, configure_results.get_average_duration() + make_results.get_average_duration())
+        build_results['configure'] = configure_results
+        build_results['build'] = make_results
+    if build_cache is not None:
+        print(build_cache.get_report())
+    return build_results
 
-    print(f'building {build_dir} ...')
-    build = CommandPerfEstimator(
-        run_command=['make'],
-        num_cores_per_run=1,
-        num_parallel_runs=num_cores,
-        max_num_cores=num_cores,
-        stop_condition=StopAfterSingleRun(),
-        run_command_cwd=build_dir,
-        stdout_filepath=worker_dir / 'build_stdout.txt',
-        stderr_filepath=worker_dir / 'build_stderr.txt')
-    _build_duration = build.run()  # noqa: F841
 
+def get_benchmark_variant(variant_name: str, tmp_dir: Path, benchmark_command: List[str], env_vars: Optional[Dict[str, str]] = None) -> RunVariant:
+    """returns the variant that runs benchmark_command in the build directories of the workers of tmp_dir, for the interleaved mode
+    """
+    worker_dir = get_worker_dir(tmp_dir)
+    file_name_prefix = f'bench_{variant_name.replace("/", "_")}'
+    return RunVariant(variant_name, benchmark_command, worker_dir / 'build', worker_dir / f'{file_name_prefix}_stdout.txt', worker_dir / f'{file_name_prefix}_stderr.txt', env_vars)
+
+
+def benchmark_cmake_app_workers(tmp_dir: Path, num_cores: int, benchmark_command: List[str], core_placer: Optional[ICorePlacer] = None, process_supervisor: str = 'threads', stop_condition: Optional[IStarBencherStopCondition] = None, env_vars: Optional[Dict[str, str]] = None, num_warmup_runs: int = 0, outlier_filter: Optional[IOutlierFilter] = None, variants: Optional[List[RunVariant]] = None, sampling_period: Optional[float] = None, sampling_max_overhead: float = 0.01, noise_monitor: Optional[ISystemNoiseMonitor] = None, contaminated_run_policy: str = 'keep', agents: Optional[List[AgentAddress]] = None, agent_token: Optional[AgentToken] = None, metric_extractor: Optional[IMetricExtractor] = None, log_policy: str = 'file', num_cores_per_run: int = 1, fast_launch: bool = False, num_iterations_per_run: int = 1, ctest_tests: bool = False, synchronized_start: bool = False, exclude_ramp_runs: bool = False) -> StarbenchResults:
+    """runs the benchmark command in the build directory of each of the num_cores workers (see build_cmake_app_workers)
+
+    variants: if not None, the workers alternate these variants run by run instead of running benchmark_command (see get_benchmark_variant)
+    noise_monitor: if not None, tags each run with the interferences detected while it was running
+    agents: if not None, the runs are launched by these agents (see RemoteRunSupervisor) instead of locally
+    agent_token: the secret shared with the agents, required with agents
+    metric_extractor: if not None, extracts application metrics from the output of each run
+    log_policy: what is done with the output of the runs (see create_log_policy)
+    num_cores_per_run: the number of cores used by each run (the workers then use num_cores * num_cores_per_run cores)
+    fast_launch: if True, the processes of the runs are created with vfork, and the output files of each worker are opened once (see CommandPerfEstimator)
+    num_iterations_per_run: the number of times the benchmark command is run back to back within each run
+    ctest_tests: if True, the benchmark command is a ctest command, and the duration of each of its tests is collected from the files that ctest leaves in the build directory (see CtestTestTimesCollector)
+    synchronized_start: if True, the first runs of all the workers are held at a start barrier, then released at once (see CommandPerfEstimator)
+    exclude_ramp_runs: if True, the runs that only partly overlapped with the runs of the other workers are left out of the statistics
+
+    see starbench_cmake_app for the meaning of the other arguments
+    """
+    worker_dir = get_worker_dir(tmp_dir)
+    build_dir = worker_dir / 'build'
     print(f'benchmarking {build_dir} ...')
-    stop_condition = StopAfterSingleRun()
+    Telemetry().set_phase('benchmark', build_dir=str(build_dir), command=benchmark_command, variants=[variant.name for variant in variants] if variants is not None else None)
+    if stop_condition is None:
+        stop_condition = StopAfterSingleRun()
+    if agents is not None:
+        if core_placer is not None:
+            raise StarBenchException('cpu placement is not supported when the runs are launched by agents')
+        if metric_extractor is not None or ctest_tests:
+            raise StarBenchException('metric extraction is not supported when the runs are launched by agents')
+        if log_policy != 'file':
+            raise StarBenchException('log policies other than file are not supported when the runs are launched by agents')
+        if num_iterations_per_run != 1:
+            raise StarBenchException('repeating the command within the runs is not supported when the runs are launched by agents')
+        if synchronized_start:
+            raise StarBenchException('the synchronized start is not supported when the runs are launched by agents')
+        if sampling_period is not None:
+            raise StarBenchException('sampling the process trees of the runs is not supported when the runs are launched by agents')
+        if noise_monitor is not None:
+            raise StarBenchException('monitoring the system noise is not supported when the runs are launched by agents')
+        if agent_token is None:
+            raise StarBenchException('the runs can only be launched by agents with their token')
+        supervisor = RemoteRunSupervisor(agents, agent_token)
+    else:
+        supervisor = create_run_supervisor(process_supervisor)
+    metric_extractors = [metric_extractor] if metric_extractor is not None else []
+    if ctest_tests:
+        metric_extractors.append(CtestTestTimesCollector(get_ctest_junit_report_path(benchmark_command)))
     bench = CommandPerfEstimator(
         run_command=benchmark_command,
-        num_cores_per_run=1,
+        num_cores_per_run=num_cores_per_run,
         num_parallel_runs=num_cores,
-        max_num_cores=num_cores,
+        max_num_cores=num_cores * num_cores_per_run,
         stop_condition=stop_condition,
         run_command_cwd=build_dir,
         stdout_filepath=worker_dir / 'bench_stdout.txt',
-        stderr_filepath=worker_dir / 'bench_stderr.txt')
+        stderr_filepath=worker_dir / 'bench_stderr.txt',
+        supervisor=supervisor,
+        core_placer=core_placer,
+        env_vars=env_vars,
+        num_warmup_runs=num_warmup_runs,
+        variants=variants,
+        sampler=ProcSampler(sampling_period, sampling_max_overhead) if sampling_period is not None else None,
+        noise_monitor=noise_monitor,
+        contaminated_run_policy=contaminated_run_policy,
+        metric_extractors=metric_extractors,
+        log_policy=create_log_policy(log_policy),
+        fast_launch=fast_launch,
+        num_iterations_per_run=num_iterations_per_run,
+        synchronized_start=synchronized_start,
+        exclude_ramp_runs=exclude_ramp_runs)
     starbench_results = bench.run()
-    print(f'duration : {starbench_results.get_average_duration():.3f} s' % ())
-    for run_id in starbench_results.durations.keys():
-        measurements.loc[len(measurements)] = {'run_id': f'{run_id}', 'duration': starbench_results.durations[run_id]}
-    measurements.to_csv(output_measurements_file_path, sep='\t')
+    starbench_results.outlier_filter = outlier_filter
+    if outlier_filter is not None:
+        print(f'{len(starbench_results.get_outlier_run_ids())} outlier run(s) are left out of the statistics')
+    if variants is None:
+        print(f'duration : {starbench_results.get_average_duration():.3f} s' % ())
+    return starbench_results
 
 
-def main():
-    '''main program'''
+def get_noise_file_path(measurements_file_path: Path) -> Path:
+    """returns the path of the file that stores the signals recorded by the noise monitor during the campaign of the given measurements file
+    """
+    return measurements_file_path.with_name(f'{measurements_file_path.stem}-noise.tsv')
 
-    example_output_dir = Path('/tmp/hibridon')
-    example_src_dir = example_output_dir / 'source.git'
-    example_password_provider = f'{{"type": "password-file", "password-file-path": "{os.getenv("HOME")}/.github/personal_access_tokens/bench.hibridon.cluster.ipr.univ-rennes1.fr.pat"}}'
-    example_source_tree_provider = f'{{"type": "git-cloner", "repos-url": "https://github.com/hibridon/hibridon", "src-dir": "{example_src_dir}", "code-version": "a3bed1c3ccfbca572003020d3e3d3b1ff3934fad", "git-user": "g-raffy", "password-provider": {example_password_provider}}}'
-    example_text = f'''example:
 
-    %(prog)s --source-tree-provider '{example_source_tree_provider}' --num-cores 2 --output-dir={example_output_dir} --cmake-path=/usr/bin/cmake --cmake-option=-DCMAKE_BUILD_TYPE=Release --cmake-option=-DBUILD_TESTING=ON --benchmark-command='ctest --output-on-failure -L ^arch4_quick$'
+def get_tests_file_path(measurements_file_path: Path) -> Path:
+    """returns the path of the file that stores the per-test statistics of the campaign of the given measurements file (see compute_test_stats_table)
+    """
+    return measurements_file_path.with_name(f'{measurements_file_path.stem}-tests.tsv')
 
-    '''
 
+def starbench_cmake_app(source_code_provider: IFileTreeProvider, output_measurements_file_path: Path, tmp_dir: Path, num_cores: int, benchmark_command: List[str], cmake_options: Optional[List[str]] = None, cmake_exe_location: Path = None, core_placer: Optional[ICorePlacer] = None, process_supervisor: str = 'threads', stop_condition: Optional[IStarBencherStopCondition] = None, build_cache: Optional[BuildCache] = None, build_once: bool = False, clone_method: str = 'auto', num_build_jobs: Optional[int] = None, cmake_generator: Optional[str] = None, use_ccache: bool = False, ccache_dir: Optional[Path] = None, env_vars: Optional[Dict[str, str]] = None, history: Optional[ResultsHistory] = None, campaign_metadata: Optional[Dict[str, Any]] = None, num_warmup_runs: int = 0, outlier_filter: Optional[IOutlierFilter] = None, interleaved_benchmark_command: Optional[List[str]] = None, sampling_period: Optional[float] = None, sampling_max_overhead: float = 0.01, monitor_noise: bool = False, max_foreign_load: float = 0.1, contaminated_run_policy: str = 'keep', agents: Optional[List[AgentAddress]] = None, agent_token: Optional[AgentToken] = None, metric_extractor: Optional[IMetricExtractor] = None, log_policy: str = 'file', fast_launch: bool = False, num_iterations_per_run: int = 1, phase_stop_conditions: Optional[Dict[str, IStarBencherStopCondition]] = None, rebuild_mode: str = 'clean', touched_files: Optional[List[Path]] = None, ctest_tests: bool = False, synchronized_start: bool = False, exclude_ramp_runs: bool = False) -> StarbenchResults:
+    """
+    tests_to_run : regular expression as understood by ctest's -L option. eg '^arch4_quick$'
+    core_placer : if not None, decides on which cores each benchmark worker is bound
+    process_supervisor : the backend used to launch and watch the processes of the runs ('threads' or 'event-loop')
+    stop_condition : decides when the benchmark runs stop (by default, each worker performs a single run)
+    build_cache : if not None, the configure and build steps are skipped when the cache already contains the same build
+    build_once : if True, a single reference build tree is built (using all cores), then cloned into each worker's build directory. Otherwise, each worker builds its own tree
+    clone_method : how the reference build tree is cloned into the workers' build directories when build_once is True ('copy', 'reflink' or 'auto', see BuildTreeCloner)
+    num_build_jobs : the number of parallel jobs of each build. None means num_cores when build_once is True, 1 otherwise (as each worker builds its own tree)
+    cmake_generator : the cmake generator to use (eg 'Ninja'). None means cmake's default generator
+    use_ccache : if True, the compilers are launched through ccache
+    ccache_dir : the cache directory shared by the ccache instances. None means ccache's default directory
+    env_vars : additional environment variables for the configure, build and benchmark commands (eg CC, CXX and FC to select a toolchain)
+    history : if not None, the measurements of this campaign are appended to this history
+    campaign_metadata : additional information stored with the campaign in the history
+    num_warmup_runs : the number of runs that each worker performs before the measured runs. They are recorded (with the 'warmup' phase) but left out of the statistics
+    outlier_filter : if not None, the runs that this filter considers as outliers are left out of the statistics
+    interleaved_benchmark_command : if not None, each worker alternates benchmark_command (variant A) and this command (variant B) run by run, for an A/B comparison that is immune to a slow drift of the machine state
+    sampling_period : if not None, the cpu time, threads, memory and i/o of the process tree of each benchmark run are sampled from /proc with this period (in seconds), and written to <output measurements file stem>-timelines.jsonl
+    sampling_max_overhead : the maximum fraction of a core that the sampling may use (the sampling period is lengthened if needed)
+    monitor_noise : if True, the system-wide activity is monitored during the benchmark runs, each run is tagged with the interferences detected while it was running (interferences column), and the monitored signals are written to <output measurements file stem>-noise.tsv
+    max_foreign_load : the cpu usage (in cores) of the processes outside the benchmark above which the runs are contaminated, when monitor_noise is True
+    contaminated_run_policy : what is done with the contaminated runs (see CONTAMINATED_RUN_POLICIES)
+    agents : if not None, the benchmark runs are launched by these agents (possibly on other nodes, see RunAgent), the num_cores workers being distributed over them in a round robin way. The builds are still performed locally, so the build directories need to be visible from the agents' nodes at the same path
+    agent_token : the secret shared with the agents (see RunAgent), required with agents
+    metric_extractor : if not None, extracts application metrics from the output of each benchmark run while it's running. They are written to the metric_<metric name> columns of the measurements file
+    log_policy : what is done with the standard output and error of the benchmark runs: file (each worker overwrites its bench_stdout.txt and bench_stderr.txt at each run), discard, ring[:<size in KiB>] (only the end of the output of the failed runs is written) or gzip[:<compression level>] (one compressed file per run), see create_log_policy
+    fast_launch : if True, the processes of the benchmark runs are created with vfork instead of fork, and the output files of each worker are opened once for all its runs (they then accumulate the output of all the runs)
+    num_iterations_per_run : if greater than 1, each benchmark run executes the benchmark command this number of times back to back, which amortizes the cost of launching a run for very short commands. The duration of each iteration is written to the iteration_durations column, their mean to the metric_iteration_duration column and the rest of the run duration to the metric_launch_overhead column
+    phase_stop_conditions : the stop condition of each build phase ('configure', 'build') that is benchmarked in its own right (eg to measure the effect of a compiler upgrade on the compile time). Each worker repeats these phases until their stop condition is met, and all their runs are written to the measurements file (with their resource usage) next to the benchmark runs. The other phases are run once by each worker
+    rebuild_mode : what is done between two runs of a repeated build phase: clean (each run starts from scratch), incremental (touched_files are touched before each build) or noop (nothing, which measures an up-to-date build), see get_between_builds_command
+    touched_files : the files of the source tree (relative to its root) that are touched before each build in the incremental rebuild mode
+    ctest_tests : if True, the benchmark command is a ctest command, and the duration of each of its tests is collected at each run (from the junit report if the command has --output-junit, from Testing/Temporary/LastTest.log otherwise). They are written to the metric_ctest_test_time.<test name> columns of the measurements file, and their statistics over all the runs of all the workers to <output measurements file stem>-tests.tsv. Use StopWhenTestsConverged as stop condition to stop on the precision of each test
+    synchronized_start : if True, the processes of the first benchmark runs of all the workers are created first and held at a start barrier, then released at once, so that the campaign starts with all the workers busy. The start skew of the first run of each worker is written to the start_skew column of the measurements file (with several workers, whatever this mode), and the runs that only partly overlapped with the runs of the other workers are flagged in the is_ramp column
+    exclude_ramp_runs : if True, the runs that only partly overlapped with the runs of the other workers (at the start and at the end of the campaign) are left out of the statistics
+    """
+    start_time = datetime.now()
+    measurements = MeasurementsTable()
+    src_dir = source_code_provider.get_source_tree_path()
+    build_results = build_cmake_app_workers(src_dir, tmp_dir, num_cores, cmake_options, cmake_exe_location, process_supervisor, build_cache, build_once, clone_method, num_build_jobs, cmake_generator, use_ccache, ccache_dir, env_vars, phase_stop_conditions, rebuild_mode, touched_files)
+    for phase, results in build_results.items():
+        measurements.add_results(phase, results)
+    build_end_time = datetime.now()
+    variants = None
+    if interleaved_benchmark_command is not None:
+        variants = [get_benchmark_variant('A', tmp_dir, benchmark_command), get_benchmark_variant('B', tmp_dir, interleaved_benchmark_command)]
+    noise_monitor = SystemNoiseMonitor(max_foreign_load=max_foreign_load) if monitor_noise else None
+    starbench_results = benchmark_cmake_app_workers(tmp_dir, num_cores, benchmark_command, core_placer, process_supervisor, stop_condition, env_vars, num_warmup_runs, outlier_filter, variants, sampling_period, sampling_max_overhead, noise_monitor, contaminated_run_policy, agents, agent_token, metric_extractor, log_policy, fast_launch=fast_launch, num_iterations_per_run=num_iterations_per_run, ctest_tests=ctest_tests, synchronized_start=synchronized_start, exclude_ramp_runs=exclude_ramp_runs)
+    measurements.add_results('benchmark', starbench_results)
+    measurements.write_tsv(output_measurements_file_path)
+    if ctest_tests:
+        test_stats = compute_test_stats_table(starbench_results)
+        test_stats.write_tsv(get_tests_file_path(output_measurements_file_path))
+        print(format_test_stats_table(test_stats))
+    if noise_monitor is not None:
+        noise_monitor.get_samples_table().write_tsv(get_noise_file_path(output_measurements_file_path))
+    if sampling_period is not None:
+        write_timelines(starbench_results.timelines, get_timelines_file_path(output_measurements_file_path))
+    if history is not None and variants is not None:
+        # one campaign per variant, so that each one is recorded with its own benchmark command
+        commit = get_source_tree_commit(src_dir)
+        build_measurements = MeasurementsTable()
+        for phase, results in build_results.items():
+            build_measurements.add_results(phase, results)
+        history.add_campaign(build_measurements, CampaignInfo(commit, cmake_options or [], None, num_cores, 1, start_time, build_end_time, metadata=campaign_metadata))
+        for variant in variants:
+            variant_measurements = MeasurementsTable()
+            variant_measurements.add_results('benchmark', starbench_results.get_variant_results(variant.name))
+            history.add_campaign(variant_measurements, CampaignInfo(commit, cmake_options or [], variant.run_command, num_cores, 1, build_end_time, datetime.now(), metadata={**(campaign_metadata or {}), 'variant': variant.name}))
+    elif history is not None:
+        history.add_campaign(measurements, CampaignInfo(get_source_tree_commit(src_dir), cmake_options or [], benchmark_command, num_cores, 1, start_time, datetime.now(), metadata=campaign_metadata))
+    return starbench_results
+
+
+def starbench_cmake_app_matrix(source_code_provider: IFileTreeProvider, matrix: CampaignMatrix, output_measurements_file_path: Path, tmp_dir: Path, num_cores: int, **cmake_app_kwargs) -> Dict[Tuple[str, str, str], StarbenchResults]:
+    """benchmarks each combination of the axes of the given matrix
+
+    the source tree is populated once and shared by all the variants. All the build variants are built first (one build directory per build variant), then each benchmark command is run on each build variant, one campaign at a time (or all build variants interleaved run by run if the matrix is interleaved), so that the benchmark measurements are never disturbed by builds or by other benchmarks
+    cmake_app_kwargs: the other arguments of starbench_cmake_app, common to all variants
+
+    returns the benchmark results of each (cmake options, toolchain, benchmark command) variant
+    """
+    history = cmake_app_kwargs.get('history')
+    build_kwargs = {arg_name: cmake_app_kwargs[arg_name] for arg_name in ['cmake_exe_location', 'process_supervisor', 'build_cache', 'build_once', 'clone_method', 'num_build_jobs', 'cmake_generator', 'use_ccache', 'ccache_dir', 'phase_stop_conditions', 'rebuild_mode', 'touched_files'] if arg_name in cmake_app_kwargs}
+    benchmark_kwargs = {arg_name: cmake_app_kwargs[arg_name] for arg_name in ['core_placer', 'process_supervisor', 'stop_condition', 'num_warmup_runs', 'outlier_filter', 'sampling_period', 'sampling_max_overhead', 'contaminated_run_policy', 'agents', 'agent_token', 'metric_extractor', 'log_policy', 'fast_launch', 'num_iterations_per_run', 'ctest_tests', 'synchronized_start', 'exclude_ramp_runs'] if arg_name in cmake_app_kwargs}
+    common_cmake_options = cmake_app_kwargs.get('cmake_options') or []
+    src_dir = source_code_provider.get_source_tree_path()
+    measurements = MeasurementsTable(['cmake_options', 'toolchain', 'benchmark_command'] + MeasurementsTable.DEFAULT_COLUMNS)
+    timelines_file_path = get_timelines_file_path(output_measurements_file_path)
+    if cmake_app_kwargs.get('sampling_period') is not None:
+        timelines_file_path.unlink(missing_ok=True)
+    noise_samples = MeasurementsTable(['cmake_options', 'toolchain', 'benchmark_command'])
+    test_stats = MeasurementsTable(['cmake_options', 'toolchain', 'benchmark_command'])
+
+    def create_noise_monitor() -> Optional[ISystemNoiseMonitor]:
+        if not cmake_app_kwargs.get('monitor_noise', False):
+            return None
+        return SystemNoiseMonitor(max_foreign_load=cmake_app_kwargs.get('max_foreign_load', 0.1))
+
+    def add_noise_samples(noise_monitor: Optional[ISystemNoiseMonitor], variant: Dict[str, str]):
+        if noise_monitor is not None:
+            variant_noise_samples = noise_monitor.get_samples_table()
+            for row in variant_noise_samples.rows:
+                row.update(variant)
+            noise_samples.extend(variant_noise_samples)
+
+    def add_variant_measurements(variant: Dict[str, str], phase_results: Dict[str, StarbenchResults], cmake_options: List[str], benchmark_command: Optional[List[str]], start_time: datetime):
+        variant_measurements = MeasurementsTable()
+        for phase, results in phase_results.items():
+            variant_measurements.add_results(phase, results, metadata=variant)
+        measurements.extend(variant_measurements)
+        if 'benchmark' in phase_results and cmake_app_kwargs.get('ctest_tests', False):
+            variant_test_stats = compute_test_stats_table(phase_results['benchmark'])
+            for row in variant_test_stats.rows:
+                row.pop('variant', None)  # the name of an interleaved variant, already given by the variant columns
+                row.update(variant)
+            variant_test_stats.columns = [column for column in variant_test_stats.columns if column != 'variant']
+            test_stats.extend(variant_test_stats)
+        if 'benchmark' in phase_results and cmake_app_kwargs.get('sampling_period') is not None:
+            write_timelines(phase_results['benchmark'].timelines, timelines_file_path, metadata=variant, append=True)
+        if history is not None:
+            history.add_campaign(variant_measurements, CampaignInfo(get_source_tree_commit(src_dir), cmake_options, benchmark_command, num_cores, 1, start_time, datetime.now(), metadata=variant))
+
+    build_variants = matrix.get_build_variants()
+    for cmake_options_name, toolchain_name in build_variants:
+        print(f'building variant {cmake_options_name}/{toolchain_name} ...')
+        start_time = datetime.now()
+        cmake_options = common_cmake_options + matrix.cmake_options[cmake_options_name]
+        build_results = build_cmake_app_workers(src_dir, tmp_dir / cmake_options_name / toolchain_name, num_cores, cmake_options=cmake_options, env_vars=matrix.toolchains[toolchain_name], **build_kwargs)
+        add_variant_measurements({'cmake_options': cmake_options_name, 'toolchain': toolchain_name, 'benchmark_command': None}, build_results, cmake_options, None, start_time)
+
+    all_results = {}
+    if matrix.interleaved:
+        # the build variants are alternated run by run on the same workers, for each benchmark command
+        for benchmark_command_name, benchmark_command in matrix.benchmark_commands.items():
+            print(f'benchmarking the build variants interleaved with {benchmark_command_name} ...')
+            start_time = datetime.now()
+            variants = [get_benchmark_variant(f'{cmake_options_name}/{toolchain_name}', tmp_dir / cmake_options_name / toolchain_name, benchmark_command, matrix.toolchains[toolchain_name]) for cmake_options_name, toolchain_name in build_variants]
+            noise_monitor = create_noise_monitor()
+            interleaved_results = benchmark_cmake_app_workers(tmp_dir, num_cores, benchmark_command, variants=variants, noise_monitor=noise_monitor, **benchmark_kwargs)
+            add_noise_samples(noise_monitor, {'cmake_options': None, 'toolchain': None, 'benchmark_command': benchmark_command_name})
+            for cmake_options_name, toolchain_name in build_variants:
+                results = interleaved_results.get_variant_results(f'{cmake_options_name}/{toolchain_name}')
+                add_variant_measurements({'cmake_options': cmake_options_name, 'toolchain': toolchain_name, 'benchmark_command': benchmark_command_name}, {'benchmark': results}, common_cmake_options + matrix.cmake_options[cmake_options_name], benchmark_command, start_time)
+                all_results[(cmake_options_name, toolchain_name, benchmark_command_name)] = results
+    else:
+        for cmake_options_name, toolchain_name in build_variants:
+            for benchmark_command_name, benchmark_command in matrix.benchmark_commands.items():
+                print(f'benchmarking variant {cmake_options_name}/{toolchain_name}/{benchmark_command_name} ...')
+                start_time = datetime.now()
+                variant = {'cmake_options': cmake_options_name, 'toolchain': toolchain_name, 'benchmark_command': benchmark_command_name}
+                noise_monitor = create_noise_monitor()
+                results = benchmark_cmake_app_workers(tmp_dir / cmake_options_name / toolchain_name, num_cores, benchmark_command, env_vars=matrix.toolchains[toolchain_name], noise_monitor=noise_monitor, **benchmark_kwargs)
+                add_noise_samples(noise_monitor, variant)
+                add_variant_measurements(variant, {'benchmark': results}, common_cmake_options + matrix.cmake_options[cmake_options_name], benchmark_command, start_time)
+                all_results[(cmake_options_name, toolchain_name, benchmark_command_name)] = results
+    measurements.write_tsv(output_measurements_file_path)
+    if cmake_app_kwargs.get('monitor_noise', False):
+        noise_samples.write_tsv(get_noise_file_path(output_measurements_file_path))
+    if cmake_app_kwargs.get('ctest_tests', False):
+        test_stats.write_tsv(get_tests_file_path(output_measurements_file_path))
+    return all_results
+
+
+def get_scaling_file_path(measurements_file_path: Path) -> Path:
+    """returns the path of the file that stores the scaling table of the scaling campaign of the given measurements file
+    """
+    return measurements_file_path.with_name(f'{measurements_file_path.stem}-scaling.tsv')
+
+
+def starbench_cmake_app_scaling(source_code_provider: IFileTreeProvider, output_measurements_file_path: Path, tmp_dir: Path, num_cores: int, benchmark_command: List[str], cores_per_run: Optional[List[int]] = None, worker_counts: Optional[List[int]] = None, **cmake_app_kwargs) -> MeasurementsTable:
+    """measures how the benchmark scales when more and more cores are loaded: the same build is benchmarked with an increasing number of parallel runs (see get_scaling_points), one campaign per point
+
+    the measurements of all points are written to output_measurements_file_path (with num_parallel_runs and num_cores_per_run columns), and the scaling table (see compute_scaling_table) to <output measurements file stem>-scaling.tsv. The timelines, noise samples and per-test statistics (if requested) of all points are written next to it with the same columns, and each point is recorded as its own campaign in the history
+    num_cores: the maximum number of cores used by a point
+    cmake_app_kwargs: the other arguments of starbench_cmake_app, common to all points
+
+    returns the scaling table
+    """
+    if cmake_app_kwargs.get('interleaved_benchmark_command') is not None:
+        raise StarBenchException('interleaved benchmark commands are not supported by scaling campaigns')
+    history = cmake_app_kwargs.get('history')
+    campaign_metadata = cmake_app_kwargs.get('campaign_metadata') or {}
+    build_kwargs = {arg_name: cmake_app_kwargs[arg_name] for arg_name in ['cmake_options', 'cmake_exe_location', 'process_supervisor', 'build_cache', 'build_once', 'clone_method', 'num_build_jobs', 'cmake_generator', 'use_ccache', 'ccache_dir', 'env_vars', 'phase_stop_conditions', 'rebuild_mode', 'touched_files'] if arg_name in cmake_app_kwargs}
+    benchmark_kwargs = {arg_name: cmake_app_kwargs[arg_name] for arg_name in ['core_placer', 'process_supervisor', 'stop_condition', 'env_vars', 'num_warmup_runs', 'outlier_filter', 'sampling_period', 'sampling_max_overhead', 'contaminated_run_policy', 'agents', 'agent_token', 'metric_extractor', 'log_policy', 'fast_launch', 'num_iterations_per_run', 'ctest_tests', 'synchronized_start', 'exclude_ramp_runs'] if arg_name in cmake_app_kwargs}
+    cmake_options = cmake_app_kwargs.get('cmake_options') or []
+    points = get_scaling_points(num_cores, cores_per_run, worker_counts)
+    src_dir = source_code_provider.get_source_tree_path()
+    measurements = MeasurementsTable(['num_parallel_runs', 'num_cores_per_run'] + MeasurementsTable.DEFAULT_COLUMNS)
+    timelines_file_path = get_timelines_file_path(output_measurements_file_path)
+    if cmake_app_kwargs.get('sampling_period') is not None:
+        timelines_file_path.unlink(missing_ok=True)
+    noise_samples = MeasurementsTable(['num_parallel_runs', 'num_cores_per_run'])
+    test_stats = MeasurementsTable(['num_parallel_runs', 'num_cores_per_run'])
+    # the workers of all points share the build directories of the point with the most workers
+    start_time = datetime.now()
+    build_results = build_cmake_app_workers(src_dir, tmp_dir, max(num_workers for num_workers, _num_cores_per_run in points), **build_kwargs)
+    build_measurements = MeasurementsTable()
+    for phase, results in build_results.items():
+        build_measurements.add_results(phase, results, metadata={'num_parallel_runs': None, 'num_cores_per_run': None})
+    measurements.extend(build_measurements)
+    if history is not None:
+        history.add_campaign(build_measurements, CampaignInfo(get_source_tree_commit(src_dir), cmake_options, None, num_cores, 1, start_time, datetime.now(), metadata=campaign_metadata))
+    points_results = {}
+    for num_workers, num_cores_per_run in points:
+        print(f'benchmarking {num_workers} parallel runs of {num_cores_per_run} cores ...')
+        start_time = datetime.now()
+        point = {'num_parallel_runs': num_workers, 'num_cores_per_run': num_cores_per_run}
+        noise_monitor = SystemNoiseMonitor(max_foreign_load=cmake_app_kwargs.get('max_foreign_load', 0.1)) if cmake_app_kwargs.get('monitor_noise', False) else None
+        results = benchmark_cmake_app_workers(tmp_dir, num_workers, benchmark_command, num_cores_per_run=num_cores_per_run, noise_monitor=noise_monitor, **benchmark_kwargs)
+        point_measurements = MeasurementsTable()
+        point_measurements.add_results('benchmark', results, metadata=point)
+        measurements.extend(point_measurements)
+        for point_table, table in [(noise_monitor.get_samples_table() if noise_monitor is not None else None, noise_samples), (compute_test_stats_table(results) if cmake_app_kwargs.get('ctest_tests', False) else None, test_stats)]:
+            if point_table is not None:
+                for row in point_table.rows:
+                    row.update(point)
+                table.extend(point_table)
+        if cmake_app_kwargs.get('sampling_period') is not None:
+            write_timelines(results.timelines, timelines_file_path, metadata=point, append=True)
+        if history is not None:
+            history.add_campaign(point_measurements, CampaignInfo(get_source_tree_commit(src_dir), cmake_options, benchmark_command, num_workers * num_cores_per_run, num_cores_per_run, start_time, datetime.now(), metadata={**campaign_metadata, **point}))
+        points_results[(num_workers, num_cores_per_run)] = results
+    measurements.write_tsv(output_measurements_file_path)
+    if cmake_app_kwargs.get('monitor_noise', False):
+        noise_samples.write_tsv(get_noise_file_path(output_measurements_file_path))
+    if cmake_app_kwargs.get('ctest_tests', False):
+        test_stats.write_tsv(get_tests_file_path(output_measurements_file_path))
+    scaling_table = compute_scaling_table(points_results)
+    scaling_table.write_tsv(get_scaling_file_path(output_measurements_file_path))
+    print(format_scaling_table(scaling_table))
+    return scaling_table
+
+
+def create_source_tree_provider(source_tree_provider_json: str) -> IFileTreeProvider:
+    """creates the source tree provider described by the given json string
+    """
     pass_prov_fac = PasswordProviderFactory()
     pass_prov_fac.register_password_provider_creator(LocalFilePPCreator())
 
@@ -104,14 +547,322 @@ def main():
     tree_creator_factory.register_tree_creator_creator(GitClonerCreator())
     tree_creator_factory.register_tree_creator_creator(ExistingDirCreator())
 
-    parser = argparse.ArgumentParser(description='performs a benchmark on a cmake buildable app hosted on a git repository', epilog=example_text, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source_tree_provider_params = json.loads(source_tree_provider_json)
+
+    return tree_creator_factory.create_tree_creator(source_tree_provider_params['type'], source_tree_provider_params)
+
+
+def add_cmake_app_arguments(parser: argparse.ArgumentParser, benchmark_command_is_required: bool = True):
+    """adds the command line arguments that control the build and the benchmark of a cmake app (see get_cmake_app_kwargs)
+    """
     parser.add_argument('--source-tree-provider', type=str, required=True, help='the method to use to populate the source tree, in the form of a json string.')
     parser.add_argument('--num-cores', type=int, required=True, help='the number of cores that the benchmark will use')
     parser.add_argument('--output-dir', type=Path, required=True, help='where the output files will be placed')
     parser.add_argument('--cmake-path', type=Path, help='the path to the cmake executable to use in case a specific cmake is wanted')
     parser.add_argument('--cmake-option', type=str, action='append', help='additional option passed to cmake in the configure step (use this flag multiple times if you need more than one cmake option)')
-    parser.add_argument('--benchmark-command', required=True, type=str, help='the command to benchmark')
+    parser.add_argument('--benchmark-command', required=benchmark_command_is_required, type=str, help='the command to benchmark')
+    parser.add_argument('--process-supervisor', type=str, choices=['threads', 'event-loop'], default='threads', help='how the processes of the runs are launched and watched: threads (one thread per run) or event-loop (a single thread watching all processes, which minimizes the delay between the end of a run and the start of the next one)')
+    parser.add_argument('--target-relative-ci', type=float, help='if set, benchmark runs are repeated until the confidence interval of the mean duration is narrower than this fraction of the mean duration (eg 0.01 for +/- 1 %%). By default, each worker performs a single run')
+    parser.add_argument('--confidence', type=float, default=0.95, help='the confidence level of the confidence interval used by --target-relative-ci')
+    parser.add_argument('--min-num-runs', type=int, default=5, help='the minimum number of benchmark runs when --target-relative-ci is used')
+    parser.add_argument('--max-num-runs', type=int, help='the maximum number of benchmark runs when --target-relative-ci is used')
+    parser.add_argument('--time-budget', type=float, help='the time (in seconds) after which no new benchmark run is started when --target-relative-ci is used')
+    parser.add_argument('--build-cache-dir', type=Path, help='if set, the builds are cached in this directory, and the configure and build steps are skipped when the same source tree has already been built with the same options and compilers')
+    parser.add_argument('--build-cache-max-size', type=str, default='10G', help='the maximum size of the build cache (eg 500M, 10G). The least recently used builds are evicted beyond this size')
+    parser.add_argument('--build-once', action='store_true', help='build a single reference tree using all cores, then clone it into the build directory of each worker, instead of building one tree per worker')
+    parser.add_argument('--clone-method', type=str, choices=CLONE_METHODS, default='auto', help='how the reference build tree is cloned into the workers build directories with --build-once: copy (real copies), reflink (copy on write clones if supported by the filesystem, copies otherwise) or auto (copy on write clones if supported, otherwise hard links for build artifacts and copies for other files)')
+    parser.add_argument('--num-build-jobs', type=int, help='the number of parallel jobs of each build (cmake --build --parallel). By default, --num-cores with --build-once, 1 otherwise (each worker builds its own tree)')
+    parser.add_argument('--cmake-generator', type=str, help='the cmake generator to use (eg Ninja)')
+    parser.add_argument('--use-ccache', action='store_true', help='launch the compilers through ccache')
+    parser.add_argument('--ccache-dir', type=Path, help='the cache directory shared by the ccache instances when --use-ccache is used')
+    parser.add_argument('--configure-runs', type=int, default=1, help='the number of measured runs of the configure phase (over all workers). Above 1, the configure phase is benchmarked in its own right, according to --rebuild-mode')
+    parser.add_argument('--build-runs', type=int, default=1, help='the number of measured runs of the build phase (over all workers). Above 1, the build phase is benchmarked in its own right, according to --rebuild-mode')
+    parser.add_argument('--rebuild-mode', type=str, choices=REBUILD_MODES, default='clean', help='what is done between two runs of the configure or build phase with --configure-runs or --build-runs: clean (each run starts from scratch), incremental (the --touched-file files are touched before each build) or noop (nothing, which measures how long the build system takes to find out that everything is up to date)')
+    parser.add_argument('--touched-file', type=Path, action='append', help='a file of the source tree (relative to its root) that is touched before each build with --rebuild-mode incremental (use this flag multiple times if you need more than one file)')
+    parser.add_argument('--warmup-runs', type=int, default=0, help='the number of runs that each worker performs before the measured runs. They are recorded but left out of the statistics')
+    parser.add_argument('--outlier-filter', type=str, help='leaves the outlier runs out of the statistics: mad (modified z-score based on the median absolute deviation, above 3.5 by default, eg mad:3.0) or iqr (tukey\'s fences, 1.5 interquartile ranges by default, eg iqr:3)')
+    parser.add_argument('--sampling-period', type=float, help='if set, the cpu time, threads, memory and i/o of the process tree of each benchmark run are sampled from /proc with this period (in seconds), and written to a json lines file next to the measurements file')
+    parser.add_argument('--sampling-max-overhead', type=float, default=0.01, help='the maximum fraction of a core that the sampling may use with --sampling-period. The sampling period is lengthened if a sampling sweep costs more')
+    parser.add_argument('--monitor-noise', action='store_true', help='monitor the system-wide activity during the benchmark runs (load of the processes outside the benchmark, cpu frequency and thermal throttling, memory pressure, steal time), and tag each run with the interferences detected while it was running')
+    parser.add_argument('--max-foreign-load', type=float, default=0.1, help='the cpu usage (in cores) of the processes outside the benchmark above which a run is contaminated, with --monitor-noise')
+    parser.add_argument('--contaminated-runs', type=str, choices=CONTAMINATED_RUN_POLICIES, default='keep', help='what is done with the runs during which --monitor-noise detected an interference: keep (flagged only), exclude (left out of the statistics) or requeue (left out of the statistics and replaced by another run)')
+    parser.add_argument('--agents', type=str, help='if set, the benchmark runs are launched by these starbench agents (started with starbench agent on each node) instead of locally, in the form <host>:<port>,<host>:<port>,... --num-cores is then the total number of workers, distributed over the agents in a round robin way')
+    parser.add_argument('--agent-token-file', type=Path, help='the file containing the secret shared with the agents (the --token-file of starbench agent), required with --agents')
+    parser.add_argument('--metric-extractor', type=str, action='append', help=f'extracts a metric from the output of the benchmark runs, while they are running: either a known pattern ({", ".join(NAMED_PATTERNS.keys())}) or <metric name>=<regular expression> whose first group is the value (use this flag multiple times if you need more than one metric)')
+    parser.add_argument('--ctest-tests', action='store_true', help='the benchmark command is a ctest command: the duration of each of its tests is collected at each run (from its junit report if it has --output-junit, from the ctest log of the build directory otherwise), and their statistics are written to a -tests.tsv file next to the measurements file. With --target-relative-ci, the runs are repeated until the mean duration of each test is precise enough')
+    parser.add_argument('--keep-converged-tests', action='store_true', help='with --ctest-tests and --target-relative-ci, keep running the tests whose mean duration is already precise enough. By default, they are left out of the next runs (with ctest -E), so that the noisy tests get more runs than the stable ones')
+    parser.add_argument('--log-policy', type=str, default='file', help='what is done with the standard output and error of the benchmark runs: file (each worker overwrites its output files at each run), discard, ring[:<size in KiB>] (the end of the output is kept in memory and only written, to a per-run file, if the run fails; 64 KiB by default) or gzip[:<compression level>] (the output of each run is compressed to its own file by a writer thread running on the cores not used by the workers)')
+    parser.add_argument('--fast-launch', action='store_true', help='create the processes of the benchmark runs with vfork instead of fork (the cpu binding is inherited from the launching thread), and open the output files of each worker once for all its runs, which lowers the cost of launching a run for short commands')
+    parser.add_argument('--synchronized-start', action='store_true', help='create the processes of the first benchmark runs of all the workers first, hold them at a start barrier, then release them at once, so that the campaign starts with all the workers busy (the start skew of the workers is written to the start_skew column of the measurements file)')
+    parser.add_argument('--exclude-ramp-runs', action='store_true', help='leave out of the statistics the benchmark runs that only partly overlapped with the runs of the other workers, at the start and at the end of the campaign (flagged in the is_ramp column of the measurements file)')
+    parser.add_argument('--iterations-per-run', type=int, default=1, help='the number of times the benchmark command is run back to back within each benchmark run, so that the cost of launching a run is amortized over several iterations and measured separately (metric_iteration_duration and metric_launch_overhead columns)')
+    parser.add_argument('--target-metric', type=str, help='if set, --target-relative-ci applies to the mean of this metric (extracted with --metric-extractor) instead of the mean duration')
+    parser.add_argument('--history-db', type=Path, help='if set, the measurements of each campaign are appended, along with the description of the campaign (commit, cmake options, host, etc.), to this sqlite database')
+    parser.add_argument('--telemetry-file', type=Path, help='if set, the events of the campaigns (phase changes, runs started and finished, running statistics, stop decisions) are written to this file as they happen, one json object per line')
+    parser.add_argument('--telemetry-port', type=int, help='if set, the progress of the campaigns (runs done, running mean and confidence interval, per-worker throughput) is exposed in the prometheus text format on http://<telemetry host>:<telemetry port>/metrics')
+    parser.add_argument('--telemetry-host', type=str, default='127.0.0.1', help='the address the --telemetry-port endpoint listens on')
+    parser.add_argument('--cpu-placement', type=str, help='binds each benchmark worker to its own cores: packed (consecutive cores), spread (workers distributed across numa nodes) or map:<cpulist>/<cpulist>/... (explicit core list for each worker, eg map:0-3/8-11)')
+
+
+def setup_telemetry(args: argparse.Namespace):
+    """registers the telemetry sinks requested by the command line arguments added by add_cmake_app_arguments
+    """
+    telemetry = Telemetry()
+    if args.telemetry_file:
+        telemetry.add_sink(JsonLinesTelemetrySink(args.telemetry_file))
+    if args.telemetry_port is not None:
+        prometheus_sink = PrometheusTelemetrySink(args.telemetry_host, args.telemetry_port)
+        prometheus_sink.start()
+        host, port = prometheus_sink.get_address()
+        print(f'telemetry endpoint : http://{host}:{port}/metrics')
+        telemetry.add_sink(prometheus_sink)
+
+
+def get_cmake_app_kwargs(args: argparse.Namespace) -> Dict[str, Any]:
+    """returns the arguments of starbench_cmake_app (except the source tree provider and the output measurements file) from the command line arguments added by add_cmake_app_arguments
+
+    the telemetry sinks requested by the arguments are registered as a side effect
+    """
+    if args.agents and not args.agent_token_file:
+        raise StarBenchException('--agents requires --agent-token-file')
+    setup_telemetry(args)
+    stop_condition = None
+    if args.target_relative_ci is not None and args.ctest_tests and args.target_metric is None:
+        stop_condition = StopWhenTestsConverged(max_relative_half_width=args.target_relative_ci, confidence=args.confidence, min_num_runs=args.min_num_runs, max_num_runs=args.max_num_runs, max_duration=args.time_budget, skip_converged_tests=not args.keep_converged_tests)
+    elif args.target_relative_ci is not None:
+        stop_condition = StopOnRelativeConfidenceInterval(max_relative_half_width=args.target_relative_ci, confidence=args.confidence, min_num_runs=args.min_num_runs, max_num_runs=args.max_num_runs, max_duration=args.time_budget, metric=args.target_metric)
+
+    build_cache = None
+    if args.build_cache_dir:
+        build_cache = BuildCache(args.build_cache_dir, parse_size(args.build_cache_max_size))
+
+    core_placer = None
+    if args.cpu_placement:
+        core_placer = create_core_placer(args.cpu_placement)
+
+    outlier_filter = None
+    if args.outlier_filter:
+        outlier_filter = create_outlier_filter(args.outlier_filter)
+
+    history = None
+    if args.history_db:
+        history = ResultsHistory(args.history_db)
+
+    phase_stop_conditions = {}
+    for phase, num_runs in [('configure', args.configure_runs), ('build', args.build_runs)]:
+        if num_runs > 1:
+            phase_stop_conditions[phase] = StopAfterFixedNumRuns(num_runs)
+
+    return {
+        'tmp_dir': args.output_dir,
+        'num_cores': args.num_cores,
+        'cmake_options': args.cmake_option,
+        'benchmark_command': args.benchmark_command.split(' ') if args.benchmark_command is not None else None,
+        'cmake_exe_location': args.cmake_path,
+        'core_placer': core_placer,
+        'process_supervisor': args.process_supervisor,
+        'stop_condition': stop_condition,
+        'build_cache': build_cache,
+        'build_once': args.build_once,
+        'clone_method': args.clone_method,
+        'num_build_jobs': args.num_build_jobs,
+        'cmake_generator': args.cmake_generator,
+        'use_ccache': args.use_ccache,
+        'ccache_dir': args.ccache_dir,
+        'history': history,
+        'num_warmup_runs': args.warmup_runs,
+        'outlier_filter': outlier_filter,
+        'sampling_period': args.sampling_period,
+        'sampling_max_overhead': args.sampling_max_overhead,
+        'monitor_noise': args.monitor_noise,
+        'max_foreign_load': args.max_foreign_load,
+        'contaminated_run_policy': args.contaminated_runs,
+        'agents': [parse_agent_address(agent) for agent in args.agents.split(',')] if args.agents else None,
+        'agent_token': read_agent_token(args.agent_token_file) if args.agent_token_file else None,
+        'metric_extractor': create_metric_extractor(args.metric_extractor) if args.metric_extractor else None,
+        'log_policy': args.log_policy,
+        'fast_launch': args.fast_launch,
+        'num_iterations_per_run': args.iterations_per_run,
+        'phase_stop_conditions': phase_stop_conditions,
+        'rebuild_mode': args.rebuild_mode,
+        'touched_files': args.touched_file,
+        'ctest_tests': args.ctest_tests,
+        'synchronized_start': args.synchronized_start,
+        'exclude_ramp_runs': args.exclude_ramp_runs}
+
+
+def get_git_cloner(source_tree_provider: IFileTreeProvider) -> GitCloner:
+    if not isinstance(source_tree_provider, GitCloner):
+        raise StarBenchException('this command requires a git-cloner source tree provider')
+    return source_tree_provider
+
+
+def get_commit_benchmarker(args: argparse.Namespace) -> CommitBenchmarker:
+    """creates the CommitBenchmarker described by the command line arguments added by add_cmake_app_arguments
+    """
+    git_cloner = get_git_cloner(create_source_tree_provider(args.source_tree_provider))
+    cmake_app_kwargs = get_cmake_app_kwargs(args)
+    if cmake_app_kwargs['stop_condition'] is None:
+        # a single run per worker is usually not enough to tell a slowdown from noise
+        cmake_app_kwargs['stop_condition'] = StopOnRelativeConfidenceInterval(max_relative_half_width=0.01, min_num_runs=10, max_num_runs=30)
+
+    def run_campaign(source_tree_provider: IFileTreeProvider, output_measurements_file_path: Path) -> StarbenchResults:
+        return starbench_cmake_app(source_tree_provider, output_measurements_file_path=output_measurements_file_path, **cmake_app_kwargs)
+    return CommitBenchmarker(git_cloner, run_campaign, args.output_dir / 'commits')
+
+
+def sweep_main(argv: List[str]):
+    '''benchmarks each commit of a commit range'''
+    parser = argparse.ArgumentParser(prog='starbench sweep', description='benchmarks each commit of a range of commits of a cmake buildable app hosted on a git repository, and writes one combined measurements table')
+    add_cmake_app_arguments(parser)
+    parser.add_argument('--first', type=str, required=True, help='the first commit of the range')
+    parser.add_argument('--last', type=str, required=True, help='the last commit of the range')
+    parser.add_argument('--output-measurements', type=Path, required=True, help='the path to the output tsv file containing the measurements table of all the commits (with a commit column)')
+    args = parser.parse_args(argv)
+    benchmarker = get_commit_benchmarker(args)
+    commits = benchmarker.git_cloner.list_commits(args.first, args.last)
+    sweep_commits(benchmarker, commits, args.output_measurements)
+
+
+def bisect_main(argv: List[str]):
+    '''finds the first commit that causes a slowdown'''
+    parser = argparse.ArgumentParser(prog='starbench bisect', description='finds the first commit of a cmake buildable app hosted on a git repository that causes a slowdown of the benchmark command')
+    add_cmake_app_arguments(parser)
+    parser.add_argument('--good', type=str, required=True, help='a commit that has the expected performance')
+    parser.add_argument('--bad', type=str, required=True, help='a later commit that is slower')
+    parser.add_argument('--slowdown-threshold', type=float, default=0.05, help='the relative increase of the median duration above which a commit is considered slow (eg 0.05 for 5 %%)')
+    parser.add_argument('--alpha', type=float, default=0.05, help='the significance level of the statistical test (one-sided mann-whitney u test)')
+    args = parser.parse_args(argv)
+    benchmarker = get_commit_benchmarker(args)
+    commits = benchmarker.git_cloner.list_commits(args.good, args.bad)
+    first_bad_commit = bisect_slowdown(benchmarker, commits, args.slowdown_threshold, args.alpha, args.output_dir / 'bisect.tsv')
+    if first_bad_commit is None:
+        raise StarBenchException(f'{args.bad} is not significantly slower than {args.good}')
+
+
+def matrix_main(argv: List[str]):
+    '''benchmarks each variant of a campaign matrix'''
+    parser = argparse.ArgumentParser(prog='starbench matrix', description='benchmarks a cmake buildable app for each combination of cmake options, toolchain and benchmark command described in a campaign matrix file, and writes one measurements table with a column for each axis')
+    add_cmake_app_arguments(parser, benchmark_command_is_required=False)
+    parser.add_argument('--matrix', type=Path, required=True, help='the path to the json file describing the axes of the campaign matrix (cmake-options, toolchains, benchmark-commands)')
+    parser.add_argument('--output-measurements', type=Path, required=True, help='the path to the output tsv file containing the measurements table of all the variants')
+    args = parser.parse_args(argv)
+    cmake_app_kwargs = get_cmake_app_kwargs(args)
+    matrix = CampaignMatrix.from_json_file(args.matrix, default_benchmark_command=cmake_app_kwargs.pop('benchmark_command'))
+    starbench_cmake_app_matrix(create_source_tree_provider(args.source_tree_provider), matrix, args.output_measurements, **cmake_app_kwargs)
+
+
+def scaling_main(argv: List[str]):
+    '''measures the scaling of a benchmark with the number of loaded cores'''
+    parser = argparse.ArgumentParser(prog='starbench scaling', description='benchmarks the same build of a cmake buildable app with an increasing number of parallel runs (1, 2, 4, ... up to --num-cores), and reports the slowdown of the runs, the aggregate throughput and the parallel efficiency of each point')
+    add_cmake_app_arguments(parser)
+    parser.add_argument('--worker-counts', type=str, help='the numbers of parallel runs to measure, comma separated (eg 1,2,3,4). By default, the powers of 2 up to the number of runs that fill --num-cores, and this number itself')
+    parser.add_argument('--cores-per-run', type=str, default='1', help='the numbers of cores used by each run, comma separated (eg 1,2,4 for one curve per split of the cores)')
+    parser.add_argument('--output-measurements', type=Path, required=True, help='the path to the output tsv file containing the measurements table of all the points (with num_parallel_runs and num_cores_per_run columns). The scaling table is written next to it')
+    args = parser.parse_args(argv)
+    worker_counts = parse_int_list(args.worker_counts) if args.worker_counts else None
+    starbench_cmake_app_scaling(create_source_tree_provider(args.source_tree_provider), args.output_measurements, cores_per_run=parse_int_list(args.cores_per_run), worker_counts=worker_counts, **get_cmake_app_kwargs(args))
+
+
+def compare_main(argv: List[str]) -> int:
+    '''compares a candidate measurement set with a baseline measurement set'''
+    parser = argparse.ArgumentParser(prog='starbench compare', description='compares the measurements of a candidate campaign with the measurements of a baseline campaign, and exits with a non-zero status if the candidate is significantly worse')
+    parser.add_argument('--baseline', type=Path, required=True, help='the measurements file of the baseline campaign')
+    parser.add_argument('--candidate', type=Path, required=True, help='the measurements file of the candidate campaign')
+    parser.add_argument('--slowdown-threshold', type=float, default=0.05, help='the relative worsening of the median above which a regression is reported (eg 0.05 for 5 %%)')
+    parser.add_argument('--alpha', type=float, default=0.05, help='the significance level of the statistical test (one-sided mann-whitney u test)')
+    parser.add_argument('--confidence', type=float, default=0.95, help='the confidence level of the bootstrap confidence interval of the relative change')
+    parser.add_argument('--metric', type=str, action='append', help='a column to compare (use this flag multiple times if you need more than one metric). By default, the duration and the metric_* columns are compared')
+    parser.add_argument('--higher-is-better', type=str, action='append', default=[], help='a metric for which a larger value is better (eg a throughput)')
+    parser.add_argument('--outlier-filter', type=str, help='leaves the outliers out of the comparison (mad, iqr, mad:<threshold> or iqr:<k>)')
+    parser.add_argument('--baseline-filter', type=str, action='append', default=[], help='only uses the baseline rows that have the given value in the given column, in the form <column>=<value> (eg variant=A to compare the variants of an interleaved campaign)')
+    parser.add_argument('--candidate-filter', type=str, action='append', default=[], help='only uses the candidate rows that have the given value in the given column, in the form <column>=<value> (eg variant=B)')
+    parser.add_argument('--output-report', type=Path, help='if set, the comparison of each metric is written in this tsv file')
+    args = parser.parse_args(argv)
+    baseline = MeasurementsTable.read_tsv(args.baseline)
+    candidate = MeasurementsTable.read_tsv(args.candidate)
+    filtered_columns = set()
+    for column_filters, table_name in [(args.baseline_filter, 'baseline'), (args.candidate_filter, 'candidate')]:
+        column_values = {}
+        for column_filter in column_filters:
+            column, _, value = column_filter.partition('=')
+            column_values[column] = parse_measurement_value(value)
+        filtered_columns.update(column_values.keys())
+        if table_name == 'baseline':
+            baseline = baseline.filter(**column_values)
+        else:
+            candidate = candidate.filter(**column_values)
+    outlier_filter = create_outlier_filter(args.outlier_filter) if args.outlier_filter else None
+    # the filtered columns differ between the baseline and the candidate, so they don't identify measurement sets
+    group_columns = [column for column in GROUP_COLUMNS if column not in filtered_columns]
+    comparisons = compare_measurements(baseline, candidate, args.metric, args.higher_is_better, args.slowdown_threshold, args.alpha, args.confidence, outlier_filter=outlier_filter, group_columns=group_columns)
+    if len(comparisons) == 0:
+        raise StarBenchException(f'{args.baseline} and {args.candidate} have no measurement in common')
+    report = MeasurementsTable([])
+    num_regressions = 0
+    for group, metric, comparison in comparisons:
+        is_regression = comparison.is_significant_slowdown()
+        num_regressions += is_regression
+        group_desc = ''.join(f'{column}={value} ' for column, value in group.items())
+        print(f'{group_desc}{metric}: {comparison}{" REGRESSION" if is_regression else ""}')
+        report.add_row({**group, 'metric': metric, 'baseline_median': comparison.baseline_median, 'candidate_median': comparison.candidate_median, 'relative_change': comparison.relative_change, 'relative_change_low': comparison.relative_change_interval[0], 'relative_change_high': comparison.relative_change_interval[1], 'p_value': comparison.p_value, 'is_regression': is_regression})
+    if args.output_report:
+        report.write_tsv(args.output_report)
+    if num_regressions > 0:
+        print(f'{num_regressions} significant regression(s) of more than {args.slowdown_threshold * 100.0:.1f} %')
+        return 1
+    return 0
+
+
+def agent_main(argv: List[str]) -> int:
+    '''serves the runs requested by starbench coordinators on this node'''
+    parser = argparse.ArgumentParser(prog='starbench agent', description='launches and times the benchmark runs requested by starbench coordinators (started with --agents <this host>:<port>) on this node')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='the address to listen on (use the address of a network interface, or 0.0.0.0 for all of them, to accept coordinators from other nodes)')
+    parser.add_argument('--port', type=int, required=True, help='the tcp port to listen on')
+    parser.add_argument('--token-file', type=Path, required=True, help='the file containing the secret that the coordinators need to know (their --agent-token-file), to be readable only by its owner')
+    args = parser.parse_args(argv)
+    agent = RunAgent(read_agent_token(args.token_file), args.host, args.port)
+    host, port = agent.get_address()
+    print(f'starbench agent listening on {host}:{port}')
+    try:
+        agent.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+SUBCOMMANDS = {
+    'sweep': sweep_main,
+    'bisect': bisect_main,
+    'matrix': matrix_main,
+    'scaling': scaling_main,
+    'compare': compare_main,
+    'agent': agent_main,
+}
+
+
+def main():
+    '''main program'''
+
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        return SUBCOMMANDS[sys.argv[1]](sys.argv[2:])
+
+    example_output_dir = Path('/tmp/hibridon')
+    example_src_dir = example_output_dir / 'source.git'
+    example_password_provider = f'{{"type": "password-file", "password-file-path": "{os.getenv("HOME")}/.github/personal_access_tokens/bench.hibridon.cluster.ipr.univ-rennes1.fr.pat"}}'
+    example_source_tree_provider = f'{{"type": "git-cloner", "repos-url": "https://github.com/hibridon/hibridon", "src-dir": "{example_src_dir}", "code-version": "a3bed1c3ccfbca572003020d3e3d3b1ff3934fad", "git-user": "g-raffy", "password-provider": {example_password_provider}}}'
+    example_text = f'''example:
+
+    %(prog)s --source-tree-provider '{example_source_tree_provider}' --num-cores 2 --output-dir={example_output_dir} --cmake-path=/usr/bin/cmake --cmake-option=-DCMAKE_BUILD_TYPE=Release --cmake-option=-DBUILD_TESTING=ON --benchmark-command='ctest --output-on-failure -L ^arch4_quick$'
+
+    other commands: {', '.join(SUBCOMMANDS.keys())} (use %(prog)s <command> --help for their usage)
+
+    '''
+
+    parser = argparse.ArgumentParser(description='performs a benchmark on a cmake buildable app hosted on a git repository', epilog=example_text, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_cmake_app_arguments(parser)
     parser.add_argument('--output-measurements', type=Path, required=True, help='the path to the output tsv file containing the measurements table')
+    parser.add_argument('--interleaved-benchmark-command', type=str, help='if set, each worker alternates the benchmark command (variant A) and this command (variant B) run by run, for an A/B comparison')
     args = parser.parse_args()
 
     # git_user = args.git_user
@@ -124,13 +875,16 @@ def main():
     #     with open(args.git_pass_file, 'r', encoding='utf8') as f:
     #         git_password = f.readline().replace('\n', '')  # os.environ['HIBRIDON_REPOS_PAT']
 
-    source_tree_provider_params = json.loads(args.source_tree_provider)
+    source_tree_provider = create_source_tree_provider(args.source_tree_provider)
 
-    source_tree_provider = tree_creator_factory.create_tree_creator(source_tree_provider_params['type'], source_tree_provider_params)
 #    source_tree_provider = GitRepos(git_repos_url=git_repos_url, code_version=args.code_version, git_user=git_user, git_password=git_password, src_dir=args.output_dir / 'source.git')
 
-    starbench_cmake_app(source_tree_provider, output_measurements_file_path=args.output_measurements, tmp_dir=args.output_dir, num_cores=args.num_cores, cmake_options=args.cmake_option, benchmark_command=args.benchmark_command.split(' '), cmake_exe_location=args.cmake_path)
+    interleaved_benchmark_command = None
+    if args.interleaved_benchmark_command:
+        interleaved_benchmark_command = args.interleaved_benchmark_command.split(' ')
+    starbench_cmake_app(source_tree_provider, output_measurements_file_path=args.output_measurements, interleaved_benchmark_command=interleaved_benchmark_command, **get_cmake_app_kwargs(args))
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
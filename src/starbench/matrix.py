@@ -0,0 +1,77 @@
+from typing import Dict, List, Tuple, Any, Optional
+from pathlib import Path
+import itertools
+import json
+import re
+from .core import StarBenchException
+
+VariantName = str  # the name of a value of an axis of a CampaignMatrix (eg 'O3-native')
+
+DEFAULT_VARIANT_NAME = 'default'
+
+
+class CampaignMatrix():
+    """the variants of a matrix campaign: each combination of cmake options, toolchain and benchmark command is a variant
+
+    the matrix is described by a json file of the form:
+    {
+        "cmake-options": {"O2": ["-DCMAKE_BUILD_TYPE=Release"], "O3-native": ["-DCMAKE_BUILD_TYPE=Release", "-DCMAKE_Fortran_FLAGS=-O3 -march=native"]},
+        "toolchains": {"gnu": {"CC": "gcc", "CXX": "g++", "FC": "gfortran"}, "intel": {"CC": "icx", "CXX": "icpx", "FC": "ifx"}},
+        "benchmark-commands": {"quick": "ctest -L ^arch4_quick$", "long": "ctest -L ^arch4_long$"},
+        "interleaved": false
+    }
+    each axis is optional. A missing axis has a single value named 'default' (no additional cmake option, the environment's compilers, or the benchmark command given on the command line)
+    """
+    cmake_options: Dict[VariantName, List[str]]  # the additional cmake options of each cmake options set
+    toolchains: Dict[VariantName, Dict[str, str]]  # the environment variables that select each toolchain (eg CC, CXX, FC)
+    benchmark_commands: Dict[VariantName, List[str]]
+    interleaved: bool  # if True, the build variants are alternated run by run on the same workers instead of being benchmarked one after the other
+
+    def __init__(self, cmake_options: Dict[VariantName, List[str]], toolchains: Dict[VariantName, Dict[str, str]], benchmark_commands: Dict[VariantName, List[str]], interleaved: bool = False):
+        for axis in [cmake_options, toolchains, benchmark_commands]:
+            if len(axis) == 0:
+                raise StarBenchException('each axis of a campaign matrix needs at least one value')
+            for variant_name in axis.keys():
+                # variant names are used as directory names
+                if not re.match(r'^[A-Za-z0-9_.+=-]+$', variant_name):
+                    raise StarBenchException(f'invalid variant name: "{variant_name}" (only letters, digits and _.+=- are allowed)')
+        self.cmake_options = cmake_options
+        self.toolchains = toolchains
+        self.benchmark_commands = benchmark_commands
+        self.interleaved = interleaved
+
+    @staticmethod
+    def from_json(matrix_desc: Dict[str, Any], default_benchmark_command: Optional[List[str]] = None) -> 'CampaignMatrix':
+        """creates a matrix from its json description (see CampaignMatrix)
+
+        default_benchmark_command: the benchmark command to use if the description has no benchmark-commands axis
+        """
+        unexpected_axes = set(matrix_desc.keys()) - {'cmake-options', 'toolchains', 'benchmark-commands', 'interleaved'}
+        if unexpected_axes:
+            raise StarBenchException(f'unexpected axes in campaign matrix: {sorted(unexpected_axes)} (expected cmake-options, toolchains, benchmark-commands and interleaved)')
+        cmake_options = matrix_desc.get('cmake-options', {DEFAULT_VARIANT_NAME: []})
+        toolchains = matrix_desc.get('toolchains', {DEFAULT_VARIANT_NAME: {}})
+        if 'benchmark-commands' in matrix_desc:
+            benchmark_commands = {}
+            for variant_name, benchmark_command in matrix_desc['benchmark-commands'].items():
+                benchmark_commands[variant_name] = benchmark_command.split(' ') if isinstance(benchmark_command, str) else benchmark_command
+        elif default_benchmark_command is not None:
+            benchmark_commands = {DEFAULT_VARIANT_NAME: default_benchmark_command}
+        else:
+            raise StarBenchException('the campaign matrix has no benchmark-commands axis, and no default benchmark command has been given')
+        return CampaignMatrix(cmake_options, toolchains, benchmark_commands, matrix_desc.get('interleaved', False))
+
+    @staticmethod
+    def from_json_file(matrix_file_path: Path, default_benchmark_command: Optional[List[str]] = None) -> 'CampaignMatrix':
+        with open(matrix_file_path, 'rt', encoding='utf8') as file:
+            return CampaignMatrix.from_json(json.load(file), default_benchmark_command)
+
+    def get_build_variants(self) -> List[Tuple[VariantName, VariantName]]:
+        """returns the (cmake options, toolchain) combinations, each of which needs its own build
+        """
+        return list(itertools.product(self.cmake_options.keys(), self.toolchains.keys()))
+
+    def get_variants(self) -> List[Tuple[VariantName, VariantName, VariantName]]:
+        """returns all the (cmake options, toolchain, benchmark command) combinations
+        """
+        return list(itertools.product(self.cmake_options.keys(), self.toolchains.keys(), self.benchmark_commands.keys()))
@@ -0,0 +1,61 @@
+from typing import Dict, List
+import re
+from .core import IMetricExtractor, StarBenchException
+
+FLOAT_PATTERN = r'[-+]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][-+]?[0-9]+)?'
+
+# the patterns of the figures of merit printed by common benchmark commands, usable by name (see create_metric_extractor)
+NAMED_PATTERNS: Dict[str, Dict[str, str]] = {
+    'gflops': {'gflops': rf'({FLOAT_PATTERN})\s*[Gg][Ff][Ll][Oo][Pp]/?[Ss]'},  # eg 'performance: 12.3 GFLOPS' or '12.3 Gflop/s'
+    'ctest-total-time': {'ctest_total_time': rf'Total Test time \(real\) =\s*({FLOAT_PATTERN}) sec'},
+    'ctest-test-times': {'ctest_test_time': rf'Test\s+#[0-9]+: (?P<name>\S+) \.+\s*Passed\s+(?P<value>{FLOAT_PATTERN}) sec'},  # one metric per test (ctest_test_time.<test name>)
+}
+
+
+class RegexMetricExtractor(IMetricExtractor):
+    """extracts metrics from the lines of output that match regular expressions
+
+    the value of a metric is the group named 'value' of its regular expression if any, its first group otherwise. If the regular expression has a group named 'name', each distinct value of this group is a distinct metric (<metric name>.<name>), eg one metric per test of a test suite
+    """
+    patterns: Dict[str, re.Pattern]  # the regular expression of each metric
+
+    def __init__(self, patterns: Dict[str, str]):
+        self.patterns = {}
+        for metric, pattern in patterns.items():
+            compiled_pattern = re.compile(pattern)
+            if compiled_pattern.groups == 0:
+                raise StarBenchException(f'the regular expression of metric {metric} has no group to capture its value: {pattern}')
+            self.patterns[metric] = compiled_pattern
+
+    def extract(self, line: str) -> Dict[str, float]:
+        metrics = {}
+        for metric, pattern in self.patterns.items():
+            match = pattern.search(line)
+            if match is None:
+                continue
+            group_values = match.groupdict()
+            value = group_values['value'] if 'value' in group_values else match.group(1)
+            if 'name' in group_values:
+                metric = f'{metric}.{group_values["name"]}'
+            try:
+                metrics[metric] = float(value)
+            except (TypeError, ValueError):
+                pass  # the line doesn't contain a valid value
+        return metrics
+
+
+def create_metric_extractor(metric_extractors: List[str]) -> IMetricExtractor:
+    """creates a metric extractor from the textual description of its metrics
+
+    metric_extractors: each item is either the name of a known pattern (see NAMED_PATTERNS, eg 'gflops') or <metric name>=<regular expression> (eg 'throughput=([0-9.]+) MB/s')
+    """
+    patterns = {}
+    for metric_extractor in metric_extractors:
+        if metric_extractor in NAMED_PATTERNS:
+            patterns.update(NAMED_PATTERNS[metric_extractor])
+            continue
+        metric, separator, pattern = metric_extractor.partition('=')
+        if not separator or not re.match(r'^[A-Za-z0-9_.]+$', metric):
+            raise StarBenchException(f'unexpected metric extractor: {metric_extractor} (expected one of {", ".join(NAMED_PATTERNS.keys())} or <metric name>=<regular expression>)')
+        patterns[metric] = pattern
+    return RegexMetricExtractor(patterns)
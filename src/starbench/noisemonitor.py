@@ -0,0 +1,242 @@
+from typing import Dict, List, Optional, Set, Tuple
+from pathlib import Path
+import os
+import threading
+import time
+from .core import ISystemNoiseMonitor, MeasurementsTable, ProcessId, DurationInSeconds, TimeInNanoseconds
+
+CLOCK_TICKS_PER_SECOND = os.sysconf('SC_CLK_TCK')
+SYS_CPU_DIR = Path('/sys/devices/system/cpu')
+
+# the kinds of interference detected by SystemNoiseMonitor
+FOREIGN_LOAD = 'foreign_load'  # processes outside the benchmark process tree used the cpus
+FREQUENCY_DROP = 'frequency_drop'  # the cpu frequency dropped significantly below the highest frequency seen during the campaign
+THERMAL_THROTTLING = 'thermal_throttling'  # the cpus have been throttled to limit their temperature
+MEMORY_PRESSURE = 'memory_pressure'  # tasks have been stalled waiting for memory (reclaim, swap)
+STEAL_TIME = 'steal_time'  # the hypervisor gave the cpus of this virtual machine to other virtual machines
+
+
+class NoiseSample():
+    """the system-wide activity during a sampling interval of a SystemNoiseMonitor
+    """
+    start_ns: TimeInNanoseconds
+    end_ns: TimeInNanoseconds
+    foreign_load: Optional[float]  # the cpu usage (in cores) of the processes outside the benchmark process tree. None if unknown
+    mean_frequency: Optional[float]  # the mean current frequency (in kHz) of the cpus usable by the benchmark. None if unknown
+    throttle_events: Optional[int]  # the number of thermal throttling events. None if unknown
+    memory_stall: Optional[float]  # the fraction of time some tasks were stalled waiting for memory. None if unknown
+    steal: Optional[float]  # the fraction of the cpu time stolen by the hypervisor. None if unknown
+    interferences: List[str]  # the interferences detected during this interval
+
+    FIELD_NAMES = ['foreign_load', 'mean_frequency', 'throttle_events', 'memory_stall', 'steal']
+
+    def __init__(self, start_ns: TimeInNanoseconds, end_ns: TimeInNanoseconds):
+        self.start_ns = start_ns
+        self.end_ns = end_ns
+        self.foreign_load = None
+        self.mean_frequency = None
+        self.throttle_events = None
+        self.memory_stall = None
+        self.steal = None
+        self.interferences = []
+
+
+def read_first_line(file_path: Path) -> Optional[str]:
+    try:
+        with open(file_path, 'rt', encoding='ascii') as file:
+            return file.readline()
+    except OSError:
+        return None
+
+
+def read_int(file_path: Path) -> Optional[int]:
+    line = read_first_line(file_path)
+    return int(line) if line is not None else None
+
+
+def read_process_cpu_times() -> Dict[ProcessId, Tuple[ProcessId, int]]:
+    """returns the parent and the cpu time (in clock ticks) of each process of the system
+    """
+    processes = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as stat_file:
+                stat = stat_file.read()
+        except OSError:
+            continue  # the process ended in the meantime
+        fields = stat[stat.rfind(b')') + 2:].split(b' ')
+        processes[int(entry)] = (int(fields[1]), int(fields[11]) + int(fields[12]))
+    return processes
+
+
+def get_descendants(root_pid: ProcessId, processes: Dict[ProcessId, Tuple[ProcessId, int]]) -> Set[ProcessId]:
+    """returns the given process and all its descendants
+    """
+    children = {}
+    for pid, (parent_pid, _cpu_ticks) in processes.items():
+        children.setdefault(parent_pid, []).append(pid)
+    descendants = set()
+    pids = [root_pid]
+    while len(pids) != 0:
+        pid = pids.pop()
+        descendants.add(pid)
+        pids += children.get(pid, [])
+    return descendants
+
+
+def read_cpu_stat() -> Optional[Tuple[int, int]]:
+    """returns the total and the stolen cpu time (in clock ticks) of all cpus, from /proc/stat
+    """
+    line = read_first_line(Path('/proc/stat'))
+    if line is None:
+        return None
+    # cpu user nice system idle iowait irq softirq steal guest guest_nice (guest times are included in user and nice)
+    ticks = [int(field) for field in line.split()[1:9]]
+    return sum(ticks), ticks[7]
+
+
+def read_memory_stall_time() -> Optional[int]:
+    """returns the total time (in microseconds) during which some tasks were stalled waiting for memory (pressure stall information)
+    """
+    line = read_first_line(Path('/proc/pressure/memory'))
+    if line is None or not line.startswith('some'):
+        return None
+    return int(line.split('total=')[1])
+
+
+class SystemNoiseMonitor(ISystemNoiseMonitor):
+    """watches the system-wide activity from a single thread, and flags the sampling intervals where something may have disturbed the benchmark
+
+    the signals are read from /proc/<pid>/stat (load of the processes outside the benchmark process tree), /sys/devices/system/cpu (cpu frequency and thermal throttling counters), /proc/pressure/memory (memory pressure) and /proc/stat (steal time). The signals that the system doesn't provide are ignored
+    """
+    sampling_period: DurationInSeconds
+    max_foreign_load: float  # the cpu usage (in cores) of the processes outside the benchmark tree above which an interval is contaminated
+    max_frequency_drop: float  # the relative drop below the highest mean frequency seen during the campaign above which an interval is contaminated
+    max_memory_stall: float  # the fraction of stalled time above which an interval is contaminated
+    max_steal: float  # the fraction of stolen cpu time above which an interval is contaminated
+    benchmark_root_pid: ProcessId  # the process whose descendants are the benchmark processes
+    samples: List[NoiseSample]
+    _cpu_ids: List[int]  # the cpus usable by the benchmark
+    _max_mean_frequency: Optional[float]
+    _lock: threading.Lock
+    _stop_event: threading.Event
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, sampling_period: DurationInSeconds = 0.25, max_foreign_load: float = 0.1, max_frequency_drop: float = 0.1, max_memory_stall: float = 0.01, max_steal: float = 0.01, benchmark_root_pid: Optional[ProcessId] = None):
+        """
+        benchmark_root_pid: None means this process (the benchmark processes are its descendants)
+        """
+        self.sampling_period = sampling_period
+        self.max_foreign_load = max_foreign_load
+        self.max_frequency_drop = max_frequency_drop
+        self.max_memory_stall = max_memory_stall
+        self.max_steal = max_steal
+        self.benchmark_root_pid = benchmark_root_pid if benchmark_root_pid is not None else os.getpid()
+        self.samples = []
+        self._cpu_ids = sorted(os.sched_getaffinity(0))
+        self._max_mean_frequency = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        assert self._thread is None
+        self._thread = threading.Thread(target=self._monitor, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+
+    def get_interferences(self, start_ns: TimeInNanoseconds, end_ns: TimeInNanoseconds) -> List[str]:
+        interferences = set()
+        with self._lock:
+            for sample in reversed(self.samples):
+                if sample.end_ns <= start_ns:
+                    break
+                if sample.start_ns < end_ns:
+                    interferences.update(sample.interferences)
+        return sorted(interferences)
+
+    def get_report(self) -> str:
+        num_contaminated_samples = {}
+        for sample in self.samples:
+            for interference in sample.interferences:
+                num_contaminated_samples[interference] = num_contaminated_samples.get(interference, 0) + 1
+        if len(num_contaminated_samples) == 0:
+            return f'noise monitor : no interference detected ({len(self.samples)} samples)'
+        return f'noise monitor : interferences detected in {", ".join(f"{num_samples} samples ({interference})" for interference, num_samples in sorted(num_contaminated_samples.items()))} out of {len(self.samples)}'
+
+    def get_samples_table(self) -> MeasurementsTable:
+        """returns the recorded signals, one row per sampling interval (time is given in seconds since the start of the monitoring)
+        """
+        table = MeasurementsTable(['time', 'interval'] + NoiseSample.FIELD_NAMES + ['interferences'])
+        if len(self.samples) != 0:
+            origin_ns = self.samples[0].start_ns
+            for sample in self.samples:
+                row = {'time': (sample.start_ns - origin_ns) * 1.0e-9, 'interval': (sample.end_ns - sample.start_ns) * 1.0e-9, 'interferences': ','.join(sample.interferences)}
+                row.update({field_name: getattr(sample, field_name) for field_name in NoiseSample.FIELD_NAMES})
+                table.add_row(row)
+        return table
+
+    def _read_counters(self) -> Dict[str, Optional[float]]:
+        frequencies = [read_int(SYS_CPU_DIR / f'cpu{cpu_id}' / 'cpufreq' / 'scaling_cur_freq') for cpu_id in self._cpu_ids]
+        throttle_counts = [read_int(SYS_CPU_DIR / f'cpu{cpu_id}' / 'thermal_throttle' / counter) for cpu_id in self._cpu_ids for counter in ['core_throttle_count', 'package_throttle_count']]
+        cpu_stat = read_cpu_stat()
+        return {
+            'processes': read_process_cpu_times(),
+            'mean_frequency': sum(frequencies) / len(frequencies) if None not in frequencies else None,
+            'throttle_count': sum(throttle_counts) if None not in throttle_counts else None,
+            'memory_stall_time': read_memory_stall_time(),
+            'cpu_ticks': cpu_stat[0] if cpu_stat is not None else None,
+            'steal_ticks': cpu_stat[1] if cpu_stat is not None else None}
+
+    def _create_sample(self, start_ns: TimeInNanoseconds, end_ns: TimeInNanoseconds, previous: Dict, current: Dict) -> NoiseSample:
+        sample = NoiseSample(start_ns, end_ns)
+        interval = (end_ns - start_ns) * 1.0e-9
+        benchmark_pids = get_descendants(self.benchmark_root_pid, current['processes'])
+        foreign_ticks = 0
+        for pid, (_parent_pid, cpu_ticks) in current['processes'].items():
+            if pid not in benchmark_pids:
+                # a process that appeared during the interval has used all its cpu time during the interval
+                foreign_ticks += max(0, cpu_ticks - previous['processes'].get(pid, (None, 0))[1])
+        sample.foreign_load = foreign_ticks / CLOCK_TICKS_PER_SECOND / interval
+        if sample.foreign_load > self.max_foreign_load:
+            sample.interferences.append(FOREIGN_LOAD)
+        if current['mean_frequency'] is not None:
+            sample.mean_frequency = current['mean_frequency']
+            self._max_mean_frequency = max(self._max_mean_frequency or 0.0, sample.mean_frequency)
+            if sample.mean_frequency < (1.0 - self.max_frequency_drop) * self._max_mean_frequency:
+                sample.interferences.append(FREQUENCY_DROP)
+        if current['throttle_count'] is not None:
+            sample.throttle_events = current['throttle_count'] - previous['throttle_count']
+            if sample.throttle_events > 0:
+                sample.interferences.append(THERMAL_THROTTLING)
+        if current['memory_stall_time'] is not None:
+            sample.memory_stall = (current['memory_stall_time'] - previous['memory_stall_time']) * 1.0e-6 / interval
+            if sample.memory_stall > self.max_memory_stall:
+                sample.interferences.append(MEMORY_PRESSURE)
+        if current['cpu_ticks'] is not None and current['cpu_ticks'] > previous['cpu_ticks']:
+            sample.steal = (current['steal_ticks'] - previous['steal_ticks']) / (current['cpu_ticks'] - previous['cpu_ticks'])
+            if sample.steal > self.max_steal:
+                sample.interferences.append(STEAL_TIME)
+        return sample
+
+    def _monitor(self):
+        previous_ns = time.monotonic_ns()
+        previous = self._read_counters()
+        while not self._stop_event.wait(self.sampling_period):
+            current_ns = time.monotonic_ns()
+            current = self._read_counters()
+            sample = self._create_sample(previous_ns, current_ns, previous, current)
+            with self._lock:
+                self.samples.append(sample)
+            previous_ns, previous = current_ns, current
+        # the last (partial) interval covers the end of the last runs, unless it's too short for the counters (clock ticks) to be meaningful
+        current_ns = time.monotonic_ns()
+        if (current_ns - previous_ns) * 1.0e-9 >= self.sampling_period / 2:
+            sample = self._create_sample(previous_ns, current_ns, previous, self._read_counters())
+            with self._lock:
+                self.samples.append(sample)
@@ -0,0 +1,53 @@
+from typing import List
+import statistics
+from .core import IOutlierFilter, StarBenchException
+
+
+class MadOutlierFilter(IOutlierFilter):
+    """considers as outliers the values whose modified z-score (based on the median absolute deviation) exceeds a threshold
+
+    the median absolute deviation is much less sensitive to the outliers themselves than the standard deviation (Iglewicz and Hoaglin)
+    """
+    threshold: float  # the modified z-score above which a value is an outlier
+
+    def __init__(self, threshold: float = 3.5):
+        self.threshold = threshold
+
+    def get_outlier_mask(self, values: List[float]) -> List[bool]:
+        if len(values) < 3:
+            return [False] * len(values)
+        median = statistics.median(values)
+        mad = statistics.median([abs(value - median) for value in values])
+        if mad == 0.0:
+            return [False] * len(values)
+        # 0.6745 is the 0.75 quantile of the standard normal distribution, which makes the modified z-score comparable to a z-score for normally distributed values
+        return [abs(0.6745 * (value - median) / mad) > self.threshold for value in values]
+
+
+class IqrOutlierFilter(IOutlierFilter):
+    """considers as outliers the values that are further than k interquartile ranges below the first quartile or above the third quartile (tukey's fences)
+    """
+    k: float
+
+    def __init__(self, k: float = 1.5):
+        self.k = k
+
+    def get_outlier_mask(self, values: List[float]) -> List[bool]:
+        if len(values) < 4:
+            return [False] * len(values)
+        q1, _q2, q3 = statistics.quantiles(values, n=4, method='inclusive')
+        iqr = q3 - q1
+        return [value < q1 - self.k * iqr or value > q3 + self.k * iqr for value in values]
+
+
+def create_outlier_filter(outlier_filter: str) -> IOutlierFilter:
+    """creates an outlier filter from its textual description
+
+    outlier_filter: either 'mad' or 'iqr', optionally followed by the threshold of the filter (eg 'mad:3.0' or 'iqr:3')
+    """
+    filter_type, _, threshold = outlier_filter.partition(':')
+    if filter_type == 'mad':
+        return MadOutlierFilter(float(threshold)) if threshold else MadOutlierFilter()
+    if filter_type == 'iqr':
+        return IqrOutlierFilter(float(threshold)) if threshold else IqrOutlierFilter()
+    raise StarBenchException(f'unexpected outlier filter: {outlier_filter} (expected mad, iqr, mad:<threshold> or iqr:<k>)')
@@ -0,0 +1,94 @@
+from typing import Callable, Dict, List, Optional
+from pathlib import Path
+from .core import IFileTreeProvider, StarbenchResults, MeasurementsTable
+from .gitcloner import GitCloner, GitCommitId
+from .comparison import ResultsComparison
+
+# runs a benchmark campaign on the given source tree, writes its measurements table to the given file and returns the benchmark measurements
+CampaignRunner = Callable[[IFileTreeProvider, Path], StarbenchResults]
+
+
+class CommitBenchmarker():
+    """benchmarks commits of a git repository, each commit being benchmarked at most once
+
+    the same source and build directories are reused from one commit to the next, so that builds are incremental
+    """
+    git_cloner: GitCloner
+    run_campaign: CampaignRunner
+    output_dir: Path  # where the measurements table of each commit is written
+    results: Dict[GitCommitId, StarbenchResults]  # the results of the commits that have already been benchmarked
+
+    def __init__(self, git_cloner: GitCloner, run_campaign: CampaignRunner, output_dir: Path):
+        self.git_cloner = git_cloner
+        self.run_campaign = run_campaign
+        self.output_dir = output_dir
+        self.results = {}
+
+    def get_measurements_file_path(self, commit: GitCommitId) -> Path:
+        return self.output_dir / f'measurements-{commit}.tsv'
+
+    def benchmark(self, commit: GitCommitId) -> StarbenchResults:
+        if commit not in self.results:
+            print(f'benchmarking commit {commit}')
+            self.output_dir.mkdir(exist_ok=True, parents=True)
+            self.git_cloner.code_version = commit
+            self.results[commit] = self.run_campaign(self.git_cloner, self.get_measurements_file_path(commit))
+        return self.results[commit]
+
+
+def sweep_commits(benchmarker: CommitBenchmarker, commits: List[GitCommitId], output_measurements_file_path: Path) -> Dict[GitCommitId, StarbenchResults]:
+    """benchmarks each of the given commits and writes their measurements in a single table, with a commit column
+    """
+    measurements = MeasurementsTable(['commit'])
+    for commit in commits:
+        results = benchmarker.benchmark(commit)
+        print(f'commit {commit}: median duration {results.get_median_duration():.6f} s ({results.get_num_runs()} runs)')
+        commit_measurements = MeasurementsTable.read_tsv(benchmarker.get_measurements_file_path(commit))
+        for row in commit_measurements.rows:
+            row['commit'] = commit
+        measurements.extend(commit_measurements)
+    measurements.write_tsv(output_measurements_file_path)
+    return {commit: benchmarker.results[commit] for commit in commits}
+
+
+def bisect_slowdown(benchmarker: CommitBenchmarker, commits: List[GitCommitId], slowdown_threshold: float = 0.05, alpha: float = 0.05, summary_file_path: Optional[Path] = None) -> Optional[GitCommitId]:
+    """finds the first commit that is significantly slower than the first commit of the given list
+
+    commits: the commits to search, oldest first. The first one is the known good commit, the last one the supposedly bad commit
+    summary_file_path: if not None, the comparison of each benchmarked commit with the good commit is written in this tsv file
+
+    returns None if the last commit is not significantly slower than the first one
+    """
+    assert len(commits) >= 2
+    good_commit = commits[0]
+    comparisons: Dict[GitCommitId, ResultsComparison] = {}
+
+    def is_slow(commit: GitCommitId) -> bool:
+        comparison = ResultsComparison(benchmarker.benchmark(good_commit), benchmarker.benchmark(commit), slowdown_threshold, alpha)
+        comparisons[commit] = comparison
+        print(f'commit {commit}: {comparison} -> {"slow" if comparison.is_significant_slowdown() else "not slow"}')
+        return comparison.is_significant_slowdown()
+
+    first_bad_commit = None
+    if is_slow(commits[-1]):
+        # invariant: commits[good_index] is not slow, commits[bad_index] is slow
+        good_index = 0
+        bad_index = len(commits) - 1
+        while bad_index - good_index > 1:
+            middle_index = (good_index + bad_index) // 2
+            if is_slow(commits[middle_index]):
+                bad_index = middle_index
+            else:
+                good_index = middle_index
+        first_bad_commit = commits[bad_index]
+        print(f'first slow commit: {first_bad_commit} ({comparisons[first_bad_commit]})')
+        print(f'measurements of {first_bad_commit}: {benchmarker.get_measurements_file_path(first_bad_commit)}')
+    else:
+        print(f'commit {commits[-1]} is not significantly slower than {good_commit}')
+
+    if summary_file_path is not None:
+        summary = MeasurementsTable(['commit', 'baseline_median', 'median', 'relative_change', 'p_value', 'is_slow'])
+        for commit, comparison in comparisons.items():
+            summary.add_row({'commit': commit, 'baseline_median': comparison.baseline_median, 'median': comparison.candidate_median, 'relative_change': comparison.relative_change, 'p_value': comparison.p_value, 'is_slow': comparison.is_significant_slowdown()})
+        summary.write_tsv(summary_file_path)
+    return first_bad_commit
@@ -0,0 +1,262 @@
+from typing import Dict, List, Optional, Tuple, Any
+from pathlib import Path
+from array import array
+import json
+import os
+import threading
+import time
+from .core import IRunSampler, RunId, ProcessId, DurationInSeconds, TimeInNanoseconds
+
+CLOCK_TICKS_PER_SECOND = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+
+class ProcessTreeSample():
+    """the resources used by a process tree at a given time, as read from /proc
+    """
+    cpu_time: float  # the user + system cpu time (in seconds) used so far by the processes of the tree (including their reaped children)
+    num_processes: int
+    num_threads: int
+    rss: int  # the resident set size of the tree, in kilobytes
+    read_bytes: int  # the number of bytes the tree has read from storage so far (-1 if unknown)
+    write_bytes: int  # the number of bytes the tree has written to storage so far (-1 if unknown)
+
+    def __init__(self):
+        self.cpu_time = 0.0
+        self.num_processes = 0
+        self.num_threads = 0
+        self.rss = 0
+        self.read_bytes = 0
+        self.write_bytes = 0
+
+
+def read_process_stat(pid: ProcessId) -> Optional[List[str]]:
+    """returns the fields of /proc/<pid>/stat that follow the command name (the first one is the process state), or None if the process no longer exists
+    """
+    try:
+        with open(f'/proc/{pid}/stat', 'rb') as stat_file:
+            stat = stat_file.read()
+    except OSError:
+        return None
+    # the command name is enclosed in parentheses and may itself contain spaces and parentheses
+    return stat[stat.rfind(b')') + 2:].decode('ascii').split(' ')
+
+
+def read_process_io(pid: ProcessId) -> Optional[Tuple[int, int]]:
+    """returns the number of bytes read from and written to storage by the given process, or None if it's unknown
+    """
+    try:
+        with open(f'/proc/{pid}/io', 'rb') as io_file:
+            io_stats = dict(line.split(b': ') for line in io_file.read().splitlines())
+        return int(io_stats[b'read_bytes']), int(io_stats[b'write_bytes'])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def get_child_pids(pid: ProcessId) -> List[ProcessId]:
+    """returns the processes created by the threads of the given process
+    """
+    child_pids = []
+    try:
+        task_ids = os.listdir(f'/proc/{pid}/task')
+    except OSError:
+        return []
+    for task_id in task_ids:
+        try:
+            with open(f'/proc/{pid}/task/{task_id}/children', 'rb') as children_file:
+                child_pids += [int(child_pid) for child_pid in children_file.read().split()]
+        except OSError:
+            pass
+    return child_pids
+
+
+def sample_process_tree(root_pid: ProcessId) -> Optional[ProcessTreeSample]:
+    """reads the resources used by the given process and all its descendants, or returns None if the process no longer exists
+    """
+    sample = ProcessTreeSample()
+    pids = [root_pid]
+    while len(pids) != 0:
+        pid = pids.pop()
+        fields = read_process_stat(pid)
+        if fields is None:
+            if pid == root_pid:
+                return None
+            continue  # the process ended in the meantime
+        # see proc(5): the indices are shifted by 3 as fields starts with the state (field 3)
+        utime, stime, cutime, cstime = (int(field) for field in fields[11:15])
+        sample.cpu_time += (utime + stime + cutime + cstime) / CLOCK_TICKS_PER_SECOND
+        sample.num_processes += 1
+        sample.num_threads += int(fields[17])
+        sample.rss += int(fields[21]) * PAGE_SIZE // 1024
+        io = read_process_io(pid)
+        if io is not None and sample.read_bytes >= 0:
+            sample.read_bytes += io[0]
+            sample.write_bytes += io[1]
+        else:
+            sample.read_bytes = sample.write_bytes = -1
+        pids += get_child_pids(pid)
+    return sample
+
+
+class RunTimeline():
+    """the resources used by the process tree of a run over time
+
+    the samples are stored in arrays of machine values, which keeps long campaigns compact
+    """
+    time: array  # the time of each sample, in seconds since the run started to be watched
+    cpu_time: array
+    num_processes: array
+    num_threads: array
+    rss: array
+    read_bytes: array
+    write_bytes: array
+
+    FIELD_NAMES = ['time', 'cpu_time', 'num_processes', 'num_threads', 'rss', 'read_bytes', 'write_bytes']
+
+    def __init__(self):
+        self.time = array('d')
+        self.cpu_time = array('d')
+        self.num_processes = array('l')
+        self.num_threads = array('l')
+        self.rss = array('q')
+        self.read_bytes = array('q')
+        self.write_bytes = array('q')
+
+    def add_sample(self, sample_time: DurationInSeconds, sample: ProcessTreeSample):
+        self.time.append(sample_time)
+        self.cpu_time.append(sample.cpu_time)
+        self.num_processes.append(sample.num_processes)
+        self.num_threads.append(sample.num_threads)
+        self.rss.append(sample.rss)
+        self.read_bytes.append(sample.read_bytes)
+        self.write_bytes.append(sample.write_bytes)
+
+    def get_num_samples(self) -> int:
+        return len(self.time)
+
+    def get_max_rss(self) -> int:
+        return max(self.rss, default=0)
+
+    def to_json(self) -> Dict[str, List[float]]:
+        return {field_name: getattr(self, field_name).tolist() for field_name in RunTimeline.FIELD_NAMES}
+
+    @staticmethod
+    def from_json(timeline_desc: Dict[str, List[float]]) -> 'RunTimeline':
+        timeline = RunTimeline()
+        for field_name in RunTimeline.FIELD_NAMES:
+            getattr(timeline, field_name).extend(timeline_desc[field_name])
+        return timeline
+
+
+def get_timelines_file_path(measurements_file_path: Path) -> Path:
+    """returns the path of the file that stores the timelines of the runs of the given measurements file
+    """
+    return measurements_file_path.with_name(f'{measurements_file_path.stem}-timelines.jsonl')
+
+
+def write_timelines(timelines: Dict[RunId, RunTimeline], file_path: Path, metadata: Optional[Dict[str, Any]] = None, append: bool = False):
+    """writes the given timelines in a json lines file (one run per line)
+
+    metadata: additional information stored with each timeline (eg the variant of a matrix campaign)
+    append: if True, the timelines are appended to the file instead of replacing its content
+    """
+    with open(file_path, 'at' if append else 'wt', encoding='utf8') as file:
+        for run_id, timeline in timelines.items():
+            file.write(json.dumps({**(metadata or {}), 'run_id': run_id, **timeline.to_json()}) + '\n')
+
+
+def read_timelines(file_path: Path) -> Dict[RunId, RunTimeline]:
+    """reads the timelines written by write_timelines (without their metadata)
+    """
+    timelines = {}
+    with open(file_path, 'rt', encoding='utf8') as file:
+        for line in file:
+            timeline_desc = json.loads(line)
+            timelines[timeline_desc['run_id']] = RunTimeline.from_json(timeline_desc)
+    return timelines
+
+
+class ProcSampler(IRunSampler):
+    """samples the resources used by the process tree of each active run, by polling /proc from a single thread
+
+    the cost of each sampling sweep is measured; if it exceeds the allowed overhead, the sampling period is lengthened accordingly
+    """
+    sampling_period: DurationInSeconds  # the requested time between 2 samples of a run
+    max_overhead: float  # the maximum fraction of a core that the sampling thread is allowed to use
+    effective_sampling_period: DurationInSeconds  # the sampling period actually used, possibly lengthened to bound the overhead
+    num_sweeps: int  # the number of times the active runs have been sampled
+    sampling_cpu_time: DurationInSeconds  # the cpu time spent by the sampling thread
+    _watched_runs: Dict[RunId, Tuple[ProcessId, TimeInNanoseconds, RunTimeline]]
+    _lock: threading.Lock
+    _stop_event: threading.Event
+    _thread: Optional[threading.Thread]
+    _start_ns: Optional[TimeInNanoseconds]
+    _stop_ns: Optional[TimeInNanoseconds]
+
+    def __init__(self, sampling_period: DurationInSeconds = 0.1, max_overhead: float = 0.01):
+        assert sampling_period > 0.0
+        assert 0.0 < max_overhead < 1.0
+        self.sampling_period = sampling_period
+        self.max_overhead = max_overhead
+        self.effective_sampling_period = sampling_period
+        self.num_sweeps = 0
+        self.sampling_cpu_time = 0.0
+        self._watched_runs = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._start_ns = None
+        self._stop_ns = None
+
+    def start(self):
+        assert self._thread is None
+        self._start_ns = time.monotonic_ns()
+        self._thread = threading.Thread(target=self._sample_periodically, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._thread.join()
+        self._stop_ns = time.monotonic_ns()
+
+    def watch_run(self, run_id: RunId, pid: ProcessId):
+        with self._lock:
+            self._watched_runs[run_id] = (pid, time.monotonic_ns(), RunTimeline())
+
+    def unwatch_run(self, run_id: RunId) -> Optional[RunTimeline]:
+        with self._lock:
+            watched_run = self._watched_runs.pop(run_id, None)
+        return watched_run[2] if watched_run is not None else None
+
+    def get_overhead(self) -> float:
+        """returns the fraction of a core used by the sampling thread since the sampler started
+        """
+        elapsed_ns = (self._stop_ns if self._stop_ns is not None else time.monotonic_ns()) - self._start_ns
+        return self.sampling_cpu_time / (elapsed_ns * 1.0e-9) if elapsed_ns > 0 else 0.0
+
+    def get_report(self) -> str:
+        mean_sweep_duration = self.sampling_cpu_time / self.num_sweeps if self.num_sweeps != 0 else 0.0
+        return f'sampler : {self.num_sweeps} sweeps, mean sweep cost {mean_sweep_duration * 1.0e6:.0f} us, overhead {self.get_overhead() * 100.0:.2f} % of a core, sampling period {self.effective_sampling_period:.3f} s (requested {self.sampling_period:.3f} s)'
+
+    def _sweep(self):
+        """samples all the watched runs once
+        """
+        with self._lock:
+            watched_runs = list(self._watched_runs.values())
+        for pid, watch_start_ns, timeline in watched_runs:
+            sample = sample_process_tree(pid)
+            if sample is not None:
+                timeline.add_sample((time.monotonic_ns() - watch_start_ns) * 1.0e-9, sample)
+
+    def _sample_periodically(self):
+        while not self._stop_event.is_set():
+            sweep_start_ns = time.monotonic_ns()
+            sweep_start_cpu_ns = time.thread_time_ns()
+            self._sweep()
+            sweep_cpu_time = (time.thread_time_ns() - sweep_start_cpu_ns) * 1.0e-9
+            self.sampling_cpu_time += sweep_cpu_time
+            self.num_sweeps += 1
+            # lengthen the period if the sweeps are too costly (eg too many processes), shorten it back when they're cheap again
+            self.effective_sampling_period = max(self.sampling_period, sweep_cpu_time / self.max_overhead)
+            next_sweep_ns = sweep_start_ns + int(self.effective_sampling_period * 1.0e9)
+            self._stop_event.wait(max(0.0, (next_sweep_ns - time.monotonic_ns()) * 1.0e-9))
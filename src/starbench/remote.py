@@ -0,0 +1,341 @@
+from typing import List, Dict, Optional, Tuple, Any, Callable
+from pathlib import Path
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import socket
+import socketserver
+import subprocess
+import threading
+import time
+from .core import IRunSupervisor, CommandPerfEstimator, Run, RunId, WorkerId, ResourceUsage, StarBenchException, TimeInNanoseconds, spawn_run_process
+
+AgentAddress = Tuple[str, int]  # the host name and the tcp port of a RunAgent
+AgentToken = str  # the secret shared by a RunAgent and its coordinators
+
+AUTHENTICATION_TIMEOUT = 10.0  # the time (in seconds) a coordinator has to authenticate once connected to an agent
+
+# the messages exchanged between a RemoteRunSupervisor (coordinator) and a RunAgent are json objects, one per line:
+# - agent -> coordinator, on connection: {"type": "challenge", "nonce": ...}, answered with {"type": "auth", "digest": <hmac-sha256 of the nonce keyed by the token>}, then the agent replies {"type": "auth", "accepted": true}
+#   or closes the connection. No other message is accepted before the coordinator is authenticated
+# - coordinator -> agent: {"type": "clock"}, answered with {"type": "clock", "monotonic_ns": <agent's monotonic clock>}
+# - coordinator -> agent: {"type": "run", "run_id": ..., "command": [...], "cwd": ..., "env": {...}, "stdout": ..., "stderr": ..., "core_set": [...]}, answered with
+#   {"type": "spawned", "run_id": ..., "pid": ..., "start_ns": ...} once the process is created, then {"type": "exit", "run_id": ..., "pid": ..., "return_code": ..., "end_ns": ..., "resource_usage": {...}} once it has ended
+
+
+def parse_agent_address(agent_address: str) -> AgentAddress:
+    """parses an agent address of the form <host>:<port>
+    """
+    host, _, port = agent_address.rpartition(':')
+    if not host or not port.isdigit():
+        raise StarBenchException(f'invalid agent address: {agent_address} (expected <host>:<port>)')
+    return host, int(port)
+
+
+def read_agent_token(token_file_path: Path) -> AgentToken:
+    """reads the secret shared by the agents and their coordinators from the given file (its first line)
+    """
+    try:
+        token = token_file_path.read_text(encoding='utf8').strip()
+    except OSError as err:
+        raise StarBenchException(f'failed to read the agent token file {token_file_path}: {err}') from err
+    if token == '':
+        raise StarBenchException(f'the agent token file {token_file_path} is empty')
+    return token
+
+
+def compute_challenge_digest(token: AgentToken, nonce: str) -> str:
+    return hmac.new(token.encode('utf8'), nonce.encode('utf8'), hashlib.sha256).hexdigest()
+
+
+class MessageConnection():
+    """a socket that carries json messages, one per line
+
+    messages can be sent from several threads
+    """
+    sock: socket.socket
+    _reader: Any
+    _send_lock: threading.Lock
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+        self._reader = sock.makefile('rb')
+        self._send_lock = threading.Lock()
+
+    def send(self, message: Dict[str, Any]):
+        data = (json.dumps(message) + '\n').encode('utf8')
+        with self._send_lock:
+            self.sock.sendall(data)
+
+    def receive(self) -> Optional[Dict[str, Any]]:
+        """returns the next message, or None if the connection has been closed
+        """
+        line = self._reader.readline()
+        if not line:
+            return None
+        return json.loads(line)
+
+    def close(self):
+        self._reader.close()
+        self.sock.close()
+
+
+def estimate_clock_offset(query_clock: Callable[[], TimeInNanoseconds], num_queries: int = 16) -> Tuple[TimeInNanoseconds, TimeInNanoseconds]:
+    """estimates the offset between a remote monotonic clock and the local one, the way ntp does
+
+    query_clock: returns the time of the remote clock
+    returns the offset (remote time - local time) and the round trip time of the query it was estimated from. The query with the shortest round trip is used, as its uncertainty (half the round trip) is the smallest
+    """
+    best_offset, best_round_trip = 0, None
+    for _ in range(num_queries):
+        send_ns = time.monotonic_ns()
+        remote_ns = query_clock()
+        receive_ns = time.monotonic_ns()
+        round_trip = receive_ns - send_ns
+        if best_round_trip is None or round_trip < best_round_trip:
+            best_offset, best_round_trip = remote_ns - (send_ns + receive_ns) // 2, round_trip
+    return best_offset, best_round_trip
+
+
+class AgentConnection():
+    """the coordinator side of the connection to a RunAgent
+    """
+    address: AgentAddress
+    connection: MessageConnection
+    clock_offset: TimeInNanoseconds  # the agent's monotonic clock minus the coordinator's monotonic clock
+    clock_round_trip: TimeInNanoseconds  # the round trip time of the clock query the offset was estimated from (the uncertainty on the offset is half of it)
+    running_runs: Dict[RunId, Optional[int]]  # the runs that have been sent to the agent and haven't ended yet, with the pid of their process once it is known
+
+    def __init__(self, address: AgentAddress, token: AgentToken):
+        self.address = address
+        self.connection = MessageConnection(socket.create_connection(address))
+        self.connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._authenticate(token)
+        self.clock_offset, self.clock_round_trip = estimate_clock_offset(self._query_clock)
+        self.running_runs = {}
+
+    def _authenticate(self, token: AgentToken):
+        challenge = self.connection.receive()
+        if challenge is None or challenge.get('type') != 'challenge':
+            raise StarBenchException(f'unexpected message from agent {self.address[0]}:{self.address[1]}: {challenge}')
+        self.connection.send({'type': 'auth', 'digest': compute_challenge_digest(token, challenge['nonce'])})
+        reply = self.connection.receive()
+        if reply is None or reply.get('type') != 'auth' or not reply.get('accepted'):
+            raise StarBenchException(f'agent {self.address[0]}:{self.address[1]} rejected the token')
+
+    def _query_clock(self) -> TimeInNanoseconds:
+        self.connection.send({'type': 'clock'})
+        reply = self.connection.receive()
+        if reply is None or reply['type'] != 'clock':
+            raise StarBenchException(f'unexpected reply from agent {self.address[0]}:{self.address[1]}: {reply}')
+        return reply['monotonic_ns']
+
+    def to_local_time(self, agent_ns: TimeInNanoseconds) -> TimeInNanoseconds:
+        return agent_ns - self.clock_offset
+
+
+class RemoteRunSupervisor(IRunSupervisor):
+    """a supervisor that launches the runs on RunAgent processes, possibly on other nodes
+
+    the workers are distributed over the agents in a round robin way (worker w runs on agent w % num_agents). The agents time the runs with their own clock, and the start and end times of the runs are converted to the coordinator's clock using the clock offset estimated when connecting to each agent. The stop condition of the CommandPerfEstimator is evaluated by the coordinator on the runs of all agents. The paths (working directory, output files) are those of the agents' nodes
+    """
+    agent_addresses: List[AgentAddress]
+    token: AgentToken  # the secret shared with the agents
+    _agents: Optional[List[AgentConnection]]
+    _reader_threads: List[threading.Thread]
+    _num_runs_in_flight: int
+    _condition: threading.Condition  # notified when the number of runs in flight drops to 0
+
+    def __init__(self, agent_addresses: List[AgentAddress], token: AgentToken):
+        assert len(agent_addresses) > 0
+        self.agent_addresses = agent_addresses
+        self.token = token
+        self._agents = None
+        self._reader_threads = []
+        self._num_runs_in_flight = 0
+        self._condition = threading.Condition()
+
+    def get_agent(self, worker_id: WorkerId) -> AgentConnection:
+        return self._agents[worker_id % len(self._agents)]
+
+    def _connect(self, star_bencher: CommandPerfEstimator):
+        self._agents = []
+        for address in self.agent_addresses:
+            try:
+                agent = AgentConnection(address, self.token)
+            except OSError as err:
+                raise StarBenchException(f'failed to connect to agent {address[0]}:{address[1]}: {err}') from err
+            print(f'agent {address[0]}:{address[1]} : clock offset {agent.clock_offset * 1.0e-3:.0f} us (+/- {agent.clock_round_trip * 0.5e-3:.0f} us)')
+            self._agents.append(agent)
+            reader_thread = threading.Thread(target=self._read_messages, args=(star_bencher, agent), daemon=True)
+            reader_thread.start()
+            self._reader_threads.append(reader_thread)
+
+    def start_process(self, star_bencher: CommandPerfEstimator, run: Run, popen_args: List[str], cwd: Path, stdout_filepath: Optional[Path], stderr_filepath: Optional[Path]):
+        if self._agents is None:
+            self._connect(star_bencher)
+        agent = self.get_agent(run.worker_id)
+        with self._condition:
+            self._num_runs_in_flight += 1
+            agent.running_runs[run.id] = None
+        agent.connection.send({
+            'type': 'run',
+            'run_id': run.id,
+            'command': popen_args,
+            'cwd': str(cwd),
+            'env': star_bencher.get_run_env_vars(run.core_set, run.env_vars),
+            'stdout': str(stdout_filepath) if stdout_filepath is not None else None,
+            'stderr': str(stderr_filepath) if stderr_filepath is not None else None,
+            'core_set': sorted(run.core_set) if run.core_set is not None else None})
+
+    def _end_run(self, star_bencher: CommandPerfEstimator, agent: AgentConnection, run_id: RunId, pid: int, return_code: int, end_ns: Optional[TimeInNanoseconds] = None, resource_usage: Optional[ResourceUsage] = None):
+        with self._condition:
+            del agent.running_runs[run_id]
+        star_bencher.on_exit(pid, return_code, run_id, end_ns=end_ns, resource_usage=resource_usage)
+        with self._condition:
+            # on_exit may have started the next run of the worker, which is then in flight
+            self._num_runs_in_flight -= 1
+            self._condition.notify_all()
+
+    def _read_messages(self, star_bencher: CommandPerfEstimator, agent: AgentConnection):
+        while True:
+            try:
+                message = agent.connection.receive()
+            except OSError:
+                message = None
+            if message is None:
+                break
+            if message['type'] == 'spawned':
+                with self._condition:
+                    agent.running_runs[message['run_id']] = message['pid']
+                star_bencher.on_run_spawned(message['pid'], message['run_id'], start_ns=agent.to_local_time(message['start_ns']))
+            elif message['type'] == 'exit':
+                end_ns = agent.to_local_time(message['end_ns']) if message['end_ns'] is not None else None
+                resource_usage = ResourceUsage(**message['resource_usage']) if message['resource_usage'] is not None else None
+                self._end_run(star_bencher, agent, message['run_id'], message['pid'], message['return_code'], end_ns, resource_usage)
+        # the connection has been lost: the runs still running on this agent have failed
+        with self._condition:
+            lost_runs = list(agent.running_runs.items())
+        for run_id, pid in lost_runs:
+            print(f'lost the connection to agent {agent.address[0]}:{agent.address[1]} during run {run_id}')
+            self._end_run(star_bencher, agent, run_id, pid if pid is not None else -1, -1)
+
+    def wait_for_all_runs(self, star_bencher: CommandPerfEstimator):
+        with self._condition:
+            while self._num_runs_in_flight > 0:
+                self._condition.wait()
+        for agent in self._agents or []:
+            agent.connection.sock.shutdown(socket.SHUT_RDWR)
+        for reader_thread in self._reader_threads:
+            reader_thread.join()
+        for agent in self._agents or []:
+            agent.connection.close()
+        self._agents = None
+        self._reader_threads = []
+
+
+class RunAgent():
+    """a server that launches and times the runs requested by coordinators (see RemoteRunSupervisor) on this node
+
+    each coordinator connection is served by its own thread, and each run by its own thread. The runs of a coordinator that disconnects are killed
+
+    an agent runs any command that an authenticated coordinator sends, so the coordinators have to prove that they know the agent's token (with a challenge, so the token is not sent over the network). The messages themselves are neither encrypted nor signed
+    """
+    token: AgentToken  # the secret shared with the coordinators
+    _server: socketserver.ThreadingTCPServer
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, token: AgentToken, host: str = '127.0.0.1', port: int = 0):
+        """
+        host: the address to listen on (the default only accepts the coordinators of this node)
+        port: the tcp port to listen on (0 means any free port, see get_address)
+        """
+        assert token, 'the agent requires a token'
+        self.token = token
+        agent = self
+
+        class RequestHandler(socketserver.BaseRequestHandler):
+            def handle(self):
+                agent.serve_coordinator(self.request)
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self._server = socketserver.ThreadingTCPServer((host, port), RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    def get_address(self) -> AgentAddress:
+        return self._server.server_address[:2]
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def start(self):
+        """serves the coordinators from a background thread
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    @staticmethod
+    def _perform_run(connection: MessageConnection, request: Dict[str, Any], processes: Dict[RunId, subprocess.Popen]):
+        run_id = request['run_id']
+        core_set = set(request['core_set']) if request['core_set'] is not None else None
+        env = dict(os.environ)
+        env.update(request['env'])
+        proc, start_ns = spawn_run_process(request['command'], Path(request['cwd']), env, request['stdout'], request['stderr'], core_set)
+        if proc is None:
+            connection.send({'type': 'exit', 'run_id': run_id, 'pid': -1, 'return_code': -1, 'end_ns': None, 'resource_usage': None})
+            return
+        processes[run_id] = proc
+        connection.send({'type': 'spawned', 'run_id': run_id, 'pid': proc.pid, 'start_ns': start_ns})
+        return_code, end_ns, resource_usage = CommandPerfEstimator.reap_process(proc)
+        del processes[run_id]
+        try:
+            connection.send({'type': 'exit', 'run_id': run_id, 'pid': proc.pid, 'return_code': return_code, 'end_ns': end_ns, 'resource_usage': resource_usage.as_dict()})
+        except OSError:
+            pass  # the coordinator has gone
+
+    def _authenticate_coordinator(self, connection: MessageConnection) -> bool:
+        nonce = secrets.token_hex(32)
+        connection.sock.settimeout(AUTHENTICATION_TIMEOUT)
+        try:
+            connection.send({'type': 'challenge', 'nonce': nonce})
+            reply = connection.receive()
+        except (OSError, ValueError):
+            return False
+        if not isinstance(reply, dict) or reply.get('type') != 'auth' or not isinstance(reply.get('digest'), str) or not hmac.compare_digest(reply['digest'], compute_challenge_digest(self.token, nonce)):
+            print(f'rejected a coordinator from {connection.sock.getpeername()[0]}: authentication failed')
+            return False
+        connection.sock.settimeout(None)
+        connection.send({'type': 'auth', 'accepted': True})
+        return True
+
+    def serve_coordinator(self, sock: socket.socket):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        connection = MessageConnection(sock)
+        processes: Dict[RunId, subprocess.Popen] = {}
+        try:
+            if not self._authenticate_coordinator(connection):
+                return
+            while True:
+                try:
+                    request = connection.receive()
+                except OSError:
+                    request = None
+                if request is None:
+                    break
+                if request['type'] == 'clock':
+                    connection.send({'type': 'clock', 'monotonic_ns': time.monotonic_ns()})
+                elif request['type'] == 'run':
+                    threading.Thread(target=RunAgent._perform_run, args=(connection, request, processes), daemon=True).start()
+        finally:
+            for proc in list(processes.values()):
+                proc.kill()
+            connection.close()
@@ -0,0 +1,54 @@
+'''runs a command several times back to back and writes the duration of each iteration to a file, one per line (in seconds)
+
+this small loop is used by CommandPerfEstimator when num_iterations_per_run is greater than 1: the cost of launching a run is then paid once for several iterations, and what's left of it is measured separately (the duration of the run minus the durations of its iterations)
+
+usage: python repeat.py <num iterations> <iteration durations file> <command> [<arg> ...]
+
+this script is executed by its path, so it doesn't depend on starbench being importable in the environment of the runs (and it starts faster)
+'''
+from typing import List, Tuple
+import os
+import sys
+import time
+
+
+def run_iterations(num_iterations: int, command: List[str]) -> Tuple[int, List[int]]:
+    """runs the given command num_iterations times (or until an iteration fails)
+
+    the processes are created with posix_spawn, which avoids copying the page tables of this process. They inherit its current directory, its environment and its cpu affinity
+
+    returns the return code of the last iteration, and the duration of each iteration (in nanoseconds)
+    """
+    durations = []
+    return_code = 0
+    for _ in range(num_iterations):
+        start_ns = time.monotonic_ns()
+        pid = os.posix_spawnp(command[0], command, os.environ)
+        _pid, status = os.waitpid(pid, 0)
+        durations.append(time.monotonic_ns() - start_ns)
+        # decoded by hand, as os.waitstatus_to_exitcode requires python >= 3.9
+        return_code = -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+        if return_code != 0:
+            break
+    return return_code, durations
+
+
+def main(argv: List[str]) -> int:
+    if len(argv) < 3 or not argv[0].isdigit() or int(argv[0]) == 0:
+        print('usage: python repeat.py <num iterations> <iteration durations file> <command> [<arg> ...]', file=sys.stderr)
+        return 2
+    num_iterations, durations_file_path, command = int(argv[0]), argv[1], argv[2:]
+    try:
+        return_code, durations = run_iterations(num_iterations, command)
+    except OSError as err:
+        print(f'failed to run {command}: {err}', file=sys.stderr)
+        return 127  # same convention as the shells
+    with open(durations_file_path, 'w', encoding='utf8') as file:
+        file.write(''.join(f'{duration * 1.0e-9:.9f}\n' for duration in durations))
+    if return_code < 0:
+        return 128 - return_code  # the iteration has been killed by a signal (same convention as the shells)
+    return return_code
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
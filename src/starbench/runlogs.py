@@ -0,0 +1,220 @@
+from typing import Dict, List, Optional, Any
+from pathlib import Path
+import gzip
+import os
+import queue
+import threading
+import time
+from .core import IRunLogSink, IRunLogPolicy, FileLogPolicy, FileLogSink, RunId, ReturnCode, CoreSet, DurationInSeconds, StarBenchException
+
+
+def get_run_log_path(filepath: Path, run_id: RunId, suffix: str = '') -> Path:
+    """returns the path of the log file of the given run, derived from the output file of its worker (eg stdout.txt -> stdout.run42.txt)
+    """
+    filepath = Path(filepath)
+    return filepath.with_name(f'{filepath.stem}.run{run_id}{filepath.suffix}{suffix}')
+
+
+class NullLogSink(IRunLogSink):
+    """discards the output (the process writes directly to /dev/null)
+    """
+    def is_direct(self) -> bool:
+        return True
+
+    def get_direct_path(self) -> Optional[Path]:
+        return Path(os.devnull)
+
+    def write(self, data: bytes):
+        pass
+
+    def close(self, return_code: ReturnCode):
+        pass
+
+
+class DiscardLogPolicy(IRunLogPolicy):
+    """discards the output of the runs
+    """
+    def create_sink(self, run_id: RunId, filepath: Optional[Path]) -> IRunLogSink:
+        return NullLogSink()
+
+
+class RingBufferLogSink(IRunLogSink):
+    """keeps the last bytes of the output in memory, and writes them to a file only if the run fails
+    """
+    max_size: int  # the number of bytes kept
+    failure_filepath: Path
+    num_dropped_bytes: int  # the number of bytes of output that didn't fit in the buffer
+    _buffer: bytearray
+    _policy: 'RingBufferLogPolicy'
+
+    def __init__(self, policy: 'RingBufferLogPolicy', max_size: int, failure_filepath: Path):
+        self.max_size = max_size
+        self.failure_filepath = failure_filepath
+        self.num_dropped_bytes = 0
+        self._buffer = bytearray()
+        self._policy = policy
+
+    def write(self, data: bytes):
+        self._buffer += data
+        # trim the buffer lazily, so that each byte is moved a bounded number of times
+        if len(self._buffer) > 2 * self.max_size:
+            num_dropped_bytes = len(self._buffer) - self.max_size
+            del self._buffer[:num_dropped_bytes]
+            self.num_dropped_bytes += num_dropped_bytes
+
+    def close(self, return_code: ReturnCode):
+        if return_code == 0:
+            return
+        if len(self._buffer) > self.max_size:
+            self.num_dropped_bytes += len(self._buffer) - self.max_size
+            del self._buffer[:len(self._buffer) - self.max_size]
+        with open(self.failure_filepath, 'wb') as file:
+            if self.num_dropped_bytes != 0:
+                file.write(f'[starbench: the first {self.num_dropped_bytes} bytes of output have been dropped]\n'.encode('utf8'))
+            file.write(self._buffer)
+        self._policy.on_dump(self.failure_filepath)
+
+
+class RingBufferLogPolicy(IRunLogPolicy):
+    """keeps the end of the output of each run in memory, and only writes it (to a per-run file) when the run fails
+    """
+    max_size: int  # the number of bytes kept for each output stream of each run
+    dumped_filepaths: List[Path]  # the files written for the failed runs
+    _lock: threading.Lock
+
+    def __init__(self, max_size_kib: int = 64):
+        assert max_size_kib > 0
+        self.max_size = max_size_kib * 1024
+        self.dumped_filepaths = []
+        self._lock = threading.Lock()
+
+    def create_sink(self, run_id: RunId, filepath: Optional[Path]) -> IRunLogSink:
+        if filepath is None:
+            return FileLogSink(None)
+        return RingBufferLogSink(self, self.max_size, get_run_log_path(filepath, run_id))
+
+    def on_dump(self, filepath: Path):
+        with self._lock:
+            self.dumped_filepaths.append(filepath)
+
+    def get_report(self) -> Optional[str]:
+        return f'ring buffer logs : kept the last {self.max_size // 1024} KiB of each output, {len(self.dumped_filepaths)} written for failed runs'
+
+
+class CompressedLogSink(IRunLogSink):
+    """hands the output over to the writer thread of a CompressedLogPolicy
+    """
+    filepath: Path
+    _policy: 'CompressedLogPolicy'
+
+    def __init__(self, policy: 'CompressedLogPolicy', filepath: Path):
+        self.filepath = filepath
+        self._policy = policy
+
+    def write(self, data: bytes):
+        self._policy.submit(self, data)
+
+    def close(self, return_code: ReturnCode):
+        self._policy.submit(self, None)
+
+
+class CompressedLogPolicy(IRunLogPolicy):
+    """streams the output of each run to its own gzip file
+
+    the compression and the writes are performed by a single writer thread, bound to the cores that no worker uses (if known), so that they don't compete with the processes of the runs
+    """
+    compression_level: int
+    num_written_bytes: int  # the number of bytes of output written so far (before compression)
+    num_compressed_bytes: int  # the size of the files written so far
+    num_files: int
+    writer_cpu_time: DurationInSeconds  # the cpu time used by the writer thread
+    _queue: queue.Queue  # the chunks of output to write, (sink, data) (data is None when the output of the sink has ended)
+    _thread: Optional[threading.Thread]
+
+    def __init__(self, compression_level: int = 6, max_queued_chunks: int = 4096):
+        """
+        max_queued_chunks: the maximum number of chunks of output waiting for the writer. When it's reached, the reading threads wait, which bounds the memory used if the runs produce output faster than it can be compressed
+        """
+        assert 0 <= compression_level <= 9
+        self.compression_level = compression_level
+        self.num_written_bytes = 0
+        self.num_compressed_bytes = 0
+        self.num_files = 0
+        self.writer_cpu_time = 0.0
+        self._queue = queue.Queue(maxsize=max_queued_chunks)
+        self._thread = None
+
+    def start(self, log_cores: Optional[CoreSet]):
+        assert self._thread is None
+        self._thread = threading.Thread(target=self._write, args=(log_cores,), daemon=True)
+        self._thread.start()
+
+    def create_sink(self, run_id: RunId, filepath: Optional[Path]) -> IRunLogSink:
+        if filepath is None:
+            return FileLogSink(None)
+        return CompressedLogSink(self, get_run_log_path(filepath, run_id, '.gz'))
+
+    def submit(self, sink: CompressedLogSink, data: Optional[bytes]):
+        self._queue.put((sink, data))
+
+    def stop(self):
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def get_report(self) -> Optional[str]:
+        ratio = self.num_written_bytes / self.num_compressed_bytes if self.num_compressed_bytes != 0 else 0.0
+        return f'compressed logs : {self.num_files} files, {self.num_written_bytes / 1024.0:.1f} KiB of output compressed to {self.num_compressed_bytes / 1024.0:.1f} KiB (ratio {ratio:.1f}), {self.writer_cpu_time:.3f} s of cpu time in the writer thread'
+
+    def _write(self, log_cores: Optional[CoreSet]):
+        if log_cores is not None:
+            os.sched_setaffinity(0, log_cores)  # on linux, this only binds the calling thread
+        files: Dict[CompressedLogSink, Any] = {}
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            sink, data = item
+            if data is None:
+                file = files.pop(sink, None)
+                if file is None:
+                    # the run had no output
+                    file = gzip.open(sink.filepath, 'wb', compresslevel=self.compression_level)
+                file.close()
+                self.num_files += 1
+                self.num_compressed_bytes += sink.filepath.stat().st_size
+            else:
+                if sink not in files:
+                    files[sink] = gzip.open(sink.filepath, 'wb', compresslevel=self.compression_level)  # pylint: disable=consider-using-with
+                files[sink].write(data)
+                self.num_written_bytes += len(data)
+            self.writer_cpu_time = time.thread_time()
+        for file in files.values():
+            file.close()
+
+
+def create_log_policy(log_policy: str) -> IRunLogPolicy:
+    """creates a log policy from its textual description
+
+    log_policy: one of:
+    - 'file': each worker overwrites its output files at each run (the default)
+    - 'discard': the output is discarded
+    - 'ring[:<size in KiB>]': the last KiB of each output are kept in memory, and written to a per-run file only if the run fails (64 KiB by default)
+    - 'gzip[:<compression level>]': the output of each run is compressed to its own file by a writer thread
+    """
+    kind, _, parameter = log_policy.partition(':')
+    if kind in ['file', 'discard'] and not parameter:
+        return FileLogPolicy() if kind == 'file' else DiscardLogPolicy()
+    if kind in ['ring', 'gzip']:
+        if parameter and not parameter.isdigit():
+            raise StarBenchException(f'invalid log policy parameter: {log_policy} (expected an integer)')
+        if kind == 'ring':
+            max_size_kib = int(parameter) if parameter else 64
+            if max_size_kib == 0:
+                raise StarBenchException(f'invalid log policy parameter: {log_policy} (the size of the ring buffer must be positive)')
+            return RingBufferLogPolicy(max_size_kib)
+        compression_level = int(parameter) if parameter else 6
+        if compression_level > 9:
+            raise StarBenchException(f'invalid log policy parameter: {log_policy} (the compression level must be between 0 and 9)')
+        return CompressedLogPolicy(compression_level)
+    raise StarBenchException(f'unexpected log policy: {log_policy} (expected file, discard, ring[:<size in KiB>] or gzip[:<compression level>])')
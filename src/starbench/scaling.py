@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional, Tuple
+from .core import StarbenchResults, MeasurementsTable, StarBenchException
+
+ScalingPoint = Tuple[int, int]  # the number of parallel runs (workers) and the number of cores per run of a point of a scaling curve
+
+SCALING_COLUMNS = ['num_cores_per_run', 'num_parallel_runs', 'num_cores', 'num_runs', 'mean_duration', 'slowdown', 'throughput', 'speedup', 'efficiency']
+
+
+def get_default_worker_counts(max_num_workers: int) -> List[int]:
+    """returns the powers of 2 below max_num_workers, followed by max_num_workers (eg 1, 2, 4, 6 for 6)
+    """
+    worker_counts = []
+    num_workers = 1
+    while num_workers < max_num_workers:
+        worker_counts.append(num_workers)
+        num_workers *= 2
+    return worker_counts + [max_num_workers]
+
+
+def parse_int_list(int_list: str) -> List[int]:
+    """parses a comma separated list of positive integers (eg '1,2,4,8')
+    """
+    try:
+        values = [int(value) for value in int_list.split(',')]
+    except ValueError as err:
+        raise StarBenchException(f'invalid list of integers: {int_list} (expected eg 1,2,4)') from err
+    if any(value <= 0 for value in values):
+        raise StarBenchException(f'invalid list of integers: {int_list} (the values must be positive)')
+    return values
+
+
+def get_scaling_points(max_num_cores: int, cores_per_run: Optional[List[int]] = None, worker_counts: Optional[List[int]] = None) -> List[ScalingPoint]:
+    """returns the points of a scaling curve that fit in max_num_cores
+
+    cores_per_run: the numbers of cores per run to measure (one curve each). None means a single core per run
+    worker_counts: the numbers of parallel runs of each curve. None means 1, 2, 4, ... up to the number of runs that fill max_num_cores
+    """
+    points = []
+    for num_cores_per_run in sorted(set(cores_per_run or [1])):
+        max_num_workers = max_num_cores // num_cores_per_run
+        if max_num_workers == 0:
+            raise StarBenchException(f'{num_cores_per_run} cores per run don\'t fit in {max_num_cores} cores')
+        curve_worker_counts = get_default_worker_counts(max_num_workers) if worker_counts is None else sorted(set(num_workers for num_workers in worker_counts if num_workers <= max_num_workers))
+        if len(curve_worker_counts) == 0:
+            raise StarBenchException(f'none of the worker counts {worker_counts} fits in {max_num_cores} cores with {num_cores_per_run} cores per run')
+        points += [(num_workers, num_cores_per_run) for num_workers in curve_worker_counts]
+    return points
+
+
+def compute_scaling_table(points_results: Dict[ScalingPoint, StarbenchResults]) -> MeasurementsTable:
+    """summarizes the results of the points of scaling curves, one row per point (see SCALING_COLUMNS)
+
+    - slowdown: the mean duration of a run relative to the mean duration with a single run (with the same number of cores per run), ie the cost of the contention for shared resources (memory bandwidth, caches, frequency)
+    - throughput: the number of runs completed per second by all the workers
+    - speedup: the throughput relative to the throughput of the reference point (a single run with the fewest cores per run)
+    - efficiency: the speedup divided by the number of cores relative to the reference point (1.0 means perfect scaling)
+    the values that need a missing single run point are None
+    """
+    table = MeasurementsTable(list(SCALING_COLUMNS))
+    mean_durations = {point: results.get_average_duration() for point, results in points_results.items()}
+    reference_point = min(((num_workers, num_cores_per_run) for num_workers, num_cores_per_run in mean_durations.keys() if num_workers == 1), key=lambda point: point[1], default=None)
+    reference_throughput = 1.0 / mean_durations[reference_point] if reference_point is not None else None
+    for point in sorted(mean_durations.keys(), key=lambda point: (point[1], point[0])):
+        num_workers, num_cores_per_run = point
+        mean_duration = mean_durations[point]
+        throughput = num_workers / mean_duration
+        single_run_mean_duration = mean_durations.get((1, num_cores_per_run))
+        row = {
+            'num_cores_per_run': num_cores_per_run,
+            'num_parallel_runs': num_workers,
+            'num_cores': num_workers * num_cores_per_run,
+            'num_runs': points_results[point].get_num_runs(),
+            'mean_duration': mean_duration,
+            'slowdown': mean_duration / single_run_mean_duration if single_run_mean_duration is not None else None,
+            'throughput': throughput,
+            'speedup': None,
+            'efficiency': None}
+        if reference_throughput is not None:
+            row['speedup'] = throughput / reference_throughput
+            row['efficiency'] = row['speedup'] / (num_workers * num_cores_per_run / reference_point[1])
+        table.add_row(row)
+    return table
+
+
+def format_scaling_table(table: MeasurementsTable) -> str:
+    """returns the given scaling table (see compute_scaling_table) as human readable text
+    """
+    def format_value(value: Optional[float], format_spec: str) -> str:
+        return format(value, format_spec) if value is not None else '-'
+
+    lines = ['cores/run  runs  cores  mean duration  slowdown  throughput  speedup  efficiency']
+    for row in table.rows:
+        lines.append(f'{row["num_cores_per_run"]:9d}  {row["num_parallel_runs"]:4d}  {row["num_cores"]:5d}  {row["mean_duration"]:11.3f} s  {format_value(row["slowdown"], "8.3f")}  {row["throughput"]:6.3f} r/s  {format_value(row["speedup"], "7.3f")}  {format_value(row["efficiency"], "10.3f")}')
+    return '\n'.join(lines)
@@ -0,0 +1,198 @@
+from typing import Dict, List, Optional, Tuple, Any
+from pathlib import Path
+import http.server
+import json
+import math
+import threading
+import time
+from .core import ITelemetrySink, TelemetryEvent, WorkerId
+
+
+class JsonLinesTelemetrySink(ITelemetrySink):
+    """writes each event as a json object on its own line of a file, as soon as it happens (the file can be followed with tail -f)
+    """
+    file_path: Path
+    _file: Any
+    _lock: threading.Lock
+
+    def __init__(self, file_path: Path, append: bool = False):
+        self.file_path = file_path
+        self._file = open(file_path, 'at' if append else 'wt', encoding='utf8')  # pylint: disable=consider-using-with
+        self._lock = threading.Lock()
+
+    def on_event(self, event: TelemetryEvent):
+        line = json.dumps(event, default=str) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def escape_prometheus_label_value(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_prometheus_labels(labels: Dict[str, Any]) -> str:
+    if len(labels) == 0:
+        return ''
+    label_values = ','.join(f'{name}="{escape_prometheus_label_value(str(value))}"' for name, value in labels.items())
+    return f'{{{label_values}}}'
+
+
+def format_prometheus_value(value: float) -> str:
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class PrometheusTelemetrySink(ITelemetrySink):
+    """exposes the progress of the campaigns on a local http endpoint (/metrics), in the prometheus text format
+
+    the counters cover all the campaigns of this process (labelled by phase), the gauges cover the current campaign
+    """
+    _server: http.server.ThreadingHTTPServer
+    _thread: Optional[threading.Thread]
+    _lock: threading.Lock
+    _phase: str
+    _runs_started: Dict[str, int]  # the number of runs started in each phase
+    _runs_finished: Dict[str, int]  # the number of runs finished in each phase
+    _runs_failed: Dict[str, int]  # the number of runs that returned a non-zero code in each phase
+    _stop_decisions: Dict[Tuple[str, str], int]  # the number of stop decisions for each phase and reason
+    _campaign_start_time: Optional[float]
+    _running_stats: Dict[str, Any]  # the last running statistics of the current campaign
+    _worker_num_finished_runs: Dict[WorkerId, int]  # the number of runs finished by each worker in the current campaign
+
+    METRIC_DESCRIPTIONS = {
+        'starbench_runs_started_total': ('counter', 'the number of runs started'),
+        'starbench_runs_finished_total': ('counter', 'the number of runs finished'),
+        'starbench_runs_failed_total': ('counter', 'the number of runs that returned a non-zero code'),
+        'starbench_stop_decisions_total': ('counter', 'the number of decisions to stop or continue taken at the end of the runs'),
+        'starbench_running_runs': ('gauge', 'the number of runs currently running'),
+        'starbench_measured_runs': ('gauge', 'the number of measured runs of the current campaign'),
+        'starbench_duration_mean_seconds': ('gauge', 'the mean duration of the measured runs of the current campaign'),
+        'starbench_duration_stddev_seconds': ('gauge', 'the standard deviation of the duration of the measured runs of the current campaign'),
+        'starbench_duration_ci_half_width_seconds': ('gauge', 'the half width of the 95 % confidence interval of the mean duration of the current campaign'),
+        'starbench_metric_mean': ('gauge', 'the mean of each metric extracted from the output of the measured runs of the current campaign'),
+        'starbench_worker_finished_runs': ('gauge', 'the number of runs finished by each worker in the current campaign'),
+        'starbench_worker_throughput_runs_per_second': ('gauge', 'the number of runs finished per second by each worker since the start of the current campaign'),
+    }
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        """
+        port: the tcp port to listen on (0 means any free port, see get_address)
+        """
+        sink = self
+
+        class RequestHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):  # pylint: disable=invalid-name
+                if self.path.split('?')[0] not in ['/', '/metrics']:
+                    self.send_error(404)
+                    return
+                body = sink.get_metrics_text().encode('utf8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass  # don't pollute the output of starbench with the scrapes
+
+        self._server = http.server.ThreadingHTTPServer((host, port), RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = None
+        self._lock = threading.Lock()
+        self._phase = ''
+        self._runs_started = {}
+        self._runs_finished = {}
+        self._runs_failed = {}
+        self._stop_decisions = {}
+        self._campaign_start_time = None
+        self._running_stats = {}
+        self._worker_num_finished_runs = {}
+
+    def get_address(self) -> Tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def start(self):
+        """serves the scrapes from a background thread
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def on_event(self, event: TelemetryEvent):
+        phase = event['phase'] or ''
+        with self._lock:
+            self._phase = phase
+            if event['event'] == 'campaign_started':
+                self._campaign_start_time = event['time']
+                self._running_stats = {}
+                self._worker_num_finished_runs = {}
+            elif event['event'] == 'run_started':
+                self._runs_started[phase] = self._runs_started.get(phase, 0) + 1
+            elif event['event'] == 'run_finished':
+                self._runs_finished[phase] = self._runs_finished.get(phase, 0) + 1
+                if event['return_code'] != 0:
+                    self._runs_failed[phase] = self._runs_failed.get(phase, 0) + 1
+                self._worker_num_finished_runs[event['worker_id']] = self._worker_num_finished_runs.get(event['worker_id'], 0) + 1
+            elif event['event'] == 'running_stats':
+                self._running_stats = event
+            elif event['event'] == 'stop_decision':
+                key = (phase, event['reason'])
+                self._stop_decisions[key] = self._stop_decisions.get(key, 0) + 1
+
+    def get_samples(self) -> List[Tuple[str, Dict[str, Any], float]]:
+        """returns the current value of each metric, as (metric name, labels, value)
+        """
+        samples = []
+        with self._lock:
+            for metric_name, counts in [('starbench_runs_started_total', self._runs_started), ('starbench_runs_finished_total', self._runs_finished), ('starbench_runs_failed_total', self._runs_failed)]:
+                for phase, count in counts.items():
+                    samples.append((metric_name, {'phase': phase}, count))
+            for (phase, reason), count in self._stop_decisions.items():
+                samples.append(('starbench_stop_decisions_total', {'phase': phase, 'reason': reason}, count))
+            # the runs whose process could not be started finish without having started
+            num_running_runs = max(0, sum(self._runs_started.values()) - sum(self._runs_finished.values()))
+            samples.append(('starbench_running_runs', {'phase': self._phase}, num_running_runs))
+            stats = self._running_stats
+            if len(stats) != 0:
+                samples.append(('starbench_measured_runs', {'phase': self._phase}, stats['num_runs']))
+                samples.append(('starbench_duration_mean_seconds', {'phase': self._phase}, stats['mean_duration']))
+                if 'stddev' in stats:
+                    samples.append(('starbench_duration_stddev_seconds', {'phase': self._phase}, stats['stddev']))
+                    samples.append(('starbench_duration_ci_half_width_seconds', {'phase': self._phase}, stats['ci_half_width']))
+                for metric, mean in stats['metrics'].items():
+                    samples.append(('starbench_metric_mean', {'phase': self._phase, 'metric': metric}, mean))
+            if self._campaign_start_time is not None:
+                elapsed_time = max(time.time() - self._campaign_start_time, 1.0e-9)
+                for worker_id, num_finished_runs in sorted(self._worker_num_finished_runs.items()):
+                    samples.append(('starbench_worker_finished_runs', {'phase': self._phase, 'worker': worker_id}, num_finished_runs))
+                    samples.append(('starbench_worker_throughput_runs_per_second', {'phase': self._phase, 'worker': worker_id}, num_finished_runs / elapsed_time))
+        return samples
+
+    def get_metrics_text(self) -> str:
+        """returns the current value of the metrics in the prometheus text exposition format
+        """
+        samples_by_metric = {}
+        for metric_name, labels, value in self.get_samples():
+            samples_by_metric.setdefault(metric_name, []).append((labels, value))
+        lines = []
+        for metric_name, (metric_type, description) in PrometheusTelemetrySink.METRIC_DESCRIPTIONS.items():
+            if metric_name not in samples_by_metric:
+                continue
+            lines.append(f'# HELP {metric_name} {description}')
+            lines.append(f'# TYPE {metric_name} {metric_type}')
+            for labels, value in samples_by_metric[metric_name]:
+                lines.append(f'{metric_name}{format_prometheus_labels(labels)} {format_prometheus_value(value)}')
+        return '\n'.join(lines) + '\n'
@@ -1,9 +1,49 @@
 import unittest
 import logging
+import array
+import gzip
+import json
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
 from pathlib import Path
+from datetime import datetime
 # from cocluto import ClusterController
-from starbench.main import starbench_cmake_app
+from starbench.main import starbench_cmake_app, benchmark_cmake_app_workers, starbench_cmake_app_matrix, starbench_cmake_app_scaling, compare_main, get_between_builds_command, get_noise_file_path, get_tests_file_path
 from starbench.existingdir import ExistingDir
+from starbench.gitcloner import GitCloner
+from starbench.passwordfile import LocalFilePP
+from starbench.core import StarbenchResults, MeasurementsTable, CommandPerfEstimator, StopAfterSingleRun, IStarBencherStopCondition, EventLoopRunSupervisor, RunVariant, Run, RunStore, RunningStats, StopOnRelativeConfidenceInterval, student_t_quantile, StarBenchException, Telemetry, StopAfterFixedNumRuns
+from starbench.buildcache import BuildCache
+from starbench.coreplacement import CpuTopology, LogicalCpu, PackedCorePlacer, SpreadCorePlacer, ExplicitCorePlacer, parse_core_list, create_core_placer
+from starbench.matrix import CampaignMatrix
+from starbench.history import ResultsHistory, CampaignInfo
+from starbench.outliers import MadOutlierFilter, IqrOutlierFilter
+from starbench.perfbisect import CommitBenchmarker, bisect_slowdown, sweep_commits
+from starbench.procsampler import ProcSampler, write_timelines, read_timelines, get_timelines_file_path
+from starbench.noisemonitor import SystemNoiseMonitor, FOREIGN_LOAD
+from starbench.remote import RunAgent, RemoteRunSupervisor, estimate_clock_offset
+from starbench.metrics import create_metric_extractor
+from starbench.runlogs import create_log_policy, get_run_log_path
+from starbench.telemetry import JsonLinesTelemetrySink, PrometheusTelemetrySink
+from starbench.scaling import get_scaling_points, compute_scaling_table
+from starbench.repeat import run_iterations
+from starbench.ctest import CtestTestTimesCollector, StopWhenTestsConverged, compute_test_stats_table
+
+
+class StopAfterNumRuns(IStarBencherStopCondition):
+    def __init__(self, num_runs: int):
+        self.num_runs = num_runs
+        self._num_finished_runs = 0
+
+    def should_stop(self, star_bencher: CommandPerfEstimator) -> bool:
+        self._num_finished_runs += 1
+        return self._num_finished_runs >= self.num_runs
 
 
 class StarbenchTestCase(unittest.TestCase):
@@ -18,6 +58,634 @@ class StarbenchTestCase(unittest.TestCase):
         output_measurements_file_path = tmp_dir / 'measurements.tsv'
         starbench_cmake_app(source_code_provider=source_code_provider, output_measurements_file_path=output_measurements_file_path, tmp_dir=tmp_dir, num_cores=2, benchmark_command=benchmark_command)
         # self.assertIsInstance(job_state, JobsState)
+        measurements = StarbenchResults(output_measurements_file_path)
+        self.assertEqual(measurements.get_num_runs(), 2)
+        self.assertEqual(len(measurements.resource_usages), 2)
+
+    def test_core_placement(self):
+        logging.info('test_core_placement')
+        # 2 sockets of 2 cores with 2 hardware threads each
+        cpus = []
+        for cpu_id in range(8):
+            package_id = (cpu_id // 2) % 2
+            cpus.append(LogicalCpu(cpu_id, package_id=package_id, core_id=cpu_id % 2, numa_node_id=package_id, smt_rank=cpu_id // 4))
+        topology = CpuTopology(cpus)
+        self.assertEqual(PackedCorePlacer(topology).get_worker_cores(num_cores_per_run=2, num_workers=2), {0: [0, 1], 1: [2, 3]})
+        self.assertEqual(SpreadCorePlacer(topology).get_worker_cores(num_cores_per_run=1, num_workers=4), {0: [0], 1: [2], 2: [1], 3: [3]})
+
+        # malformed explicit maps are reported as StarBenchException
+        self.assertEqual(parse_core_list('0-3,8,10-11'), [0, 1, 2, 3, 8, 10, 11])
+        for placement in ['map:', 'map:0-', 'map:a', 'map:0,,1', 'map:3-1', 'map:0,0', 'map:0-2,1']:
+            with self.assertRaises(StarBenchException, msg=placement):
+                create_core_placer(placement)
+        unavailable_core_id = max(os.sched_getaffinity(0)) + 1
+        with self.assertRaises(StarBenchException):
+            create_core_placer(f'map:{unavailable_core_id}').get_worker_cores(num_cores_per_run=1, num_workers=1)
+
+        # check that the process of each run is actually bound to the cores of its worker
+        core_id = min(CpuTopology.from_sysfs().get_sorted_cpus(), key=lambda cpu: cpu.id).id
+        check_affinity = f'import os; assert os.sched_getaffinity(0) == {{{core_id}}}; assert os.environ["OMP_PLACES"] == "{{{core_id}}}"'
+        bench = CommandPerfEstimator(run_command=[sys.executable, '-c', check_affinity], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterSingleRun(), run_command_cwd=Path('/tmp'), core_placer=ExplicitCorePlacer({0: [core_id]}))
+        self.assertEqual(bench.run().get_num_runs(), 1)
+
+    def test_event_loop_supervisor(self):
+        logging.info('test_event_loop_supervisor')
+        bench = CommandPerfEstimator(run_command=['true'], num_cores_per_run=1, num_parallel_runs=2, max_num_cores=2, stop_condition=StopAfterNumRuns(10), run_command_cwd=Path('/tmp'), supervisor=EventLoopRunSupervisor())
+        results = bench.run()
+        # each of the 2 workers finishes its last run after the stop condition has been met
+        self.assertEqual(results.get_num_runs(), 11)
+        relaunch_latencies = bench.get_relaunch_latencies()
+        self.assertEqual(sum(len(latencies) for latencies in relaunch_latencies.values()), 9)
+
+    def test_run_store(self):
+        logging.info('test_run_store')
+        run_store = RunStore()
+        num_runs = 20000
+        for run_id in reversed(range(num_runs)):
+            run = Run(run_id, worker_id=run_id % 4, is_warmup=run_id < 4, variant='AB'[run_id % 2])
+            run.end_ns = run.start_ns + 1000000
+            if run_id % 1000 == 0:
+                run.metrics = {'gflops': 10.0}
+            run_store.add_run(run)
+        # the memory per run doesn't depend on the number of runs
+        arrays = [value for value in vars(run_store).values() if isinstance(value, array.array)] + list(run_store.resource_usages.values()) + list(run_store.metrics.values())
+        self.assertLess(sum(len(values) * values.itemsize for values in arrays) / num_runs, 150)
+        results = run_store.to_results()
+        self.assertEqual(list(results.durations.keys()), list(range(4, num_runs)))
+        self.assertEqual(len(results.warmup_durations), 4)
+        self.assertAlmostEqual(results.get_average_duration(), 0.001)
+        self.assertEqual(results.get_variant_results('B').get_num_runs(), num_runs // 2 - 2)
+        self.assertEqual(len(results.metrics), num_runs // 1000)
+        self.assertEqual(results.resource_usages, {})
+
+    def test_synchronized_start(self):
+        logging.info('test_synchronized_start')
+        # worker 1 starts 10 us after worker 0 and ends 10 us before it, so the steady state goes from 10 to 190 us
+        run_store = RunStore()
+        for run_id, worker_id, start_ns, end_ns in [(0, 0, 0, 100000), (1, 1, 10000, 110000), (2, 0, 100000, 200000), (3, 1, 110000, 190000)]:
+            run = Run(run_id, worker_id)
+            run.start_ns, run.end_ns = start_ns, end_ns
+            run_store.add_run(run)
+        run_store.set_start_skews()
+        run_store.tag_ramp_runs()
+        self.assertEqual(run_store.start_skews, {0: 0.0, 1: 10.0e-6})
+        self.assertEqual(run_store.ramp_run_ids, {0, 2})
+        self.assertEqual(sorted(run_store.to_results(exclude_ramp_runs=True).get_filtered_durations().keys()), [1, 3])
+        # the first runs are held at the barrier, which is left out of their duration
+        bench = CommandPerfEstimator(run_command=['sleep', '0.1'], num_cores_per_run=1, num_parallel_runs=3, max_num_cores=3, stop_condition=StopAfterFixedNumRuns(3), run_command_cwd=Path('/tmp'), synchronized_start=True)
+        results = bench.run()
+        self.assertEqual(sorted(results.start_skews.keys()), [0, 1, 2])
+        self.assertTrue(all(0.0 <= start_skew < 0.1 for start_skew in results.start_skews.values()))
+        self.assertLess(max(results.durations[run_id] for run_id in range(3)), 0.2)
+        self.assertEqual(len(results.is_ramp), results.get_num_runs())
+        measurements_file_path = Path('/tmp/starbench-test-synchronized-start.tsv')
+        measurements = MeasurementsTable()
+        measurements.add_results('benchmark', results)
+        measurements.write_tsv(measurements_file_path)
+        read_results = StarbenchResults(measurements_file_path)
+        self.assertEqual(read_results.start_skews.keys(), results.start_skews.keys())
+        self.assertEqual(read_results.is_ramp, results.is_ramp)
+
+    def test_warmup_and_interleaved_runs(self):
+        logging.info('test_warmup_and_interleaved_runs')
+        variants = [RunVariant('A', ['true'], Path('/tmp')), RunVariant('B', ['sleep', '0.01'], Path('/tmp'), env_vars={'STARBENCH_VARIANT': 'B'})]
+        bench = CommandPerfEstimator(run_command=['false'], num_cores_per_run=1, num_parallel_runs=2, max_num_cores=2, stop_condition=StopAfterNumRuns(3), run_command_cwd=Path('/tmp'), num_warmup_runs=1, variants=variants)
+        results = bench.run()
+        # each worker warms up with each variant, then alternates A and B until the stop condition is met
+        self.assertEqual(len(results.warmup_durations), 4)
+        self.assertEqual(results.get_variant_results('A').get_num_runs(), results.get_variant_results('B').get_num_runs())
+        self.assertGreaterEqual(results.get_num_runs(), 6)
+        self.assertGreater(results.get_variant_results('B').get_median_duration(), results.get_variant_results('A').get_median_duration())
+        self.assertEqual(bench.get_running_stats().num_values, results.get_variant_results('A').get_num_runs())
+
+    def test_outlier_filters(self):
+        logging.info('test_outlier_filters')
+        values = [1.00, 1.02, 0.99, 1.01, 1.03, 0.98, 1.00, 2.50]
+        for outlier_filter in [MadOutlierFilter(), IqrOutlierFilter()]:
+            self.assertEqual(outlier_filter.get_outlier_mask(values), [False] * 7 + [True])
+        results = StarbenchResults(outlier_filter=MadOutlierFilter())
+        for run_id, value in enumerate(values):
+            results.add_measurement(run_id, value)
+        self.assertEqual(results.get_outlier_run_ids(), [7])
+        self.assertLess(results.get_duration_range()[1], 1.1)
+        self.assertEqual(results.get_num_runs(), 8)
+
+    def test_resource_usage(self):
+        logging.info('test_resource_usage')
+        # a command that spends about 0.2 s in user mode
+        burn_cpu = 'import time\nstart = time.process_time()\nwhile time.process_time() - start < 0.2:\n    pass'
+        bench = CommandPerfEstimator(run_command=[sys.executable, '-c', burn_cpu], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterSingleRun(), run_command_cwd=Path('/tmp'), supervisor=EventLoopRunSupervisor())
+        results = bench.run()
+        resource_usage = results.resource_usages[0]
+        self.assertGreaterEqual(resource_usage.user_time + resource_usage.system_time, 0.2)
+        self.assertGreaterEqual(results.durations[0], 0.2)
+        self.assertGreater(resource_usage.max_rss, 0)
+
+    def test_proc_sampler(self):
+        logging.info('test_proc_sampler')
+        # a shell that burns cpu in a child process, so that the sampler has to walk the process tree
+        burn_cpu = f'{sys.executable} -c "import time\nstart = time.process_time()\nwhile time.process_time() - start < 0.3:\n    pass"; true'
+        sampler = ProcSampler(sampling_period=0.02, max_overhead=0.5)
+        bench = CommandPerfEstimator(run_command=['sh', '-c', burn_cpu], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterSingleRun(), run_command_cwd=Path('/tmp'), sampler=sampler)
+        results = bench.run()
+        timeline = results.timelines[0]
+        self.assertGreater(timeline.get_num_samples(), 3)
+        self.assertEqual(max(timeline.num_processes), 2)
+        self.assertGreater(timeline.get_max_rss(), 0)
+        self.assertGreater(max(timeline.cpu_time), 0.1)
+        self.assertGreater(sampler.num_sweeps, 0)
+        timelines_file_path = Path('/tmp/starbench-test-timelines.jsonl')
+        write_timelines(results.timelines, timelines_file_path)
+        self.assertEqual(list(read_timelines(timelines_file_path)[0].rss), list(timeline.rss))
+
+    def test_noise_monitor(self):
+        logging.info('test_noise_monitor')
+        # an orphan process (outside the benchmark process tree) that burns cpu for 1 s
+        burn_cpu = f'{sys.executable} -c "import time\nstart = time.process_time()\nwhile time.process_time() - start < 1.0:\n    pass" &'
+        subprocess.run(['sh', '-c', burn_cpu], check=True)
+        noise_monitor = SystemNoiseMonitor(sampling_period=0.1)
+        bench = CommandPerfEstimator(run_command=['sleep', '0.3'], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterSingleRun(), run_command_cwd=Path('/tmp'), noise_monitor=noise_monitor, contaminated_run_policy='requeue')
+        results = bench.run()
+        # the contaminated runs are requeued until a clean run is obtained
+        self.assertIn(FOREIGN_LOAD, results.interferences[0])
+        self.assertGreater(results.get_num_runs(), 1)
+        self.assertEqual(list(results.get_filtered_durations().keys()), [results.get_num_runs() - 1])
+        self.assertEqual(results.interferences[results.get_num_runs() - 1], [])
+        measurements = MeasurementsTable()
+        measurements.add_results('benchmark', results)
+        self.assertEqual(measurements.rows[-1]['interferences'], '')
+        self.assertGreater(len(noise_monitor.get_samples_table().rows), 3)
+
+    def test_remote_agents(self):
+        logging.info('test_remote_agents')
+        agents = [RunAgent('secret'), RunAgent('secret')]
+        for agent in agents:
+            agent.start()
+        try:
+            # a coordinator that doesn't know the token can't run anything
+            marker_file_path = Path('tmp/remote_agents/marker').absolute()
+            shutil.rmtree(marker_file_path.parent, ignore_errors=True)
+            marker_file_path.parent.mkdir(parents=True)
+            bench = CommandPerfEstimator(run_command=['touch', str(marker_file_path)], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterSingleRun(), run_command_cwd=Path('/tmp'), supervisor=RemoteRunSupervisor([agents[0].get_address()], 'wrong secret'))
+            with self.assertRaises(StarBenchException):
+                bench.run()
+            with socket.create_connection(agents[0].get_address()) as sock:
+                sock.sendall(json.dumps({'type': 'run', 'run_id': 0, 'command': ['touch', str(marker_file_path)], 'cwd': '/tmp', 'env': {}, 'stdout': None, 'stderr': None, 'core_set': None}).encode('utf8') + b'\n')
+                while sock.recv(4096) != b'':
+                    pass
+            self.assertFalse(marker_file_path.exists())
+            supervisor = RemoteRunSupervisor([agent.get_address() for agent in agents], 'secret')
+            bench = CommandPerfEstimator(run_command=['sh', '-c', 'sleep 0.05; test "$OMP_NUM_THREADS" = 1'], num_cores_per_run=1, num_parallel_runs=4, max_num_cores=4, stop_condition=StopAfterNumRuns(8), run_command_cwd=Path('/tmp'), supervisor=supervisor)
+            results = bench.run()
+            # the stop condition is evaluated globally: the workers of both agents stop after 8 runs in total
+            self.assertEqual(results.get_num_runs(), 11)
+            self.assertGreaterEqual(min(results.durations.values()), 0.05)
+            self.assertLess(max(results.durations.values()), 1.0)
+            self.assertTrue(all(resource_usage.max_rss > 0 for resource_usage in results.resource_usages.values()))
+        finally:
+            for agent in agents:
+                agent.shutdown()
+        # the options that watch the runs from the coordinator's node are rejected with agents
+        for local_only_kwargs in [{'sampling_period': 0.01}, {'noise_monitor': SystemNoiseMonitor()}]:
+            with self.assertRaises(StarBenchException):
+                benchmark_cmake_app_workers(Path('/tmp'), 1, ['true'], agents=[('127.0.0.1', 1)], agent_token='secret', **local_only_kwargs)
+        # the offset of a remote clock is estimated from the query with the shortest round trip
+        offset, round_trip = estimate_clock_offset(lambda: time.monotonic_ns() + 5_000_000_000)
+        self.assertLess(abs(offset - 5_000_000_000), round_trip)
+
+    def test_metric_extraction(self):
+        logging.info('test_metric_extraction')
+        # a benchmark that prints its figure of merit several times (the last value is kept), with a tiny run to run variation
+        print_gflops = 'import random, sys\nfor _ in range(3):\n    print(f"perf: {random.uniform(99.9, 100.1)} GFLOPS", flush=True)\nprint("Test #1: mamul1_quick ...   Passed    0.25 sec")\nsys.stdout.buffer.write(b"\\xff\\n")'
+        stop_condition = StopOnRelativeConfidenceInterval(max_relative_half_width=0.01, min_num_runs=3, max_num_runs=20, metric='gflops')
+        metric_extractor = create_metric_extractor(['gflops', 'ctest-test-times', 'loops=loop ([0-9]+)'])
+        stdout_filepath = Path('/tmp/starbench-test-metrics-stdout.txt')
+        bench = CommandPerfEstimator(run_command=[sys.executable, '-c', print_gflops], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=stop_condition, run_command_cwd=Path('/tmp'), stdout_filepath=stdout_filepath, metric_extractors=[metric_extractor])
+        results = bench.run()
+        # the precision of the metric is reached as soon as the minimum number of runs is
+        self.assertEqual(results.get_num_runs(), 3)
+        self.assertAlmostEqual(statistics.mean(results.get_metric_values('gflops').values()), 100.0, delta=0.1)
+        self.assertEqual(results.metrics[0]['ctest_test_time.mamul1_quick'], 0.25)
+        self.assertNotIn('loops', results.metrics[0])
+        # the output is still written to the stdout file
+        self.assertIn(b'GFLOPS', stdout_filepath.read_bytes())
+        measurements = MeasurementsTable()
+        measurements.add_results('benchmark', results)
+        self.assertIn('metric_gflops', measurements.columns)
+        measurements_file_path = Path('/tmp/starbench-test-metrics.tsv')
+        measurements.write_tsv(measurements_file_path)
+        self.assertEqual(StarbenchResults(measurements_file_path).metrics, results.metrics)
+
+    def test_log_policies(self):
+        logging.info('test_log_policies')
+        log_dir = Path('/tmp/starbench-test-logs')
+        shutil.rmtree(log_dir, ignore_errors=True)
+        log_dir.mkdir()
+        stdout_filepath, stderr_filepath = log_dir / 'stdout.txt', log_dir / 'stderr.txt'
+        # a chatty benchmark whose third run fails
+        chatty_command = 'import os, sys\nfor i in range(10000):\n    print(f"line {i}")\nprint("error", file=sys.stderr)\nsys.exit(1 if os.path.exists("fail") else 0)'
+        for log_policy in ['discard', 'ring:4', 'gzip']:
+            (log_dir / 'fail').unlink(missing_ok=True)
+            bench = CommandPerfEstimator(run_command=[sys.executable, '-c', chatty_command], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterNumRuns(2), run_command_cwd=log_dir, stdout_filepath=stdout_filepath, stderr_filepath=stderr_filepath, log_policy=create_log_policy(log_policy))
+            self.assertEqual(bench.run().get_num_runs(), 2)
+        self.assertFalse(stdout_filepath.exists())
+        # the compressed logs of all runs are kept
+        with gzip.open(get_run_log_path(stdout_filepath, 0, '.gz'), 'rb') as log_file:
+            self.assertEqual(len(log_file.read().splitlines()), 10000)
+        self.assertTrue(get_run_log_path(stderr_filepath, 1, '.gz').exists())
+        # the ring buffer is only written when a run fails, and only holds the end of the output
+        self.assertFalse(get_run_log_path(stdout_filepath, 0).exists())
+        (log_dir / 'fail').touch()
+        bench = CommandPerfEstimator(run_command=[sys.executable, '-c', chatty_command], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterNumRuns(2), run_command_cwd=log_dir, stdout_filepath=stdout_filepath, stderr_filepath=stderr_filepath, log_policy=create_log_policy('ring:4'))
+        with self.assertRaises(StarBenchException):
+            bench.run()
+        failed_log = get_run_log_path(stdout_filepath, 0).read_text(encoding='utf8')
+        self.assertTrue(failed_log.startswith('[starbench: the first'))
+        self.assertTrue(failed_log.endswith('line 9999\n'))
+        self.assertLessEqual(len(failed_log.encode('utf8')), 4 * 1024 + 100)
+        self.assertEqual(get_run_log_path(stderr_filepath, 0).read_text(encoding='utf8'), 'error\n')
+
+    def test_fast_launch(self):
+        logging.info('test_fast_launch')
+        stdout_filepath = Path('/tmp/starbench-test-fast-launch-stdout.txt')
+        core_id = min(CpuTopology.from_sysfs().get_sorted_cpus(), key=lambda cpu: cpu.id).id
+        check_affinity = f'import os; assert os.sched_getaffinity(0) == {{{core_id}}}; print("iteration")'
+        bench = CommandPerfEstimator(run_command=[sys.executable, '-c', check_affinity], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopAfterNumRuns(3), run_command_cwd=Path('/tmp'), stdout_filepath=stdout_filepath, core_placer=ExplicitCorePlacer({0: [core_id]}), supervisor=EventLoopRunSupervisor(), fast_launch=True, num_iterations_per_run=4)
+        results = bench.run()
+        self.assertEqual(results.get_num_runs(), 3)
+        for run_id, iteration_durations in results.iteration_durations.items():
+            self.assertEqual(len(iteration_durations), 4)
+            self.assertAlmostEqual(results.metrics[run_id]['iteration_duration'] * 4 + results.metrics[run_id]['launch_overhead'], results.durations[run_id])
+        # the output file is opened once, so it holds the output of all the iterations of all the runs
+        self.assertEqual(stdout_filepath.read_text(encoding='utf8').count('iteration'), 12)
+        measurements = MeasurementsTable()
+        measurements.add_results('benchmark', results)
+        measurements_file_path = Path('/tmp/starbench-test-fast-launch.tsv')
+        measurements.write_tsv(measurements_file_path)
+        self.assertEqual(StarbenchResults(measurements_file_path).iteration_durations, results.iteration_durations)
+        # the iterations stop at the first failure, whose status is decoded like the shells do
+        return_code, durations = run_iterations(3, ['sh', '-c', 'exit 3'])
+        self.assertEqual((return_code, len(durations)), (3, 1))
+        self.assertEqual(run_iterations(2, ['sh', '-c', 'kill -9 $$'])[0], -9)
+
+    def test_telemetry(self):
+        logging.info('test_telemetry')
+        telemetry_file_path = Path('/tmp/starbench-test-telemetry.jsonl')
+        json_sink = JsonLinesTelemetrySink(telemetry_file_path)
+        prometheus_sink = PrometheusTelemetrySink()
+        prometheus_sink.start()
+        telemetry = Telemetry()
+        telemetry.add_sink(json_sink)
+        telemetry.add_sink(prometheus_sink)
+        try:
+            telemetry.set_phase('benchmark')
+            bench = CommandPerfEstimator(run_command=['sleep', '0.01'], num_cores_per_run=1, num_parallel_runs=2, max_num_cores=2, stop_condition=StopOnRelativeConfidenceInterval(max_relative_half_width=0.0, min_num_runs=2, max_num_runs=4), run_command_cwd=Path('/tmp'), num_warmup_runs=1)
+            results = bench.run()
+            host, port = prometheus_sink.get_address()
+            with urllib.request.urlopen(f'http://{host}:{port}/metrics') as response:
+                metrics_text = response.read().decode('utf8')
+        finally:
+            telemetry.remove_sink(json_sink)
+            telemetry.remove_sink(prometheus_sink)
+            json_sink.close()
+            prometheus_sink.shutdown()
+        events = [json.loads(line) for line in telemetry_file_path.read_text(encoding='utf8').splitlines()]
+        event_types = [event['event'] for event in events]
+        self.assertEqual(event_types[0], 'phase')
+        self.assertEqual(event_types[1], 'campaign_started')
+        self.assertEqual(event_types[-1], 'campaign_finished')
+        num_runs = results.get_num_runs() + len(results.warmup_durations)
+        self.assertEqual(event_types.count('run_started'), num_runs)
+        self.assertEqual(event_types.count('run_finished'), num_runs)
+        self.assertEqual(event_types.count('stop_decision'), num_runs)
+        self.assertEqual(event_types.count('running_stats'), results.get_num_runs())
+        self.assertTrue(all(event['phase'] == 'benchmark' for event in events))
+        self.assertEqual(sorted(event['reason'] for event in events if event['event'] == 'stop_decision' and event['reason'] == 'warmup'), ['warmup', 'warmup'])
+        last_stats = [event for event in events if event['event'] == 'running_stats'][-1]
+        self.assertEqual(last_stats['num_runs'], results.get_num_runs())
+        self.assertIn('ci_half_width', last_stats)
+        self.assertIn(f'starbench_runs_finished_total{{phase="benchmark"}} {num_runs}', metrics_text)
+        self.assertIn('# TYPE starbench_duration_mean_seconds gauge', metrics_text)
+        self.assertIn('starbench_worker_throughput_runs_per_second{phase="benchmark",worker="1"}', metrics_text)
+
+    def test_scaling_table(self):
+        logging.info('test_scaling_table')
+        self.assertEqual(get_scaling_points(6), [(1, 1), (2, 1), (4, 1), (6, 1)])
+        self.assertEqual(get_scaling_points(8, cores_per_run=[2, 1], worker_counts=[1, 4, 8]), [(1, 1), (4, 1), (8, 1), (1, 2), (4, 2)])
+        with self.assertRaises(StarBenchException):
+            get_scaling_points(4, cores_per_run=[8])
+        # a memory bound benchmark: the runs slow down when more of them share the memory bandwidth
+        mean_durations = {(1, 1): 1.0, (2, 1): 1.0, (4, 1): 1.6, (1, 2): 0.6, (2, 2): 0.8}
+        points_results = {}
+        for point, mean_duration in mean_durations.items():
+            results = StarbenchResults()
+            for run_id, duration in enumerate([mean_duration * 0.9, mean_duration * 1.1]):
+                results.add_measurement(run_id, duration)
+            points_results[point] = results
+        rows = {(row['num_parallel_runs'], row['num_cores_per_run']): row for row in compute_scaling_table(points_results).rows}
+        self.assertAlmostEqual(rows[(2, 1)]['efficiency'], 1.0)
+        self.assertAlmostEqual(rows[(4, 1)]['slowdown'], 1.6)
+        self.assertAlmostEqual(rows[(4, 1)]['throughput'], 2.5)
+        self.assertAlmostEqual(rows[(4, 1)]['efficiency'], 2.5 / 4)
+        self.assertAlmostEqual(rows[(2, 2)]['slowdown'], 0.8 / 0.6)
+        self.assertAlmostEqual(rows[(2, 2)]['speedup'], 2.5)
+        self.assertAlmostEqual(rows[(2, 2)]['efficiency'], 2.5 / 4)
+
+    def test_scaling_campaign(self):
+        logging.info('test_scaling_campaign')
+        source_code_provider = ExistingDir(Path('test/mamul1').absolute())
+        tmp_dir = Path('tmp/scaling').absolute()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        measurements_file_path = tmp_dir / 'measurements.tsv'
+        history = ResultsHistory(tmp_dir / 'history.sqlite')
+        starbench_cmake_app_scaling(source_code_provider, measurements_file_path, tmp_dir / 'campaign', num_cores=2, benchmark_command=['./mamul1', '100', '1'], sampling_period=0.01, monitor_noise=True, history=history, campaign_metadata={'nightly': '1'})
+        # the options of the campaigns are applied to each point
+        self.assertEqual(MeasurementsTable.read_tsv(tmp_dir / 'measurements-scaling.tsv').get_column('num_parallel_runs'), [1, 2])
+        timelines = [json.loads(line) for line in get_timelines_file_path(measurements_file_path).read_text(encoding='utf8').splitlines()]
+        self.assertEqual([(timeline['num_parallel_runs'], timeline['run_id']) for timeline in timelines], [(1, 0), (2, 0), (2, 1)])
+        self.assertIn('num_parallel_runs', MeasurementsTable.read_tsv(get_noise_file_path(measurements_file_path)).columns)
+        self.assertEqual(StarbenchResults.from_history(history, metadata={'nightly': '1', 'num_parallel_runs': 2}).get_num_runs(), 2)
+        with self.assertRaises(StarBenchException):
+            starbench_cmake_app_scaling(source_code_provider, measurements_file_path, tmp_dir / 'campaign', num_cores=2, benchmark_command=['./mamul1', '100', '1'], interleaved_benchmark_command=['./mamul1', '200', '1'])
+
+    def test_confidence_interval_stop_condition(self):
+        logging.info('test_confidence_interval_stop_condition')
+        values = [1.0, 1.5, 0.75, 1.25, 2.0]
+        stats = RunningStats()
+        for value in values:
+            stats.add_value(value)
+        self.assertAlmostEqual(stats.mean, statistics.mean(values))
+        self.assertAlmostEqual(stats.get_stddev(), statistics.stdev(values))
+        self.assertAlmostEqual(student_t_quantile(0.975, 4), 2.776, places=2)
+        self.assertAlmostEqual(student_t_quantile(0.975, 30), 2.042, places=3)
+
+        # a relative precision of 50 % is reached as soon as the minimum number of runs is reached
+        bench = CommandPerfEstimator(run_command=['sleep', '0.01'], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopOnRelativeConfidenceInterval(max_relative_half_width=0.5, min_num_runs=3), run_command_cwd=Path('/tmp'))
+        self.assertEqual(bench.run().get_num_runs(), 3)
+        # an unreachable precision stops on the maximum number of runs
+        bench = CommandPerfEstimator(run_command=['true'], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=StopOnRelativeConfidenceInterval(max_relative_half_width=0.0, min_num_runs=3, max_num_runs=6), run_command_cwd=Path('/tmp'))
+        self.assertEqual(bench.run().get_num_runs(), 6)
+
+    def test_build_cache(self):
+        logging.info('test_build_cache')
+        source_code_provider = ExistingDir(Path('test/mamul1').absolute())
+        tmp_dir = Path('tmp/build_cache').absolute()
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        build_cache = BuildCache(tmp_dir / 'cache')
+        for expected_num_hits in [0, 1]:
+            starbench_cmake_app(source_code_provider=source_code_provider, output_measurements_file_path=tmp_dir / 'measurements.tsv', tmp_dir=tmp_dir / 'campaign', num_cores=2, benchmark_command=['./mamul1', '100', '1'], build_cache=build_cache)
+            self.assertEqual(build_cache.num_hits, expected_num_hits)
+        # the restored build trees refer to their own location
+        cmake_cache = (tmp_dir / 'campaign' / 'worker001' / 'build' / 'CMakeCache.txt').read_text(encoding='utf8')
+        self.assertIn(str(tmp_dir / 'campaign' / 'worker001' / 'build'), cmake_cache)
+        self.assertNotIn(str(tmp_dir / 'campaign' / 'worker000' / 'build'), cmake_cache)
+        # the same sources at another location are a different build, as the build tree refers to its sources by their path
+        for src_dir_name in ['srcA', 'srcB']:
+            shutil.copytree(Path('test/mamul1'), tmp_dir / src_dir_name)
+            starbench_cmake_app(source_code_provider=ExistingDir(tmp_dir / src_dir_name), output_measurements_file_path=tmp_dir / 'measurements.tsv', tmp_dir=tmp_dir / f'campaign-{src_dir_name}', num_cores=1, benchmark_command=['./mamul1', '100', '1'], build_cache=build_cache)
+        self.assertEqual(build_cache.num_hits, 1)
+        self.assertIn(f'CMAKE_HOME_DIRECTORY:INTERNAL={tmp_dir / "srcB"}', (tmp_dir / 'campaign-srcB' / 'worker000' / 'build' / 'CMakeCache.txt').read_text(encoding='utf8'))
+
+    def test_build_once(self):
+        logging.info('test_build_once')
+        source_code_provider = ExistingDir(Path('test/mamul1').absolute())
+        tmp_dir = Path('tmp/build_once').absolute()
+        starbench_cmake_app(source_code_provider=source_code_provider, output_measurements_file_path=tmp_dir / 'measurements.tsv', tmp_dir=tmp_dir, num_cores=2, benchmark_command=['./mamul1', '100', '1'], build_once=True, clone_method='auto')
+        reference_exe_stat = (tmp_dir / 'reference' / 'build' / 'mamul1').stat()
+        for worker_id in range(2):
+            worker_build_dir = tmp_dir / f'worker{worker_id:03d}' / 'build'
+            exe_stat = (worker_build_dir / 'mamul1').stat()
+            # the executable is either a copy on write clone or a hard link of the reference one
+            self.assertTrue(exe_stat.st_ino == reference_exe_stat.st_ino or exe_stat.st_size == reference_exe_stat.st_size)
+            self.assertIn(str(worker_build_dir), (worker_build_dir / 'CMakeCache.txt').read_text(encoding='utf8'))
+        # the reference tree has been built once, by a parallel build
+        self.assertEqual(StarbenchResults(tmp_dir / 'measurements.tsv', phase='build').get_num_runs(), 1)
+        self.assertEqual(StarbenchResults(tmp_dir / 'measurements.tsv', phase='benchmark').get_num_runs(), 2)
+
+    def test_build_phases(self):
+        logging.info('test_build_phases')
+        source_code_provider = ExistingDir(Path('test/mamul1').absolute())
+        tmp_dir = Path('tmp/build_phases').absolute()
+        measurements_file_path = tmp_dir / 'measurements.tsv'
+        starbench_cmake_app(source_code_provider=source_code_provider, output_measurements_file_path=measurements_file_path, tmp_dir=tmp_dir, num_cores=1, benchmark_command=['./mamul1', '100', '1'], phase_stop_conditions={'build': StopAfterFixedNumRuns(3)}, rebuild_mode='clean')
+        measurements = MeasurementsTable.read_tsv(measurements_file_path)
+        self.assertEqual(measurements.get_column('phase').count('create_build_dir'), 1)
+        self.assertEqual(measurements.get_column('phase').count('configure'), 1)
+        build_results = StarbenchResults(measurements_file_path, phase='build')
+        self.assertEqual(build_results.get_num_runs(), 3)
+        self.assertEqual(len(build_results.resource_usages), 3)
+        # the last build, which followed a clean, has compiled the sources again
+        self.assertIn('Building Fortran object', (tmp_dir / 'worker000' / 'build_stdout.txt').read_text(encoding='utf8'))
+        self.assertEqual(get_between_builds_command('build', 'incremental', 'cmake', Path('/src'), [Path('mamul1.F90')]), ['cmake', '-E', 'touch', '/src/mamul1.F90'])
+        self.assertIsNone(get_between_builds_command('configure', 'noop', 'cmake', Path('/src')))
+        with self.assertRaises(StarBenchException):
+            get_between_builds_command('build', 'incremental', 'cmake', Path('/src'))
+
+    def test_ctest_tests(self):
+        logging.info('test_ctest_tests')
+        # a test suite with a stable test and a noisy one
+        src_dir = Path('tmp/ctest_tests/src').absolute()
+        build_dir = Path('tmp/ctest_tests/build').absolute()
+        shutil.rmtree(src_dir.parent, ignore_errors=True)
+        src_dir.mkdir(parents=True)
+        build_dir.mkdir(parents=True)
+        (src_dir / 'CMakeLists.txt').write_text(f'cmake_minimum_required(VERSION 3.10)\nproject(ctest_tests NONE)\nenable_testing()\nadd_test(NAME stable.test COMMAND ${{CMAKE_COMMAND}} -E sleep 0.2)\nadd_test(NAME noisy_test COMMAND {sys.executable} -c "import random, time; time.sleep(random.uniform(0.01, 0.3))")\n', encoding='utf8')
+        subprocess.run(['cmake', str(src_dir)], cwd=build_dir, check=True, stdout=subprocess.DEVNULL)
+        # the ctest log is used when there's no junit report
+        subprocess.run(['ctest'], cwd=build_dir, check=True, stdout=subprocess.DEVNULL)
+        test_times = CtestTestTimesCollector().collect(build_dir)
+        self.assertEqual(sorted(test_times.keys()), ['ctest_test_time.noisy_test', 'ctest_test_time.stable.test'])
+        self.assertAlmostEqual(test_times['ctest_test_time.stable.test'], 0.2, delta=0.05)
+        self.assertEqual(CtestTestTimesCollector().collect(build_dir), {})
+        # the stable test converges first, and is then left out of the runs
+        stop_condition = StopWhenTestsConverged(max_relative_half_width=0.1, min_num_runs=3, max_num_runs=8)
+        bench = CommandPerfEstimator(run_command=['ctest', '--output-junit', 'report.xml'], num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=stop_condition, run_command_cwd=build_dir, stdout_filepath=build_dir / 'bench_stdout.txt', metric_extractors=[CtestTestTimesCollector(Path('report.xml'))])
+        results = bench.run()
+        self.assertIn('stable.test', stop_condition.converged_tests)
+        self.assertEqual(stop_condition.get_run_args(bench)[1], '^(stable\\.test)$' if 'noisy_test' not in stop_condition.converged_tests else '^(noisy_test|stable\\.test)$')
+        test_stats = {row['test']: row for row in compute_test_stats_table(results).rows}
+        self.assertGreaterEqual(test_stats['stable.test']['num_runs'], 3)
+        self.assertGreater(test_stats['noisy_test']['num_runs'], test_stats['stable.test']['num_runs'])
+        self.assertAlmostEqual(test_stats['stable.test']['mean_duration'], 0.2, delta=0.05)
+        self.assertLessEqual(test_stats['stable.test']['relative_ci_half_width'], 0.1)
+        # the converged tests are added to the tests excluded by the benchmark command, as ctest only keeps the last -E
+        for run_command in [['ctest', '-E', 'foo'], ['ctest', '--exclude-regex', 'foo'], ['ctest', '--exclude-regex=foo']]:
+            bench = CommandPerfEstimator(run_command=run_command, num_cores_per_run=1, num_parallel_runs=1, max_num_cores=1, stop_condition=stop_condition, run_command_cwd=build_dir)
+            self.assertEqual(stop_condition.get_run_args(bench), [])
+            stop_condition.converged_tests = {'stable.test', 'noisy_test'}
+            self.assertEqual(stop_condition.get_run_args(bench), ['-E', 'foo|^(noisy_test|stable\\.test)$'])
+        # the per-test statistics of a matrix campaign are summarized per variant
+        matrix = CampaignMatrix.from_json({'cmake-options': {'a': [], 'b': ['-DUNUSED=1']}, 'benchmark-commands': {'all': 'ctest', 'stable': 'ctest -R stable'}})
+        for interleaved in [False, True]:
+            matrix.interleaved = interleaved
+            measurements_file_path = src_dir.parent / 'matrix' / 'measurements.tsv'
+            starbench_cmake_app_matrix(ExistingDir(src_dir), matrix, measurements_file_path, tmp_dir=src_dir.parent / 'matrix', num_cores=1, ctest_tests=True)
+            matrix_test_stats = MeasurementsTable.read_tsv(get_tests_file_path(measurements_file_path))
+            self.assertNotIn('variant', matrix_test_stats.columns)
+            self.assertEqual(sorted(zip(matrix_test_stats.get_column('cmake_options'), matrix_test_stats.get_column('benchmark_command'), matrix_test_stats.get_column('test'))), [('a', 'all', 'noisy_test'), ('a', 'all', 'stable.test'), ('a', 'stable', 'stable.test'), ('b', 'all', 'noisy_test'), ('b', 'all', 'stable.test'), ('b', 'stable', 'stable.test')])
+
+    def test_results_history(self):
+        logging.info('test_results_history')
+        source_code_provider = ExistingDir(Path('test/mamul1').absolute())
+        tmp_dir = Path('tmp/history').absolute()
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        history = ResultsHistory(tmp_dir / 'history.sqlite')
+        for nightly_id in ['1', '2']:
+            starbench_cmake_app(source_code_provider=source_code_provider, output_measurements_file_path=tmp_dir / 'measurements.tsv', tmp_dir=tmp_dir / 'campaign', num_cores=2, benchmark_command=['./mamul1', '100', '1'], history=history, campaign_metadata={'nightly': nightly_id})
+        # the history contains the runs of both campaigns, whereas the measurements file only contains the last campaign
+        self.assertEqual(StarbenchResults.from_history(history).get_num_runs(), 4)
+        self.assertEqual(StarbenchResults(tmp_dir / 'measurements.tsv').get_num_runs(), 2)
+        nightly2_results = StarbenchResults.from_history(history, metadata={'nightly': '2'})
+        self.assertEqual(nightly2_results.get_num_runs(), 2)
+        self.assertEqual(len(nightly2_results.resource_usages), 2)
+        self.assertEqual(len(nightly2_results.start_times), 2)
+        build_measurements = history.query(phase='build', metadata={'nightly': '1'})
+        self.assertEqual(set(build_measurements.get_column('cmake_options')), {'[]'})
+        self.assertEqual(build_measurements.get_column('num_cores'), [2, 2])
+        # the other columns of the runs (metrics, variant, flags) are also stored
+        results = StarbenchResults()
+        results.add_measurement(0, 1.0, worker_id=0, variant='A', metrics={'gflops': 12.5}, interferences=[], iteration_durations=[0.5, 0.5], start_skew=0.001, is_ramp=True)
+        results.add_measurement(1, 2.0, worker_id=0, variant='B', metrics={'gflops': 6.25}, interferences=['foreign_load'], start_skew=0.0, is_ramp=False)
+        measurements = MeasurementsTable()
+        measurements.add_results('benchmark', results)
+        history.add_campaign(measurements, CampaignInfo(None, [], ['./mamul1'], 1, 1, datetime.now(), datetime.now(), metadata={'nightly': '3'}))
+        history_results = StarbenchResults.from_history(history, metadata={'nightly': '3'})
+        self.assertEqual(sorted(history_results.variants.values()), ['A', 'B'])
+        self.assertEqual(sorted(metrics['gflops'] for metrics in history_results.metrics.values()), [6.25, 12.5])
+        self.assertEqual(list(history_results.get_variant_results('B').metrics.values()), [{'gflops': 6.25}])
+        self.assertEqual(len(history_results.get_contaminated_run_ids()), 1)
+        self.assertEqual(len(history_results.get_ramp_run_ids()), 1)
+        self.assertEqual(sorted(history_results.iteration_durations.values()), [[0.5, 0.5]])
+        # an interleaved campaign is recorded as one campaign per variant, with its own benchmark command
+        starbench_cmake_app(source_code_provider=source_code_provider, output_measurements_file_path=tmp_dir / 'measurements.tsv', tmp_dir=tmp_dir / 'campaign', num_cores=2, benchmark_command=['./mamul1', '100', '1'], interleaved_benchmark_command=['./mamul1', '120', '1'], stop_condition=StopAfterNumRuns(4), history=history, campaign_metadata={'nightly': '4'})
+        for variant, matrix_size in [('A', '100'), ('B', '120')]:
+            variant_measurements = history.query(phase='benchmark', metadata={'nightly': '4', 'variant': variant})
+            self.assertEqual(set(variant_measurements.get_column('benchmark_command')), {json.dumps(['./mamul1', matrix_size, '1'])})
+            self.assertEqual(set(variant_measurements.get_column('variant')), {variant})
+            self.assertEqual(set(StarbenchResults.from_history(history, metadata={'nightly': '4', 'variant': variant}).variants.values()), {variant})
+        self.assertEqual(history.query(phase='build', metadata={'nightly': '4'}).get_column('benchmark_command'), [None, None])
+
+    def test_compare(self):
+        logging.info('test_compare')
+        tmp_dir = Path('tmp/compare').absolute()
+        tmp_dir.mkdir(exist_ok=True, parents=True)
+        # test_b becomes 20 % slower, and its throughput 20 % lower, whereas test_a doesn't change
+        for campaign, slowdown in [('baseline', 1.0), ('candidate', 1.2)]:
+            measurements = MeasurementsTable(['test', 'phase', 'run_id', 'duration', 'metric_gflops'])
+            for run_id in range(10):
+                noise = 1.0 + 0.001 * ((run_id * 7) % 10)
+                measurements.add_row({'test': 'test_a', 'phase': 'benchmark', 'run_id': run_id, 'duration': 1.0 * noise, 'metric_gflops': 10.0 / noise})
+                measurements.add_row({'test': 'test_b', 'phase': 'benchmark', 'run_id': run_id, 'duration': 2.0 * noise * slowdown, 'metric_gflops': 5.0 / noise / slowdown})
+            measurements.write_tsv(tmp_dir / f'{campaign}.tsv')
+        self.assertEqual(compare_main(['--baseline', str(tmp_dir / 'baseline.tsv'), '--candidate', str(tmp_dir / 'baseline.tsv')]), 0)
+        self.assertEqual(compare_main(['--baseline', str(tmp_dir / 'baseline.tsv'), '--candidate', str(tmp_dir / 'candidate.tsv'), '--higher-is-better', 'metric_gflops', '--output-report', str(tmp_dir / 'report.tsv')]), 1)
+        report = MeasurementsTable.read_tsv(tmp_dir / 'report.tsv')
+        self.assertEqual(len(report.rows), 4)  # 2 tests x 2 metrics
+        for row in report.rows:
+            self.assertEqual(row['is_regression'], row['test'] == 'test_b')
+            self.assertLessEqual(row['relative_change_low'], row['relative_change'])
+            self.assertLessEqual(row['relative_change'], row['relative_change_high'])
+        # the slowdown is below a 30 % threshold
+        self.assertEqual(compare_main(['--baseline', str(tmp_dir / 'baseline.tsv'), '--candidate', str(tmp_dir / 'candidate.tsv'), '--slowdown-threshold', '0.3']), 0)
+
+    def test_campaign_matrix(self):
+        logging.info('test_campaign_matrix')
+        source_code_provider = ExistingDir(Path('test/mamul1').absolute())
+        tmp_dir = Path('tmp/matrix').absolute()
+        matrix = CampaignMatrix.from_json({
+            'cmake-options': {'release': ['-DCMAKE_BUILD_TYPE=Release'], 'debug': ['-DCMAKE_BUILD_TYPE=Debug']},
+            'benchmark-commands': {'n100': './mamul1 100 1', 'n200': ['./mamul1', '200', '1']}})
+        self.assertEqual(len(matrix.get_variants()), 4)
+        all_results = starbench_cmake_app_matrix(source_code_provider, matrix, tmp_dir / 'measurements.tsv', tmp_dir=tmp_dir, num_cores=1, build_once=True)
+        self.assertEqual(sorted(all_results.keys()), sorted(matrix.get_variants()))
+        measurements = MeasurementsTable.read_tsv(tmp_dir / 'measurements.tsv')
+        # each build variant is built once, and each variant is benchmarked once
+        self.assertEqual(len(measurements.filter(phase='build').rows), 2)
+        benchmark_measurements = measurements.filter(phase='benchmark')
+        self.assertEqual(sorted(zip(benchmark_measurements.get_column('cmake_options'), benchmark_measurements.get_column('toolchain'), benchmark_measurements.get_column('benchmark_command'))), sorted(matrix.get_variants()))
+        self.assertIn('CMAKE_BUILD_TYPE:STRING=Debug', (tmp_dir / 'debug' / 'default' / 'reference' / 'build' / 'CMakeCache.txt').read_text(encoding='utf8'))
+        # the build variants alternate run by run on the same workers
+        matrix.interleaved = True
+        all_results = starbench_cmake_app_matrix(source_code_provider, matrix, tmp_dir / 'interleaved_measurements.tsv', tmp_dir=tmp_dir, num_cores=1, build_once=True, num_warmup_runs=1)
+        self.assertEqual(sorted(all_results.keys()), sorted(matrix.get_variants()))
+        for results in all_results.values():
+            self.assertEqual((len(results.warmup_durations), results.get_num_runs()), (1, 1))
+
+    def test_git_cloner_mirror(self):
+        logging.info('test_git_cloner_mirror')
+        tmp_dir = Path('tmp/git_cloner').absolute()
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        # a local repository with 2 commits
+        repos_dir = tmp_dir / 'repos'
+        repos_dir.mkdir(parents=True)
+        commit_ids = []
+        for version in ['1', '2']:
+            (repos_dir / 'version.txt').write_text(version, encoding='utf8')
+            subprocess.run(['git', 'init', '-q'], cwd=repos_dir, check=True)
+            subprocess.run(['git', 'add', 'version.txt'], cwd=repos_dir, check=True)
+            subprocess.run(['git', '-c', 'user.name=starbench', '-c', 'user.email=starbench@localhost', 'commit', '-q', '-m', f'version {version}'], cwd=repos_dir, check=True)
+            commit_ids.append(subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repos_dir, check=True, capture_output=True, text=True).stdout.strip())
+        for version, commit_id in zip(['1', '2'], commit_ids):
+            git_cloner = GitCloner(f'file://{repos_dir}', tmp_dir / f'src{version}', commit_id, mirror_dir=tmp_dir / 'mirror.git')
+            src_dir = git_cloner.get_source_tree_path()
+            self.assertEqual((src_dir / 'version.txt').read_text(encoding='utf8'), version)
+        # an existing worktree is reused
+        git_cloner = GitCloner(f'file://{repos_dir}', tmp_dir / 'src1', commit_ids[1], mirror_dir=tmp_dir / 'mirror.git')
+        self.assertEqual((git_cloner.get_source_tree_path() / 'version.txt').read_text(encoding='utf8'), '2')
+        # the credentials are given to git by a credential helper, and are stored neither in the mirror nor in the clones
+        password_file_path = tmp_dir / 'password.txt'
+        password_file_path.write_text('secret', encoding='utf8')
+        for mirror_dir, git_dir in [(tmp_dir / 'mirror.git', tmp_dir / 'mirror.git'), (None, tmp_dir / 'src4')]:
+            git_cloner = GitCloner(f'file://{repos_dir}', tmp_dir / 'src4', commit_ids[1], git_user='bench', password_provider=LocalFilePP(password_file_path), mirror_dir=mirror_dir)
+            git_cloner.get_source_tree_path()
+            if mirror_dir is not None:
+                shutil.rmtree(tmp_dir / 'src4')
+            self.assertEqual(subprocess.run(['git', 'config', 'remote.origin.url'], cwd=git_dir, check=True, capture_output=True, text=True).stdout.strip(), f'file://{repos_dir}')
+        git_options, env_vars = git_cloner._get_credentials_config()
+        self.assertNotIn('secret', ' '.join(git_options))
+        credentials = subprocess.run(['git'] + git_options + ['credential', 'fill'], input='protocol=https\nhost=example.com\n\n', env=dict(os.environ, **env_vars), check=True, capture_output=True, text=True).stdout
+        self.assertIn('username=bench\n', credentials)
+        self.assertIn('password=secret\n', credentials)
+
+    def test_bisect_slowdown(self):
+        logging.info('test_bisect_slowdown')
+        tmp_dir = Path('tmp/bisect').absolute()
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        # a local repository with 8 commits, where the program becomes slower from the 6th commit (version 5) on
+        repos_dir = tmp_dir / 'repos'
+        repos_dir.mkdir(parents=True)
+        subprocess.run(['git', 'init', '-q'], cwd=repos_dir, check=True)
+        commit_ids = []
+        for version in range(8):
+            (repos_dir / 'duration.txt').write_text('2.0' if version >= 5 else '1.0', encoding='utf8')
+            (repos_dir / 'version.txt').write_text(str(version), encoding='utf8')
+            subprocess.run(['git', 'add', '.'], cwd=repos_dir, check=True)
+            subprocess.run(['git', '-c', 'user.name=starbench', '-c', 'user.email=starbench@localhost', 'commit', '-q', '-m', f'version {version}'], cwd=repos_dir, check=True)
+            commit_ids.append(subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=repos_dir, check=True, capture_output=True, text=True).stdout.strip())
+
+        def run_campaign(source_tree_provider, output_measurements_file_path):
+            # simulates a benchmark of the program: its durations are read from the source tree
+            duration = float((source_tree_provider.get_source_tree_path() / 'duration.txt').read_text(encoding='utf8'))
+            results = StarbenchResults()
+            for run_id in range(10):
+                results.add_measurement(run_id, duration * (1.0 + 0.001 * run_id))
+            output_measurements_file_path.write_text('\trun_id\tduration\n' + ''.join(f'{run_id}\t{run_id}\t{duration}\n' for run_id, duration in results.durations.items()), encoding='utf8')
+            return results
+
+        git_cloner = GitCloner(f'file://{repos_dir}', tmp_dir / 'src', None, mirror_dir=tmp_dir / 'mirror.git')
+        commits = git_cloner.list_commits(commit_ids[0], commit_ids[-1])
+        self.assertEqual(commits, commit_ids)
+        benchmarker = CommitBenchmarker(git_cloner, run_campaign, tmp_dir / 'commits')
+        self.assertEqual(bisect_slowdown(benchmarker, commits, summary_file_path=tmp_dir / 'bisect.tsv'), commit_ids[5])
+        # a binary search doesn't need to benchmark all commits
+        self.assertLess(len(benchmarker.results), len(commit_ids))
+        self.assertIsNone(bisect_slowdown(benchmarker, commits[:5]))
+        all_results = sweep_commits(benchmarker, commits[3:7], tmp_dir / 'sweep.tsv')
+        self.assertEqual([results.get_median_duration() > 1.5 for results in all_results.values()], [False, False, True, True])
 
 
 if __name__ == '__main__':